@@ -0,0 +1,332 @@
+#!/usr/bin/env python3
+"""
+Benchmark de bout en bout : chargement, lecture audio, passe du modèle, décodage, RTF, mémoire
+Usage: python benchmark.py --engines torch-fp32 torch-int8 onnx --output bench.json
+       python benchmark.py --baseline bench_ref.json            # mesure puis compare
+       python benchmark.py --compare bench.json bench_ref.json  # compare deux rapports
+"""
+import sys
+from pathlib import Path
+import argparse
+import json
+import multiprocessing
+import platform
+import subprocess
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from loguru import logger
+
+# Ajouter src/ au PYTHONPATH
+sys.path.insert(0, str(Path(__file__).parent / "src"))
+
+import config
+
+try:
+    import resource
+except ImportError:  # Windows : pas de mesure de RSS max
+    resource = None
+
+# Métriques comparées à la baseline : sens de l'amélioration
+METRICS = {
+    'load_s': "lower",
+    'forward_x_realtime': "higher",
+    'greedy_ms_p50': "lower",
+    'lm_ms_p50': "lower",
+    'lm_load_s': "lower",
+    'rtf_greedy': "lower",
+    'rtf_lm': "lower",
+    'peak_rss_mb': "lower",
+}
+
+# Mots du corpus digits (références des fichiers synthétiques)
+DIGITS = ["zero", "one", "two", "three", "four", "five", "six", "seven", "eight", "nine"]
+
+
+def parse_args():
+    """Parse les arguments de ligne de commande"""
+    parser = argparse.ArgumentParser(
+        description="Benchmark reproductible du pipeline ASR, avec comparaison à une baseline"
+    )
+
+    parser.add_argument("--engines", type=str, nargs="+", default=["torch-fp32"],
+                        help="Configurations : <backend>-<précision> (torch-fp32, torch-int8, torch-bf16, onnx)")
+    parser.add_argument("--corpus", type=Path, default=None,
+                        help="Corpus réel (sous-ensemble fixe, ordre du manifeste) ; défaut: corpus synthétique")
+    parser.add_argument("--num-files", type=int, default=40,
+                        help="Nombre de fichiers (synthétiques ou premiers du corpus) (défaut: 40)")
+    parser.add_argument("--seed", type=int, default=0,
+                        help="Seed du corpus synthétique (défaut: 0)")
+    parser.add_argument("--lm-path", type=Path, default=None,
+                        help="Modèle de langage : mesure aussi le décodage beam search avec LM")
+    parser.add_argument("--threads", type=int, default=None,
+                        help="Nombre de threads PyTorch / ONNX Runtime (défaut: choix de la bibliothèque)")
+    parser.add_argument("--output", type=Path, default=config.PROJECT_ROOT / "benchmark.json",
+                        help="Rapport JSON")
+    parser.add_argument("--baseline", type=Path, default=None,
+                        help="Rapport de référence : signale les régressions après la mesure")
+    parser.add_argument("--compare", type=Path, nargs=2, metavar=("ACTUEL", "BASELINE"), default=None,
+                        help="Compare deux rapports existants sans rien mesurer")
+    parser.add_argument("--tolerance", type=float, default=0.10,
+                        help="Dégradation relative tolérée avant de signaler une régression (défaut: 0.10)")
+
+    return parser.parse_args()
+
+
+def make_synthetic_corpus(out_dir: Path, num_files: int, seed: int = 0) -> list:
+    """
+    Génère un corpus synthétique déterministe (WAV + référence .txt)
+
+    Durées de 1 à 6 s, fréquences 8 et 16 kHz mélangées (le ré-échantillonnage
+    est donc mesuré), signal = sinusoïdes + bruit. Le contenu n'est pas de la
+    parole : seules les performances sont mesurées, pas le WER.
+    """
+    import soundfile as sf
+
+    rng = np.random.default_rng(seed)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    wav_files = []
+    for i in range(num_files):
+        sr = 16000 if i % 2 == 0 else 8000
+        duration = rng.uniform(1.0, 6.0)
+        t = np.arange(int(duration * sr)) / sr
+        freqs = rng.uniform(100, 1000, size=3)
+        signal = sum(np.sin(2 * np.pi * f * t) for f in freqs) / 3 * 0.3
+        signal = (signal + 0.05 * rng.standard_normal(len(t))).astype(np.float32)
+
+        wav_path = out_dir / f"synth_{i:04d}.wav"
+        sf.write(wav_path, signal, sr)
+        wav_path.with_suffix('.txt').write_text(" ".join(rng.choice(DIGITS, size=3)), encoding='utf-8')
+        wav_files.append(wav_path)
+    return wav_files
+
+
+def summarize_ms(seconds: list) -> dict:
+    """Moyenne et percentiles (ms) d'une liste de durées en secondes"""
+    values = np.array(seconds) * 1000
+    return {
+        'mean': float(values.mean()),
+        'p50': float(np.percentile(values, 50)),
+        'p95': float(np.percentile(values, 95)),
+    }
+
+
+def peak_rss_mb() -> float:
+    """RSS maximal du processus courant (Mo), None si indisponible"""
+    if resource is None:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss : Ko sous Linux, octets sous macOS
+    return rss / 1024 ** 2 if sys.platform == "darwin" else rss / 1024
+
+
+def load_engine(engine: str, threads: int = None):
+    """Charge (processor, modèle) pour une configuration <backend>-<précision>"""
+    import model_loader
+
+    backend, _, precision = engine.partition("-")
+    precision = precision or "fp32"
+    if backend == "onnx":
+        return model_loader.load_onnx_model(num_threads=threads)
+    if backend != "torch":
+        raise ValueError(f"Backend inconnu: {backend} (torch ou onnx)")
+    if precision == "int8":
+        processor, model = model_loader.load_quantized_model()
+        return processor, model_loader.optimize_for_inference(model, precision="fp32", num_threads=threads)
+    processor, model = model_loader.load_wav2vec2_model()
+    return processor, model_loader.optimize_for_inference(model, precision=precision, num_threads=threads)
+
+
+def run_engine(engine: str, wav_files: list, lm_path: Path = None, threads: int = None) -> dict:
+    """
+    Mesure une configuration (exécuté dans un processus dédié : temps de
+    chargement et RSS maximal propres à la configuration)
+    """
+    import audio_utils
+    import inference
+    import model_loader
+    import scheduler
+
+    start = time.perf_counter()
+    processor, model = load_engine(engine, threads)
+    load_s = time.perf_counter() - start
+
+    # Audio pré-chargé : la passe du modèle est mesurée seule
+    waveforms = {p: audio_utils.load_audio(p, config.SAMPLE_RATE)[0].squeeze(0).numpy() for p in wav_files}
+    audio_s = sum(len(w) for w in waveforms.values()) / config.SAMPLE_RATE
+    lengths = {p: len(w) for p, w in waveforms.items()}
+    batches = scheduler.plan_batches(wav_files, config.MAX_BATCH_SAMPLES, lengths=lengths)
+
+    # Échauffement (allocations, noyaux) hors mesure
+    inference.compute_logits_batch([waveforms[p] for p in batches[0]], processor, model)
+
+    logits = {}
+    start = time.perf_counter()
+    for batch in batches:
+        for p, l in zip(batch, inference.compute_logits_batch([waveforms[p] for p in batch], processor, model)):
+            logits[p] = l
+    forward_s = time.perf_counter() - start
+
+    greedy = []
+    for p in wav_files:
+        start = time.perf_counter()
+        inference.decode_logits(logits[p], processor)
+        greedy.append(time.perf_counter() - start)
+
+    result = {
+        'engine': engine,
+        'load_s': load_s,
+        'num_batches': len(batches),
+        'forward_s': forward_s,
+        'forward_x_realtime': audio_s / forward_s,
+        'greedy_ms': summarize_ms(greedy),
+        'rtf_greedy': (forward_s + sum(greedy)) / audio_s,
+    }
+
+    if lm_path is not None:
+        start = time.perf_counter()
+        decoder = model_loader.load_decoder(processor, lm_path)
+        result['lm_load_s'] = time.perf_counter() - start
+        lm = []
+        for p in wav_files:
+            start = time.perf_counter()
+            inference.decode_logits(logits[p], processor, decoder)
+            lm.append(time.perf_counter() - start)
+        result['lm_ms'] = summarize_ms(lm)
+        result['rtf_lm'] = (forward_s + sum(lm)) / audio_s
+
+    result['peak_rss_mb'] = peak_rss_mb()
+    return result
+
+
+def measure_audio_loading(wav_files: list) -> dict:
+    """Latence de lecture + ré-échantillonnage par fichier (audio_utils.load_audio)"""
+    import audio_utils
+
+    latencies = []
+    audio_s = 0.0
+    for p in wav_files:
+        start = time.perf_counter()
+        waveform, _ = audio_utils.load_audio(p, config.SAMPLE_RATE)
+        latencies.append(time.perf_counter() - start)
+        audio_s += waveform.shape[-1] / config.SAMPLE_RATE
+    return {'files': len(wav_files), 'audio_s': audio_s, 'latency_ms': summarize_ms(latencies)}
+
+
+def flatten(engine_result: dict) -> dict:
+    """Métriques de METRICS extraites d'un résultat de configuration"""
+    flat = {k: v for k, v in engine_result.items() if not isinstance(v, dict)}
+    for key in ("greedy_ms", "lm_ms"):
+        if key in engine_result:
+            flat[f"{key}_p50"] = engine_result[key]['p50']
+    return {k: flat[k] for k in METRICS if flat.get(k) is not None}
+
+
+def compare_reports(current: dict, baseline: dict, tolerance: float) -> list:
+    """
+    Compare deux rapports configuration par configuration
+
+    Returns:
+        Liste des régressions (engine, métrique, baseline, actuel, variation relative)
+    """
+    regressions = []
+    print(f"\n{'Configuration':<14} {'Métrique':<20} {'Baseline':>11} {'Actuel':>11} {'Δ':>8}")
+    print("-" * 68)
+    for engine, result in current['engines'].items():
+        if engine not in baseline['engines']:
+            print(f"{engine:<14} (absente de la baseline)")
+            continue
+        now, ref = flatten(result), flatten(baseline['engines'][engine])
+        for metric, direction in METRICS.items():
+            if metric not in now or metric not in ref or ref[metric] == 0:
+                continue
+            change = (now[metric] - ref[metric]) / abs(ref[metric])
+            worse = -change if direction == "higher" else change
+            flag = "❌" if worse > tolerance else ""
+            if flag:
+                regressions.append((engine, metric, ref[metric], now[metric], change))
+            print(f"{engine:<14} {metric:<20} {ref[metric]:>11.3f} {now[metric]:>11.3f} {change:>+7.1%} {flag}")
+    return regressions
+
+
+def git_revision() -> str:
+    """Commit courant (None hors dépôt git)"""
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=Path(__file__).parent,
+            capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    """Fonction principale"""
+    args = parse_args()
+    config.setup_logging()
+
+    if args.compare:
+        current, baseline = (json.loads(p.read_text(encoding='utf-8')) for p in args.compare)
+        regressions = compare_reports(current, baseline, args.tolerance)
+        print(f"\n{len(regressions)} régression(s) au-delà de {args.tolerance:.0%}")
+        return 1 if regressions else 0
+
+    with tempfile.TemporaryDirectory() as tmp:
+        if args.corpus is not None:
+            import manifest
+            entries = manifest.build_manifest(args.corpus)[:args.num_files]
+            wav_files = manifest.wav_paths(entries, args.corpus)
+            source = str(args.corpus)
+        else:
+            wav_files = make_synthetic_corpus(Path(tmp), args.num_files, args.seed)
+            source = f"synthétique (seed={args.seed})"
+        logger.info(f"Benchmark sur {len(wav_files)} fichiers ({source})")
+
+        report = {
+            'meta': {
+                'timestamp': time.strftime("%Y-%m-%dT%H:%M:%S"),
+                'git': git_revision(),
+                'python': platform.python_version(),
+                'platform': platform.platform(),
+                'cpu_count': multiprocessing.cpu_count(),
+                'model': config.MODEL_NAME,
+                'corpus': source,
+                'threads': args.threads,
+            },
+            'audio_loading': measure_audio_loading(wav_files),
+            'engines': {},
+        }
+
+        # Un processus neuf par configuration (spawn : rien n'est hérité du parent)
+        context = multiprocessing.get_context("spawn")
+        for engine in args.engines:
+            logger.info(f"Configuration {engine}...")
+            with ProcessPoolExecutor(max_workers=1, mp_context=context) as pool:
+                try:
+                    result = pool.submit(run_engine, engine, wav_files, args.lm_path, args.threads).result()
+                except Exception as e:
+                    logger.error(f"Échec de la configuration {engine}: {e}")
+                    continue
+            report['engines'][engine] = result
+            logger.info(
+                f"{engine}: chargement {result['load_s']:.2f}s | "
+                f"passe du modèle x{result['forward_x_realtime']:.1f} temps réel | "
+                f"RTF greedy {result['rtf_greedy']:.3f} | RSS max {result['peak_rss_mb'] or 0:.0f} Mo"
+            )
+
+    args.output.parent.mkdir(parents=True, exist_ok=True)
+    args.output.write_text(json.dumps(report, indent=2, ensure_ascii=False), encoding='utf-8')
+    print(f"\nRapport sauvegardé : {args.output}")
+
+    if args.baseline is not None:
+        baseline = json.loads(args.baseline.read_text(encoding='utf-8'))
+        regressions = compare_reports(report, baseline, args.tolerance)
+        print(f"\n{len(regressions)} régression(s) au-delà de {args.tolerance:.0%}")
+        return 1 if regressions else 0
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Benchmark du temps de démarrage (imports des modules et --help des scripts)
+Usage: python benchmark_startup.py --repeat 5 --max-seconds 1.0
+"""
+import sys
+from pathlib import Path
+import argparse
+import re
+import statistics
+import subprocess
+import time
+
+ROOT = Path(__file__).parent
+
+# Commandes mesurées : imports isolés et démarrage des points d'entrée
+TARGETS = {
+    "import config": [sys.executable, "-c", "import sys; sys.path.insert(0, 'src'); import config"],
+    "import evaluation": [sys.executable, "-c", "import sys; sys.path.insert(0, 'src'); import evaluation"],
+    "import inference": [sys.executable, "-c", "import sys; sys.path.insert(0, 'src'); import inference"],
+    "run_asr.py --help": [sys.executable, "run_asr.py", "--help"],
+    "main.py --help": [sys.executable, "main.py", "--help"],
+}
+
+# Cibles soumises au seuil --max-seconds (les autres sont informatives)
+FAST_TARGETS = ("import config", "import evaluation", "run_asr.py --help", "main.py --help")
+
+
+def parse_args():
+    """Parse les arguments de ligne de commande"""
+    parser = argparse.ArgumentParser(
+        description="Mesure le temps de démarrage à froid des modules et scripts du projet"
+    )
+    
+    parser.add_argument("--repeat", type=int, default=5,
+                        help="Nombre de lancements par cible (défaut: 5)")
+    parser.add_argument("--max-seconds", type=float, default=1.0,
+                        help="Seuil pour les cibles rapides (défaut: 1.0 s) ; code de sortie 1 si dépassé")
+    parser.add_argument("--top", type=int, default=5,
+                        help="Nombre d'imports les plus coûteux à afficher par cible (défaut: 5)")
+    
+    return parser.parse_args()
+
+
+def time_command(cmd: list, repeat: int) -> list:
+    """Durées (s) de repeat lancements d'une commande dans un nouvel interpréteur"""
+    durations = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run(cmd, cwd=ROOT, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=True)
+        durations.append(time.perf_counter() - start)
+    return durations
+
+
+def top_imports(cmd: list, top: int) -> list:
+    """Imports les plus coûteux (cumulés, de premier niveau) via python -X importtime"""
+    result = subprocess.run(
+        [cmd[0], "-X", "importtime"] + cmd[1:], cwd=ROOT,
+        stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True
+    )
+    imports = []
+    for line in result.stderr.splitlines():
+        match = re.match(r"import time:\s+\d+ \|\s+(\d+) \| (\s*)(\S+)", line)
+        # Indentation 0 (module cible) ou 2 (ses imports directs)
+        if match and len(match.group(2)) <= 2:
+            imports.append((int(match.group(1)) / 1e6, match.group(3)))
+    return sorted(imports, reverse=True)[:top]
+
+
+def main():
+    """Fonction principale"""
+    args = parse_args()
+    
+    print(f"{'Cible':<22} {'médiane':>9} {'min':>9} {'max':>9}")
+    print("-" * 52)
+    
+    slow = []
+    for name, cmd in TARGETS.items():
+        durations = time_command(cmd, args.repeat)
+        median = statistics.median(durations)
+        print(f"{name:<22} {median:>8.3f}s {min(durations):>8.3f}s {max(durations):>8.3f}s")
+        for seconds, module in top_imports(cmd, args.top):
+            print(f"    {seconds:>7.3f}s  {module}")
+        if name in FAST_TARGETS and median > args.max_seconds:
+            slow.append(name)
+    
+    if slow:
+        print(f"\n❌ Au-delà de {args.max_seconds}s : {', '.join(slow)}")
+        return 1
+    print(f"\n✅ Cibles rapides sous {args.max_seconds}s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
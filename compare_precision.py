@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Rapport précision / vitesse : modèle int8 (quantification dynamique) vs fp32
+Usage: python compare_precision.py --corpus data/corpus --max-files 200
+"""
+import sys
+from pathlib import Path
+import argparse
+import time
+import pandas as pd
+import torch
+from loguru import logger
+
+# Ajouter src/ au PYTHONPATH
+sys.path.insert(0, str(Path(__file__).parent / "src"))
+
+import config
+import model_loader
+import evaluation
+import scheduler
+import pipeline
+import manifest
+
+
+def parse_args():
+    """Parse les arguments de ligne de commande"""
+    parser = argparse.ArgumentParser(
+        description="Compare WER et vitesse du modèle int8 quantifié face au fp32"
+    )
+    
+    parser.add_argument("--corpus", type=Path, default=config.CORPUS_DIR,
+                        help=f"Dossier contenant les fichiers .wav (défaut: {config.CORPUS_DIR})")
+    parser.add_argument("--pattern", type=str, default="**/*.wav",
+                        help="Pattern de recherche des fichiers WAV (défaut: **/*.wav)")
+    parser.add_argument("--skip-scan", action="store_true",
+                        help="Réutiliser le manifeste du corpus sans re-parcourir l'arborescence")
+    parser.add_argument("--lm-path", type=Path, default=None,
+                        help="Modèle de langage optionnel (WER avec LM en plus du greedy)")
+    parser.add_argument("--max-files", type=int, default=None,
+                        help="Nombre max de fichiers à traiter (pour tests rapides)")
+    parser.add_argument("--threads", type=int, default=None,
+                        help="Nombre de threads PyTorch (défaut: choix de PyTorch)")
+    parser.add_argument("--output", type=Path, default=config.PROJECT_ROOT / "precision_report.csv",
+                        help="Fichier CSV du rapport")
+    
+    return parser.parse_args()
+
+
+def evaluate(label, processor, model, batches, decoders, known_refs):
+    """Transcrit le corpus (sur CPU, comme les deux modèles) et mesure WER et temps de la passe du modèle"""
+    references = []
+    hypotheses = {name: [] for name in decoders}
+    
+    start = time.perf_counter()
+    transcriptions = pipeline.run_pipeline(batches, processor, model, decoders, device=torch.device("cpu"))
+    for wav_path, hyps, error in transcriptions:
+        if error is None and known_refs[wav_path] is None:
+            error = FileNotFoundError(f"Transcription introuvable pour {wav_path.name}")
+        if error is not None:
+            logger.error(f"Erreur sur {wav_path.name}: {error}")
+            continue
+        references.append(known_refs[wav_path])
+        for name in decoders:
+            hypotheses[name].append(hyps[name])
+    elapsed = time.perf_counter() - start
+    
+    row = {'Precision': label, 'N': len(references), 'Time_s': elapsed}
+    for name in decoders:
+        row[f'WER_{name}'] = evaluation.compute_wer(references, hypotheses[name])
+    return row
+
+
+def main():
+    """Fonction principale"""
+    args = parse_args()
+    config.setup_logging()
+    
+    # Fichiers du manifeste du corpus (mis à jour incrémentalement)
+    entries = manifest.select(manifest.build_manifest(args.corpus, refresh=not args.skip_scan), args.pattern)
+    if not entries:
+        logger.error(f"Aucun fichier .wav trouvé dans {args.corpus}")
+        return 1
+    
+    if args.max_files:
+        entries = entries[:args.max_files]
+    wav_files = manifest.wav_paths(entries, args.corpus)
+    known_refs = manifest.references(entries, args.corpus)
+    batches = scheduler.plan_batches(wav_files, lengths=manifest.num_samples(entries, args.corpus))
+    
+    rows = []
+    
+    # Référence fp32 (CPU, comme le mode int8)
+    start = time.perf_counter()
+    processor, model = model_loader.load_wav2vec2_model(device="cpu")
+    model = model_loader.optimize_for_inference(model, precision="fp32", num_threads=args.threads)
+    load_fp32 = time.perf_counter() - start
+    
+    decoders = {"Greedy": None}
+    if args.lm_path:
+        decoders["LM"] = model_loader.load_language_model(args.lm_path, processor)
+    
+    rows.append({**evaluate("fp32", processor, model, batches, decoders, known_refs), 'Load_s': load_fp32})
+    del model
+    
+    # int8 (checkpoint quantifié réutilisé s'il existe)
+    start = time.perf_counter()
+    processor, model = model_loader.load_quantized_model()
+    load_int8 = time.perf_counter() - start
+    rows.append({**evaluate("int8", processor, model, batches, decoders, known_refs), 'Load_s': load_int8})
+    
+    df = pd.DataFrame(rows)
+    df['Speedup'] = df['Time_s'].iloc[0] / df['Time_s']
+    for name in decoders:
+        df[f'ΔWER_{name}'] = df[f'WER_{name}'] - df[f'WER_{name}'].iloc[0]
+    df.to_csv(args.output, index=False)
+    
+    print("\n" + "="*70)
+    print(f"PRÉCISION VS VITESSE - {len(wav_files)} fichiers (CPU)")
+    print("="*70)
+    print(df.to_string(index=False, float_format=lambda x: f"{x:.3f}"))
+    print("="*70)
+    print(f"Rapport sauvegardé : {args.output}\n")
+    
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
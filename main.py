@@ -8,21 +8,20 @@ Orchestre l'ensemble du TP :
 4. Génération des graphiques d'analyse (SNR, Locuteur, Longueur)
 """
 
-import pandas as pd
-import matplotlib.pyplot as plt
 import numpy as np
 from pathlib import Path
-from tqdm import tqdm
 from loguru import logger
+import argparse
 import sys
 
 # === IMPORT DES MODULES DU PROJET ===
+# Modules légers uniquement : torch / transformers ne sont importés que pour
+# la transcription (transcribe_corpus), pas pour --analyze-only ; pandas et
+# matplotlib seulement pour l'analyse (--help immédiat)
 sys.path.append("src")
 import config
-import model_loader
-import inference
-import audio_utils
 import evaluation
+import results_io
 
 # === CONFIGURATION DES CHEMINS ===
 # Adaptez ces chemins si votre structure change
@@ -34,30 +33,17 @@ OUTPUT_CSV = config.PROJECT_ROOT / "results_detailed.csv"
 STATS_CSV = config.PROJECT_ROOT / "results_stats.csv"
 PLOTS_DIR = config.PROJECT_ROOT / "plots"
 
-def parse_metadata(wav_path: Path):
-    """
-    Extrait les métadonnées depuis le chemin du fichier.
-    Structure attendue : .../SNRxx/Speaker/SeqXdigits.../file.wav
-    """
-    parts = wav_path.parts
-    
-    # 1. Extraction de la longueur (dossier parent)
-    length_folder = parts[-2]
-    if "seq1" in length_folder: length = "1"
-    elif "seq3" in length_folder: length = "3"
-    elif "seq5" in length_folder: length = "5"
-    else: length = "Unknown"
-    
-    # 2. Extraction du locuteur et SNR
-    speaker = parts[-3]
-    snr = parts[-4]
-    
-    return snr, speaker, length
-
 def plot_with_ci(df_stats, x_col, title, filename, color_no="#4c72b0", color_lm="#dd8452"):
     """
     Trace un diagramme en barres avec les intervalles de confiance (barres d'erreur).
+    Aucun graphique si df_stats est vide (groupes absents du CSV).
     """
+    import matplotlib.pyplot as plt
+
+    if df_stats.empty:
+        logger.warning(f"Aucun groupe pour {filename} : graphique non généré")
+        return
+
     plt.figure(figsize=(10, 6))
     
     # Paramètres de position
@@ -99,65 +85,118 @@ def plot_with_ci(df_stats, x_col, title, filename, color_no="#4c72b0", color_lm=
     plt.close()
     logger.success(f"Graphique généré : {save_path}")
 
-def generate_analysis(df):
+def write_stats_csv(sections, path):
     """
-    Analyse les résultats bruts, calcule les stats par Bootstrap
-    et génère les 4 graphes demandés.
+    Écrit les tableaux de statistiques dans un seul CSV, par sections
+    (ligne "# titre", puis le tableau ; sections séparées par une ligne vide).
     """
-    PLOTS_DIR.mkdir(exist_ok=True)
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        for i, (title, table) in enumerate(sections):
+            if i:
+                f.write("\n")
+            f.write(f"# {title}\n")
+            table.to_csv(f, index=False)
+    logger.success(f"Tableaux statistiques : {path}")
+
+def generate_analysis(df, num_workers=1):
+    """
+    Analyse les résultats bruts, calcule les stats par Bootstrap,
+    génère les 4 graphes demandés et écrit STATS_CSV.
+    """
+    import pandas as pd
+    import matplotlib.pyplot as plt
 
-    def calculate_group_stats(group):
-        refs = group['Reference'].tolist()
-        hyps_no = group['Hyp_NoLM'].tolist()
-        hyps_lm = group['Hyp_LM'].fillna("").tolist()
+    PLOTS_DIR.mkdir(exist_ok=True)
 
-        wer_no, low_no, high_no = evaluation.bootstrap_ci(refs, hyps_no, n_boot=1000)
-        wer_lm, low_lm, high_lm = evaluation.bootstrap_ci(refs, hyps_lm, n_boot=1000)
+    # Comptes S/D/I/N calculés une seule fois pour tout le corpus :
+    # les WER par groupe et le bootstrap ne ré-alignent plus de chaînes
+    df = df.copy()
+    refs_all = df['Reference'].fillna("").tolist()
+    for suffix in ("NoLM", "LM"):
+        counts = evaluation.compute_error_counts(refs_all, df[f'Hyp_{suffix}'].fillna("").tolist())
+        for j, col in enumerate(evaluation.ERROR_COUNT_COLUMNS):
+            df[f'{col}_{suffix}'] = counts[:, j]
 
-        return pd.Series({
-            'WER_NoLM': wer_no, 'CI_Low_NoLM': low_no, 'CI_High_NoLM': high_no,
-            'WER_LM': wer_lm, 'CI_Low_LM': low_lm, 'CI_High_LM': high_lm
-        })
+    cols_no = [f'{col}_NoLM' for col in evaluation.ERROR_COUNT_COLUMNS]
+    cols_lm = [f'{col}_LM' for col in evaluation.ERROR_COUNT_COLUMNS]
 
     logger.info("===== ANALYSE STATISTIQUE =====")
 
+    # Sous-corpus de chaque analyse
+    df_lm = df[
+        (df['SNR'] == 'SNR35dB') &
+        (df['Speaker'] == 'man')
+    ]
+    subsets = {
+        'SNR': df[df['Speaker'] == 'man'],
+        'Speaker': df[df['SNR'] == 'SNR35dB'],
+        'Length': df[
+            (df['SNR'] == 'SNR35dB') &
+            (df['Speaker'].isin(['man', 'woman']))
+        ],
+    }
+
+    # Tous les groupes en une passe : un bootstrap par groupe pour NoLM et LM,
+    # groupes répartis sur num_workers processus
+    groups = {('LM', None): [df_lm[cols_no].to_numpy(), df_lm[cols_lm].to_numpy()]}
+    for col, subset in subsets.items():
+        for value, group in subset.groupby(col):
+            groups[(col, value)] = [group[cols_no].to_numpy(), group[cols_lm].to_numpy()]
+    stats = evaluation.grouped_bootstrap_ci_counts(groups, n_boot=1000, num_workers=num_workers)
+
+    stats_columns = ['WER_NoLM', 'CI_Low_NoLM', 'CI_High_NoLM', 'WER_LM', 'CI_Low_LM', 'CI_High_LM']
+
+    def stats_table(col):
+        rows = []
+        for (name, value), ((wer_no, low_no, high_no), (wer_lm, low_lm, high_lm)) in stats.items():
+            if name == col:
+                rows.append({
+                    col: value,
+                    'WER_NoLM': wer_no, 'CI_Low_NoLM': low_no, 'CI_High_NoLM': high_no,
+                    'WER_LM': wer_lm, 'CI_Low_LM': low_lm, 'CI_High_LM': high_lm
+                })
+        return pd.DataFrame(rows, columns=[col] + stats_columns)
+
     # ============================================================
     # 0) IMPACT DU MODELE DE LANGAGE (SNR35dB, man)
     # ============================================================
     logger.info("Analyse 0/4 : Impact du Modèle de Langage")
 
-    df_lm = df[
-        (df['SNR'] == 'SNR35dB') &
-        (df['Speaker'] == 'man')
-    ]
+    if ('LM', None) in stats:
+        (wer_no, low_no, high_no), (wer_lm, low_lm, high_lm) = stats[('LM', None)]
 
-    refs = df_lm['Reference'].tolist()
-    hyps_no = df_lm['Hyp_NoLM'].tolist()
-    hyps_lm = df_lm['Hyp_LM'].fillna("").tolist()
-
-    wer_no, low_no, high_no = evaluation.bootstrap_ci(refs, hyps_no, n_boot=1000)
-    wer_lm, low_lm, high_lm = evaluation.bootstrap_ci(refs, hyps_lm, n_boot=1000)
-
-    df_lm_stats = pd.DataFrame({
-        "Model": ["Greedy (No LM)", "2-gram LM"],
-        "WER": [wer_no, wer_lm],
-        "CI_Low": [low_no, low_lm],
-        "CI_High": [high_no, high_lm]
-    })
-
-    # Plot LM
-    plt.figure(figsize=(8,6))
-    means = df_lm_stats['WER']
-    errors = [
-        means - df_lm_stats['CI_Low'],
-        df_lm_stats['CI_High'] - means
-    ]
-    plt.bar(df_lm_stats['Model'], means, yerr=errors, capsize=6)
-    plt.ylabel("Word Error Rate (%)")
-    plt.title("Impact du Modèle de Langage (SNR35dB, Man)")
-    plt.grid(axis='y', linestyle='--', alpha=0.3)
-    plt.savefig(PLOTS_DIR / "graph0_lm_ci.png", dpi=300, bbox_inches='tight')
-    plt.close()
+        # Gain du LM : bootstrap apparié (mêmes fichiers pour NoLM et LM)
+        delta, delta_low, delta_high, p_value = evaluation.paired_bootstrap_ci_counts(
+            df_lm[cols_no].to_numpy(), df_lm[cols_lm].to_numpy(), n_boot=1000
+        )
+
+        df_lm_stats = pd.DataFrame({
+            "Model": ["Greedy (No LM)", "2-gram LM"],
+            "WER": [wer_no, wer_lm],
+            "CI_Low": [low_no, low_lm],
+            "CI_High": [high_no, high_lm]
+        })
+        df_lm_gain = pd.DataFrame({
+            "Delta_WER": [delta], "CI_Low": [delta_low], "CI_High": [delta_high], "p_value": [p_value]
+        })
+
+        # Plot LM
+        plt.figure(figsize=(8,6))
+        means = df_lm_stats['WER']
+        errors = [
+            means - df_lm_stats['CI_Low'],
+            df_lm_stats['CI_High'] - means
+        ]
+        plt.bar(df_lm_stats['Model'], means, yerr=errors, capsize=6)
+        plt.ylabel("Word Error Rate (%)")
+        plt.title("Impact du Modèle de Langage (SNR35dB, Man)")
+        plt.grid(axis='y', linestyle='--', alpha=0.3)
+        plt.savefig(PLOTS_DIR / "graph0_lm_ci.png", dpi=300, bbox_inches='tight')
+        plt.close()
+    else:
+        # Groupe vide (shard, CSV partiel) : tableaux vides, pas de graphique
+        df_lm_stats = pd.DataFrame(columns=["Model", "WER", "CI_Low", "CI_High"])
+        df_lm_gain = pd.DataFrame(columns=["Delta_WER", "CI_Low", "CI_High", "p_value"])
 
 
     # ============================================================
@@ -165,10 +204,7 @@ def generate_analysis(df):
     # ============================================================
     logger.info("Analyse 1/4 : Impact du Bruit")
 
-    df_snr = df[df['Speaker'] == 'man'] \
-        .groupby('SNR') \
-        .apply(calculate_group_stats) \
-        .reset_index()
+    df_snr = stats_table('SNR')
 
     snr_order = {'SNR05dB': 0, 'SNR15dB': 1, 'SNR25dB': 2, 'SNR35dB': 3}
     df_snr['sort_key'] = df_snr['SNR'].map(snr_order)
@@ -184,10 +220,7 @@ def generate_analysis(df):
     # ============================================================
     logger.info("Analyse 2/4 : Impact du Locuteur")
 
-    df_spk = df[df['SNR'] == 'SNR35dB'] \
-        .groupby('Speaker') \
-        .apply(calculate_group_stats) \
-        .reset_index()
+    df_spk = stats_table('Speaker')
 
     plot_with_ci(df_spk, 'Speaker',
                  "Impact du Locuteur (SNR35dB)",
@@ -199,12 +232,7 @@ def generate_analysis(df):
     # ============================================================
     logger.info("Analyse 3/4 : Impact de la Longueur")
 
-    df_len = df[
-        (df['SNR'] == 'SNR35dB') &
-        (df['Speaker'].isin(['man', 'woman']))
-    ].groupby('Length') \
-     .apply(calculate_group_stats) \
-     .reset_index()
+    df_len = stats_table('Length')
 
     plot_with_ci(df_len, 'Length',
                  "Impact de la Longueur (SNR35dB, Adultes)",
@@ -212,77 +240,290 @@ def generate_analysis(df):
 
     logger.success("Tous les graphes ont été générés.")
 
+    write_stats_csv([
+        ("Stats SNR (Man only)", df_snr),
+        ("Stats Speaker (SNR35dB only)", df_spk),
+        ("Stats Length (SNR35dB, Adults)", df_len),
+        ("Stats LM (SNR35dB, Man)", df_lm_stats),
+        ("Stats LM gain, paired bootstrap (SNR35dB, Man)", df_lm_gain),
+    ], STATS_CSV)
+
+def parse_args():
+    """Parse les arguments de ligne de commande"""
+    parser = argparse.ArgumentParser(
+        description="Pipeline complet : transcription du corpus, WER + bootstrap, graphiques"
+    )
+
+    parser.add_argument(
+        "--no-resume",
+        action="store_true",
+        help=f"Repartir de zéro au lieu de reprendre {OUTPUT_CSV.name}"
+    )
+
+    parser.add_argument(
+        "--analyze-only",
+        action="store_true",
+        help=f"Recalculer statistiques et graphiques depuis {OUTPUT_CSV.name} existant (sans modèle)"
+    )
+
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=config.DECODE_WORKERS,
+        help=f"Processus pour les statistiques par groupe (défaut: {config.DECODE_WORKERS})"
+    )
+
+    parser.add_argument(
+        "--skip-scan",
+        action="store_true",
+        help="Réutiliser le manifeste du corpus sans re-parcourir l'arborescence"
+    )
+
+    parser.add_argument(
+        "--num-shards",
+        type=int,
+        default=1,
+        help="Découper le corpus en N shards (hash stable du chemin) traités sur des machines distinctes"
+    )
+
+    parser.add_argument(
+        "--shard-index",
+        type=int,
+        default=None,
+        help="Shard traité par ce run (0 à N-1) ; résultats partiels dans results_detailed.shard-K-of-N.csv"
+    )
+
+    parser.add_argument(
+        "--merge",
+        action="store_true",
+        help=f"Fusionner les résultats des shards dans {OUTPUT_CSV.name} puis calculer statistiques et graphiques"
+    )
+
+    parser.add_argument(
+        "--instrument",
+        action="store_true",
+        help="Mesurer le temps de chaque étape (lecture, processeur, modèle, décodage) ; aussi ASR_INSTRUMENT=1"
+    )
+
+    parser.add_argument(
+        "--metrics",
+        type=Path,
+        default=config.METRICS_DIR / "main.json",
+        help="Fichier des mesures : JSON, ou texte Prometheus si l'extension est .prom (défaut: %(default)s)"
+    )
+
+    parser.add_argument(
+        "--profile-files",
+        type=int,
+        default=config.PROFILE_FILES,
+        help="Profiler N fichiers tirés au hasard après la transcription (défaut: %(default)s)"
+    )
+
+    parser.add_argument(
+        "--profiler",
+        choices=["cprofile", "torch"],
+        default=config.PROFILER,
+        help="Profileur utilisé avec --profile-files (défaut: %(default)s)"
+    )
+
+    args = parser.parse_args()
+    if args.num_shards < 1:
+        parser.error("--num-shards doit être >= 1")
+    if args.num_shards > 1 and args.shard_index is None:
+        parser.error("--shard-index est requis avec --num-shards > 1")
+    if args.shard_index is not None and not 0 <= args.shard_index < args.num_shards:
+        parser.error(f"--shard-index doit être compris entre 0 et {args.num_shards - 1}")
+    return args
+
 def main():
-    # --- ETAPE 1 : CHARGEMENT ---
+    args = parse_args()
+    config.setup_logging()
+
+    if args.merge:
+        # Shards de toutes les machines copiés à côté de OUTPUT_CSV
+        results_io.merge_shards(results_io.find_shards(OUTPUT_CSV), OUTPUT_CSV)
+        run_analysis(args.workers)
+        return
+
+    if args.analyze_only:
+        if not OUTPUT_CSV.exists():
+            logger.error(f"{OUTPUT_CSV} introuvable : lancer d'abord la transcription (python main.py)")
+            return
+        run_analysis(args.workers)
+        return
+
+    import manifest
+
+    # --- ETAPE 1 : SCAN DU CORPUS ---
+    # Manifeste : seuls les fichiers nouveaux ou modifiés sont relus
+    logger.info(f"Scan du dossier {CORPUS_ROOT}...")
+    corpus = manifest.build_manifest(CORPUS_ROOT, refresh=not args.skip_scan)
+    
+    if not corpus:
+        logger.error("Aucun fichier .wav trouvé ! Vérifiez le chemin dans config.py ou main.py")
+        return
+
+    logger.info(f"Fichiers trouvés : {len(corpus)}")
+
+    # Shard : sous-ensemble stable du corpus, résultats dans un CSV partiel
+    output_csv = OUTPUT_CSV
+    if args.shard_index is not None:
+        corpus = manifest.shard(corpus, args.shard_index, args.num_shards)
+        output_csv = results_io.shard_path(OUTPUT_CSV, args.shard_index, args.num_shards)
+        logger.info(f"Shard {args.shard_index}/{args.num_shards} : {len(corpus)} fichiers -> {output_csv.name}")
+        if config.PAD_UNMASKED_BATCHES:
+            # Logits dépendants du batch : la fusion ne reproduirait pas un run unique
+            logger.warning("PAD_UNMASKED_BATCHES actif : résultats des shards non identiques à un run unique")
+
+    entries = {CORPUS_ROOT / e['path']: e for e in corpus}
+    all_wavs = list(entries)
+
+    # Écriture au fil de l'eau ; un run interrompu reprend là où il s'est arrêté
+    writer = results_io.ResultsWriter(output_csv, resume=not args.no_resume)
+    todo_wavs = [p for p in all_wavs if p.name not in writer.completed]
+    logger.info(f"Fichiers à transcrire : {len(todo_wavs)}")
+
+    if args.instrument:
+        import instrumentation
+        instrumentation.enable()
+
+    if todo_wavs:
+        transcribe_corpus(todo_wavs, writer, entries, args)
+    writer.close()
+    # Ordre canonique (par Filename) : même CSV qu'une fusion de shards
+    results_io.sort_results(output_csv)
+    logger.success(f"Transcriptions sauvegardées dans {output_csv}")
+
+    if args.shard_index is not None:
+        logger.info("Statistiques après fusion des shards : python main.py --merge")
+        return
+
+    run_analysis(args.workers)
+
+def run_analysis(num_workers=1):
+    """
+    Statistiques et graphiques à partir de OUTPUT_CSV (aucun modèle chargé).
+    """
+    import pandas as pd
+
+    # --- ETAPE 5 : ANALYSE ET GRAPHIQUES ---
+    df = pd.read_csv(OUTPUT_CSV)
+    generate_analysis(df, num_workers)
+    
+    print("\n" + "="*50)
+    print("✅  TP TERMINÉ AVEC SUCCÈS")
+    print(f"📁  Résultats détaillés : {OUTPUT_CSV}")
+    print(f"📊  Tableaux statistiques : {STATS_CSV}")
+    print(f"📈  Graphiques générés : {PLOTS_DIR}")
+    print("="*50)
+
+def transcribe_corpus(wav_files, writer, entries, args):
+    """
+    Transcrit les fichiers (Greedy + LM) et écrit chaque ligne dès qu'elle est prête.
+    Les métadonnées, références et durées viennent du manifeste (entries) ;
+    args porte les options d'instrumentation (--metrics, --profile-files).
+    """
+    from tqdm import tqdm
+    import instrumentation
+    import model_loader
+    import inference
+    import audio_utils
+    import scheduler
+    import decoding
+    import pipeline
+    import manifest
+
+    # --- ETAPE 2 : CHARGEMENT ---
     logger.info("Chargement des modèles...")
     processor, model = model_loader.load_model()
     
     decoder_lm = None
     if LM_PATH.exists():
-        decoder_lm = model_loader.load_decoder(processor, LM_PATH)
+        if config.DECODE_WORKERS > 1:
+            decoder_lm = decoding.ParallelDecoder(processor, LM_PATH, config.DECODE_WORKERS)
+        else:
+            decoder_lm = model_loader.load_decoder(processor, LM_PATH)
         logger.info(f"Modèle de langage chargé : {LM_PATH.name}")
     else:
         logger.warning(f"Fichier LM introuvable ({LM_PATH}). Mode Greedy uniquement.")
 
-    # --- ETAPE 2 : SCAN DU CORPUS ---
-    logger.info(f"Scan du dossier {CORPUS_ROOT}...")
-    all_wavs = list(CORPUS_ROOT.rglob("*.wav"))
-    
-    if not all_wavs:
-        logger.error("Aucun fichier .wav trouvé ! Vérifiez le chemin dans config.py ou main.py")
-        return
-
-    logger.info(f"Fichiers trouvés : {len(all_wavs)}")
-
     # --- ETAPE 3 : TRANSCRIPTION (INFERENCE) ---
-    results = []
+    # 1. Greedy (Sans LM) / 2. Avec LM (si dispo)
+    decoders = {"Hyp_NoLM": None}
+    if decoder_lm:
+        decoders["Hyp_LM"] = decoder_lm
+
+    # Corpus pré-décodé (pack_corpus.py) : signaux servis depuis un buffer mappé
+    packed = None
+    if (config.PACKED_CORPUS_DIR / audio_utils.PACK_INDEX).exists():
+        packed = audio_utils.PackedCorpus(config.PACKED_CORPUS_DIR, CORPUS_ROOT)
+        if packed.sample_rate != config.SAMPLE_RATE:
+            logger.warning(f"Corpus empaqueté à {packed.sample_rate} Hz ignoré (attendu {config.SAMPLE_RATE} Hz)")
+            packed = None
+        else:
+            # WAV remplacés depuis l'empaquetage : relus (taille / mtime du manifeste)
+            packed.validate(entries[p] for p in wav_files)
+
+    # Batches de durées homogènes (durées lues dans le manifeste)
+    lengths = manifest.num_samples([entries[p] for p in wav_files], CORPUS_ROOT)
+    batches = scheduler.plan_batches(wav_files, config.MAX_BATCH_SAMPLES, lengths=lengths)
+    report = scheduler.BatchReport(padded=inference.pads_batches(processor))
+
     logger.info("Démarrage de la transcription...")
     
+    # B. Inférence : lecture audio, passe du modèle et décodage recouverts
+    # Les logits déjà calculés (run précédent, même modèle) sont relus du cache
+    cache = inference.LogitsCache() if config.USE_LOGITS_CACHE else None
+    transcriptions = pipeline.run_pipeline(
+        batches, processor, model, decoders, lengths=lengths, report=report, cache=cache, packed=packed
+    )
+
     # Utilisation de tqdm pour la barre de progression
-    for wav_path in tqdm(all_wavs, desc="Traitement", unit="wav"):
+    pbar = tqdm(total=len(wav_files), desc="Traitement", unit="wav")
+    for wav_path, hyps, error in transcriptions:
+        pbar.update(1)
         try:
-            # A. Parsing infos
-            snr, speaker, length = parse_metadata(wav_path)
-            ref_text = audio_utils.load_reference(wav_path)
-
-            # B. Inférence
-            # 1. Greedy (Sans LM)
-            hyp_nolm = inference.transcribe_greedy(wav_path, processor, model)
-            
-            # 2. Avec LM (si dispo)
-            hyp_lm = ""
-            if decoder_lm:
-                hyp_lm = inference.transcribe_with_lm(wav_path, processor, model, decoder_lm)
-
-            # C. Stockage
-            results.append({
+            if error is not None:
+                raise error
+
+            # A. Infos du manifeste
+            entry = entries[wav_path]
+            snr, speaker, length = entry['snr'], entry['speaker'], entry['length']
+            ref_text = entry['reference']
+            if ref_text is None:
+                raise FileNotFoundError(f"Transcription introuvable pour {wav_path.name}")
+
+            # --- ETAPE 4 : SAUVEGARDE RESULTATS BRUTS (au fil de l'eau) ---
+            writer.write({
                 "Filename": wav_path.name,
                 "SNR": snr,
                 "Speaker": speaker,
                 "Length": length,
                 "Reference": ref_text,
-                "Hyp_NoLM": hyp_nolm,
-                "Hyp_LM": hyp_lm
+                "Hyp_NoLM": hyps["Hyp_NoLM"],
+                "Hyp_LM": hyps.get("Hyp_LM", "")
             })
 
         except Exception as e:
             # On log l'erreur mais on ne coupe pas le script
             logger.error(f"Erreur sur {wav_path.name}: {e}")
 
-    # --- ETAPE 4 : SAUVEGARDE RESULTATS BRUTS ---
-    df = pd.DataFrame(results)
-    df.to_csv(OUTPUT_CSV, index=False)
-    logger.success(f"Transcriptions sauvegardées dans {OUTPUT_CSV}")
-
-    # --- ETAPE 5 : ANALYSE ET GRAPHIQUES ---
-    generate_analysis(df)
-    
-    print("\n" + "="*50)
-    print("✅  TP TERMINÉ AVEC SUCCÈS")
-    print(f"📁  Résultats détaillés : {OUTPUT_CSV}")
-    print(f"📊  Tableaux statistiques : {STATS_CSV}")
-    print(f"📈  Graphiques générés : {PLOTS_DIR}")
-    print("="*50)
+    pbar.close()
+    report.log_summary()
+    instrumentation.report(args.metrics)
+
+    # Profils détaillés (passe séquentielle, hors mesures ci-dessus)
+    if args.profile_files > 0:
+        instrumentation.profile_files(
+            wav_files,
+            lambda p: inference.transcribe_multi(p, processor, model, decoders),
+            args.profile_files,
+            config.METRICS_DIR / "profiles",
+            profiler=args.profiler
+        )
+
+    if isinstance(decoder_lm, decoding.ParallelDecoder):
+        decoder_lm.close()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""
+Pré-décodage du corpus dans un buffer mappé en mémoire (samples.npy + index.json)
+Usage: python pack_corpus.py --corpus data/corpus/td_corpus_digits_wav --output data/packed
+"""
+import sys
+from pathlib import Path
+import argparse
+from loguru import logger
+
+# Ajouter src/ au PYTHONPATH
+sys.path.insert(0, str(Path(__file__).parent / "src"))
+
+import config
+import audio_utils
+import manifest
+
+
+def parse_args():
+    """Parse les arguments de ligne de commande"""
+    parser = argparse.ArgumentParser(
+        description="Empaquette un corpus WAV (décodé, mono, ré-échantillonné) pour main.py"
+    )
+    
+    parser.add_argument("--corpus", type=Path, default=config.CORPUS_DIR / "td_corpus_digits_wav",
+                        help="Racine du corpus (SNR/Locuteur/Longueur/*.wav)")
+    parser.add_argument("--output", type=Path, default=config.PACKED_CORPUS_DIR,
+                        help=f"Dossier de sortie (défaut: {config.PACKED_CORPUS_DIR})")
+    parser.add_argument("--pattern", type=str, default="**/*.wav",
+                        help="Pattern de recherche des fichiers WAV (défaut: **/*.wav)")
+    parser.add_argument("--dtype", type=str, default="float32", choices=["float32", "int16"],
+                        help="Format des échantillons : float32 (sans copie) ou int16 (2x plus compact)")
+    
+    return parser.parse_args()
+
+
+def main():
+    """Fonction principale"""
+    args = parse_args()
+    config.setup_logging()
+    
+    # Fichiers du manifeste du corpus (mêmes fichiers que main.py)
+    entries = manifest.select(manifest.build_manifest(args.corpus), args.pattern)
+    wav_files = manifest.wav_paths(entries, args.corpus)
+    if not wav_files:
+        logger.error(f"Aucun fichier .wav trouvé dans {args.corpus}")
+        sys.exit(1)
+    
+    audio_utils.pack_corpus(wav_files, args.corpus, args.output, config.SAMPLE_RATE, args.dtype)
+    
+    packed = audio_utils.PackedCorpus(args.output)
+    size_mb = packed.samples.nbytes / 1e6
+    print(f"\n✅ {len(packed)} fichiers empaquetés ({size_mb:.1f} Mo) dans {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,7 @@
 #!/usr/bin/env python3
 """
 Script principal pour la reconnaissance automatique de la parole (ASR)
-Usage: python run_asr.py --corpus data/corpus --use-lm
+Usage: python run_asr.py --corpus data/corpus --use-lm --lm-path lm.arpa --batch-size 16 --precision int8
 """
 import sys
 from pathlib import Path
@@ -9,15 +9,12 @@ import argparse
 import time
 from loguru import logger
 
-import config
-import audio_utils
-import model_loader
-import inference
-import evaluation
-
-# Ajouter src/ au PYTHONPATH
+# Ajouter src/ au PYTHONPATH (avant les imports du projet)
 sys.path.insert(0, str(Path(__file__).parent / "src"))
 
+# Modules légers uniquement : torch / transformers sont importés dans main(),
+# après l'analyse des arguments (--help immédiat)
+import config
 
 
 def parse_args():
@@ -53,6 +50,12 @@ def parse_args():
         help="Pattern de recherche des fichiers WAV (défaut: **/*.wav)"
     )
     
+    parser.add_argument(
+        "--skip-scan",
+        action="store_true",
+        help="Réutiliser le manifeste du corpus sans re-parcourir l'arborescence"
+    )
+    
     parser.add_argument(
         "--n-boot",
         type=int,
@@ -67,6 +70,48 @@ def parse_args():
         help="Seed pour reproductibilité (défaut: 42)"
     )
     
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=config.BATCH_SIZE,
+        help=f"Nombre de fichiers par passe du modèle (défaut: {config.BATCH_SIZE})"
+    )
+    
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=config.DECODE_WORKERS,
+        help=f"Nombre de processus de décodage beam search (défaut: {config.DECODE_WORKERS})"
+    )
+    
+    parser.add_argument(
+        "--precision",
+        choices=config.PRECISIONS,
+        default="fp32",
+        help="Précision du modèle : fp32, fp16/bf16 ou int8 (quantification dynamique CPU)"
+    )
+    
+    parser.add_argument(
+        "--backend",
+        choices=["torch", "onnx"],
+        default="torch",
+        help="Moteur d'inférence : PyTorch ou ONNX Runtime CPU (export au premier lancement)"
+    )
+    
+    parser.add_argument(
+        "--device",
+        type=str,
+        default=None,
+        help="Device imposé (cpu, cuda, cuda:1...) ; défaut: détection automatique"
+    )
+    
+    parser.add_argument(
+        "--threads",
+        type=int,
+        default=None,
+        help="Nombre de threads PyTorch (défaut: choix de PyTorch)"
+    )
+    
     parser.add_argument(
         "--max-files",
         type=int,
@@ -74,12 +119,51 @@ def parse_args():
         help="Nombre max de fichiers à traiter (pour tests rapides)"
     )
     
+    parser.add_argument(
+        "--instrument",
+        action="store_true",
+        help="Mesurer le temps de chaque étape (lecture, processeur, modèle, décodage) ; aussi ASR_INSTRUMENT=1"
+    )
+    
+    parser.add_argument(
+        "--metrics",
+        type=Path,
+        default=config.METRICS_DIR / "run_asr.json",
+        help="Fichier des mesures : JSON, ou texte Prometheus si l'extension est .prom (défaut: %(default)s)"
+    )
+    
+    parser.add_argument(
+        "--profile-files",
+        type=int,
+        default=config.PROFILE_FILES,
+        help="Profiler N fichiers tirés au hasard après la transcription (défaut: %(default)s)"
+    )
+    
+    parser.add_argument(
+        "--profiler",
+        choices=["cprofile", "torch"],
+        default=config.PROFILER,
+        help="Profileur utilisé avec --profile-files (défaut: %(default)s)"
+    )
+    
     return parser.parse_args()
 
 
 def main():
     """Fonction principale"""
     args = parse_args()
+    config.setup_logging()
+    config.override(device=args.device)
+    
+    import instrumentation
+    import model_loader
+    import inference
+    import evaluation
+    import decoding
+    import manifest
+    
+    if args.instrument:
+        instrumentation.enable()
     
     logger.info("="*70)
     logger.info("DÉMARRAGE ASR - Wav2Vec2")
@@ -87,6 +171,7 @@ def main():
     logger.info(f"Device: {config.DEVICE}")
     logger.info(f"Corpus: {args.corpus}")
     logger.info(f"Modèle de langage: {'Oui' if args.use_lm else 'Non'}")
+    logger.info(f"Batch: {args.batch_size} | Workers: {args.workers} | Précision: {args.precision} | Backend: {args.backend}")
     logger.info("="*70)
     
     # Vérifier que le corpus existe
@@ -94,30 +179,35 @@ def main():
         logger.error(f"Corpus introuvable: {args.corpus}")
         return 1
     
-    # Collecter les fichiers WAV
-    try:
-        wav_files = audio_utils.collect_wav_files(args.corpus, args.pattern)
-    except FileNotFoundError as e:
-        logger.error(str(e))
+    # Collecter les fichiers WAV (manifeste du corpus, mis à jour incrémentalement)
+    entries = manifest.select(manifest.build_manifest(args.corpus, refresh=not args.skip_scan), args.pattern)
+    if not entries:
+        logger.error(f"Aucun fichier .wav trouvé dans {args.corpus}")
         return 1
     
     # Limiter le nombre de fichiers si demandé
     if args.max_files:
-        wav_files = wav_files[:args.max_files]
+        entries = entries[:args.max_files]
         logger.info(f"Limitation à {args.max_files} fichiers")
+    wav_files = manifest.wav_paths(entries, args.corpus)
     
     # Charger le modèle Wav2Vec2
     logger.info("Chargement du modèle Wav2Vec2...")
     start_time = time.time()
-    processor, model = model_loader.load_wav2vec2_model()
-    model = model_loader.optimize_for_inference(model)
+    if args.backend == "onnx":
+        if args.precision != "fp32":
+            logger.warning(f"Précision {args.precision} ignorée avec le backend ONNX (fp32)")
+        processor, model = model_loader.load_onnx_model(num_threads=args.threads)
+    else:
+        processor, model = model_loader.load_wav2vec2_model()
+        model = model_loader.optimize_for_inference(model, precision=args.precision, num_threads=args.threads)
     logger.info(f"Modèle chargé en {time.time() - start_time:.2f}s")
     
     # Charger le modèle de langage si demandé
     decoder = None
     if args.use_lm:
         logger.info("Chargement du modèle de langage...")
-        decoder = model_loader.load_language_model(args.lm_path)
+        decoder = model_loader.load_language_model(args.lm_path, processor, num_workers=args.workers)
         if decoder is None:
             logger.warning("Impossible de charger le LM, passage en mode greedy")
             args.use_lm = False
@@ -131,18 +221,34 @@ def main():
         processor=processor,
         model=model,
         decoder=decoder,
-        use_lm=args.use_lm
+        use_lm=args.use_lm,
+        batch_size=args.batch_size,
+        references=manifest.references(entries, args.corpus)
     )
     
     transcription_time = time.time() - start_time
     logger.info(f"Transcription terminée en {transcription_time:.2f}s")
     logger.info(f"Temps moyen par fichier: {transcription_time/len(wav_files):.3f}s")
+    instrumentation.report(args.metrics)
+    
+    # Profils détaillés (passe séquentielle, hors mesures ci-dessus)
+    if args.profile_files > 0:
+        instrumentation.profile_files(
+            wav_files,
+            lambda p: inference.transcribe_multi(p, processor, model, {"hyp": decoder if args.use_lm else None}),
+            args.profile_files,
+            config.METRICS_DIR / "profiles",
+            profiler=args.profiler
+        )
+    
+    if isinstance(decoder, decoding.ParallelDecoder):
+        decoder.close()
     
-    # Évaluation
+    # Évaluation : WER corpus (S + D + I) / N, comme main.py
     logger.info("Calcul du WER avec bootstrap CI...")
-    wer_mean, ci_low, ci_high = evaluation.bootstrap_ci(
-        references=references,
-        hypotheses=hypotheses,
+    counts = evaluation.compute_error_counts(references, hypotheses)
+    wer_mean, ci_low, ci_high = evaluation.bootstrap_ci_counts(
+        counts,
         n_boot=args.n_boot,
         seed=args.seed
     )
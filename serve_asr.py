@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Serveur de transcription HTTP / WebSocket (modèle et décodeur chargés une seule fois)
+Usage: python serve_asr.py --lm-path data/lm_data/lm-data/2-gram.pruned.1e-7.arpa --port 8080
+
+    curl --data-binary @fichier.wav http://127.0.0.1:8080/transcribe
+    curl http://127.0.0.1:8080/metrics
+"""
+import sys
+from pathlib import Path
+import argparse
+from loguru import logger
+
+# Ajouter src/ au PYTHONPATH
+sys.path.insert(0, str(Path(__file__).parent / "src"))
+
+import config
+import model_loader
+import server
+
+
+def parse_args():
+    """Parse les arguments de ligne de commande"""
+    parser = argparse.ArgumentParser(
+        description="Serveur ASR asyncio : /transcribe (POST), /ws (WebSocket), /metrics"
+    )
+    
+    parser.add_argument("--host", type=str, default=config.SERVER_HOST,
+                        help=f"Adresse d'écoute (défaut: {config.SERVER_HOST})")
+    parser.add_argument("--port", type=int, default=config.SERVER_PORT,
+                        help=f"Port d'écoute (défaut: {config.SERVER_PORT})")
+    parser.add_argument("--lm-path", type=Path, default=None,
+                        help="Fichier .arpa du modèle de langage (sans LM : greedy uniquement)")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="Processus de décodage beam search (défaut: 1)")
+    parser.add_argument("--max-batch", type=int, default=config.SERVER_MAX_BATCH,
+                        help=f"Requêtes max par passe du modèle (défaut: {config.SERVER_MAX_BATCH})")
+    parser.add_argument("--max-wait-ms", type=float, default=config.SERVER_MAX_WAIT_MS,
+                        help=f"Attente max pour compléter un micro-batch (défaut: {config.SERVER_MAX_WAIT_MS} ms) ; "
+                             "ignorée pour les modèles sans masque d'attention (wav2vec2-base), qui font une passe "
+                             "par requête : seules les requêtes déjà en file sont groupées (décodage)")
+    
+    return parser.parse_args()
+
+
+def main():
+    """Fonction principale"""
+    args = parse_args()
+    config.setup_logging()
+    
+    processor, model = model_loader.load_model()
+    
+    decoders = {"greedy": None}
+    if args.lm_path is not None:
+        decoder = model_loader.load_language_model(args.lm_path, processor, num_workers=args.workers)
+        if decoder is None:
+            logger.warning("Impossible de charger le LM, greedy uniquement")
+        else:
+            decoders["lm"] = decoder
+    
+    batcher = server.MicroBatcher(
+        processor, model, decoders, max_batch_size=args.max_batch, max_wait_ms=args.max_wait_ms
+    )
+    logger.info(f"Serveur ASR sur http://{args.host}:{args.port} (décodeurs: {', '.join(decoders)})")
+    server.web.run_app(server.create_app(batcher), host=args.host, port=args.port, print=None)
+    
+    if hasattr(decoders.get("lm"), "close"):
+        decoders["lm"].close()
+    
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,11 +1,19 @@
 """Utilitaires pour le traitement audio (Version Portable GitHub)"""
+import io
+import json
+import math
+import os
 import re
+import time
+from functools import lru_cache
 from pathlib import Path
-from typing import Tuple, List
+from typing import BinaryIO, Iterable, Optional, Tuple, List, Union
+import numpy as np
 import torch
 import torchaudio
 import soundfile as sf
 from loguru import logger
+import instrumentation
 
 def clean_text(text: str) -> str:
     """Nettoie le texte (lowercase, remove special chars)"""
@@ -14,37 +22,121 @@ def clean_text(text: str) -> str:
     text = re.sub(r'\s+', ' ', text.strip())
     return text
 
+@lru_cache(maxsize=16)
+def get_resampler(orig_sr: int, target_sr: int) -> torchaudio.transforms.Resample:
+    """
+    Resampler partagé pour un couple de fréquences
+    
+    Le noyau de ré-échantillonnage est calculé une seule fois par couple
+    (orig_sr, target_sr) au lieu d'être reconstruit pour chaque fichier.
+    """
+    return torchaudio.transforms.Resample(orig_sr, target_sr)
+
+def read_audio(wav_path: Union[Path, BinaryIO]) -> Tuple[np.ndarray, int]:
+    """
+    Lit un fichier audio en float32 mono, sans ré-échantillonnage
+    
+    Args:
+        wav_path: Chemin ou objet fichier (ex. io.BytesIO d'un upload)
+    
+    Returns:
+        (signal 1D float32, fréquence d'échantillonnage)
+    """
+    source = wav_path if hasattr(wav_path, 'read') else str(wav_path)
+    with instrumentation.stage("audio.read"):
+        data, sr = sf.read(source, dtype='float32', always_2d=True)
+    instrumentation.count("audio.files")
+    
+    # [frames, channels] -> mono 1D (moyenne des canaux si stéréo)
+    if data.shape[1] > 1:
+        return data.mean(axis=1), sr
+    return data[:, 0], sr
+
 def load_audio(wav_path: Path, target_sr: int = 16000) -> Tuple[torch.Tensor, int]:
     """
     Charge un fichier audio 
+    
+    Returns:
+        (Tensor [1, frames] mono float32 à target_sr, target_sr)
     """
     try:
-        # 1. Lecture avec soundfile (Garanti de marcher sur Windows/Mac/Linux sans FFmpeg)
-        data, sr = sf.read(str(wav_path))
-        
-        # 2. Conversion au format TorchAudio exact : Tensor [channels, frames]
-        waveform = torch.from_numpy(data).float()
-        if waveform.ndim == 1:
-            waveform = waveform.unsqueeze(0)
-        else:
-            waveform = waveform.t()
-            
-        # 3. Traitement avec TorchAudio (Resampling)
-        if sr != target_sr:
-            resampler = torchaudio.transforms.Resample(sr, target_sr)
-            waveform = resampler(waveform)
-            sr = target_sr
-        
-        # 4. Convertir en mono si stéréo
-        if waveform.shape[0] > 1:
-            waveform = waveform.mean(dim=0, keepdim=True)
-        
+        with instrumentation.stage("audio.load"):
+            # 1. Lecture avec soundfile (Garanti de marcher sur Windows/Mac/Linux sans FFmpeg),
+            #    directement en float32 et converti en mono
+            data, sr = read_audio(wav_path)
+
+            # 2. Conversion au format TorchAudio exact : Tensor [channels, frames]
+            waveform = torch.from_numpy(data).unsqueeze(0)
+
+            # 3. Traitement avec TorchAudio (Resampling, noyau en cache)
+            if sr != target_sr:
+                with instrumentation.stage("audio.resample"):
+                    waveform = get_resampler(sr, target_sr)(waveform)
+                sr = target_sr
+
         return waveform, sr
-        
+
     except Exception as e:
         logger.error(f"Erreur chargement audio {wav_path}: {e}")
         raise
 
+def resample_batch(signals: List[np.ndarray], srs: List[int], target_sr: int = 16000) -> List[np.ndarray]:
+    """
+    Ré-échantillonne plusieurs signaux, en un appel par fréquence d'origine
+    
+    Les signaux de même fréquence sont paddés par des zéros et traités
+    ensemble ; chaque sortie est ensuite recoupée à sa longueur propre.
+    Le resampler padde lui-même les bords par des zéros : le résultat est
+    identique à un traitement fichier par fichier.
+    
+    Args:
+        signals: Signaux mono 1D float32
+        srs: Fréquence d'échantillonnage de chaque signal
+        target_sr: Fréquence cible
+        
+    Returns:
+        Signaux 1D float32 à target_sr, dans l'ordre d'entrée
+    """
+    outputs = list(signals)
+    
+    for sr in set(srs):
+        if sr == target_sr:
+            continue
+        idx = [i for i, s in enumerate(srs) if s == sr]
+        max_len = max(len(signals[i]) for i in idx)
+        
+        padded = np.zeros((len(idx), max_len), dtype=np.float32)
+        for row, i in enumerate(idx):
+            padded[row, :len(signals[i])] = signals[i]
+        
+        with instrumentation.stage("audio.resample"):
+            resampled = get_resampler(sr, target_sr)(torch.from_numpy(padded)).numpy()
+        for row, i in enumerate(idx):
+            out_len = math.ceil(len(signals[i]) * target_sr / sr)
+            outputs[i] = resampled[row, :out_len]
+    
+    return outputs
+
+def load_audio_batch(wav_paths: List[Path], target_sr: int = 16000) -> List[np.ndarray]:
+    """
+    Charge plusieurs fichiers audio (ré-échantillonnage groupé par fréquence)
+    
+    Returns:
+        Signaux mono 1D float32 à target_sr, dans l'ordre de wav_paths
+    """
+    signals, srs = zip(*(read_audio(p) for p in wav_paths))
+    return resample_batch(list(signals), list(srs), target_sr)
+
+def decode_audio_bytes(data: bytes, target_sr: int = 16000) -> np.ndarray:
+    """
+    Décode un fichier audio reçu en mémoire (WAV, FLAC...)
+    
+    Returns:
+        Signal mono 1D float32 à target_sr
+    """
+    signal, sr = read_audio(io.BytesIO(data))
+    return resample_batch([signal], [sr], target_sr)[0]
+
 def load_reference(wav_path: Path) -> str:
     """Charge la référence textuelle (.txt associé au .wav)"""
     txt_path = wav_path.with_suffix('.txt')
@@ -75,4 +167,271 @@ def get_audio_info(wav_path: Path) -> dict:
         'num_frames': info.frames,
         'duration': info.duration,
         'num_channels': info.channels
-    }
\ No newline at end of file
+    }
+
+def parse_metadata(wav_path: Path) -> Tuple[str, str, str]:
+    """
+    Extrait les métadonnées depuis le chemin du fichier.
+    Structure attendue : .../SNRxx/Speaker/SeqXdigits.../file.wav
+    
+    Returns:
+        (snr, speaker, length)
+    """
+    parts = Path(wav_path).parts
+    
+    # 1. Extraction de la longueur (dossier parent)
+    length_folder = parts[-2]
+    if "seq1" in length_folder: length = "1"
+    elif "seq3" in length_folder: length = "3"
+    elif "seq5" in length_folder: length = "5"
+    else: length = "Unknown"
+    
+    # 2. Extraction du locuteur et SNR
+    speaker = parts[-3]
+    snr = parts[-4]
+    
+    return snr, speaker, length
+
+# Fichiers d'un corpus pré-décodé (pack_corpus)
+PACK_SAMPLES = "samples.npy"
+PACK_INDEX = "index.json"
+INT16_SCALE = 32768  # Échelle PCM16 de soundfile (float = entier / 32768)
+
+def pack_corpus(
+    wav_files: List[Path],
+    corpus_root: Path,
+    pack_dir: Path,
+    target_sr: int = 16000,
+    dtype: str = "float32"
+) -> Path:
+    """
+    Pré-décode un corpus dans un buffer unique d'échantillons + un index
+    
+    Tous les signaux (mono, ré-échantillonnés à target_sr) sont concaténés
+    dans pack_dir/samples.npy ; pack_dir/index.json donne la racine du
+    corpus et, pour chaque fichier, son chemin relatif, sa taille et son
+    mtime (pour détecter un WAV remplacé depuis), son offset, sa longueur,
+    ses métadonnées et sa référence. Les durées sont lues dans les en-têtes
+    pour pré-allouer le buffer.
+    
+    Args:
+        wav_files: Fichiers WAV à empaqueter
+        corpus_root: Racine du corpus (chemins relatifs stockés dans l'index)
+        pack_dir: Dossier de sortie
+        target_sr: Fréquence d'échantillonnage cible
+        dtype: "float32" (lecture sans copie) ou "int16" (moitié de la place)
+        
+    Returns:
+        Le dossier du corpus empaqueté
+    """
+    if dtype not in ("float32", "int16"):
+        raise ValueError(f"dtype non supporté: {dtype} (float32 ou int16)")
+    
+    pack_dir = Path(pack_dir)
+    pack_dir.mkdir(parents=True, exist_ok=True)
+    
+    # 1. Longueurs (en-têtes uniquement) et offsets
+    entries = []
+    offset = 0
+    for wav_path in wav_files:
+        try:
+            st = os.stat(wav_path)
+            info = get_audio_info(wav_path)
+            reference = load_reference(wav_path)
+        except Exception as e:
+            logger.error(f"Fichier ignoré {wav_path.name}: {e}")
+            continue
+        num_samples = math.ceil(info['num_frames'] * target_sr / info['sample_rate'])
+        snr, speaker, length = parse_metadata(wav_path)
+        entries.append({
+            'filename': wav_path.name,
+            'path': Path(wav_path).relative_to(corpus_root).as_posix(),
+            'size': st.st_size,
+            'mtime_ns': st.st_mtime_ns,
+            'offset': offset,
+            'num_samples': num_samples,
+            'snr': snr,
+            'speaker': speaker,
+            'length': length,
+            'reference': reference
+        })
+        offset += num_samples
+    
+    # 2. Décodage dans le buffer mappé en mémoire
+    samples = np.lib.format.open_memmap(
+        pack_dir / PACK_SAMPLES, mode='w+', dtype=np.dtype(dtype), shape=(offset,)
+    )
+    for entry in entries:
+        waveform, _ = load_audio(Path(corpus_root) / entry['path'], target_sr)
+        data = waveform.squeeze(0).numpy()[:entry['num_samples']]
+        if dtype == "int16":
+            # Même échelle que soundfile (PCM16 lu comme x / 32768) : aller-retour exact
+            data = np.clip(np.round(data * INT16_SCALE), -32768, 32767)
+        samples[entry['offset']:entry['offset'] + len(data)] = data
+    samples.flush()
+    del samples
+    
+    index = {
+        'sample_rate': target_sr,
+        'dtype': dtype,
+        'int16_scale': INT16_SCALE,
+        'corpus_root': os.path.abspath(corpus_root),
+        'entries': entries
+    }
+    (pack_dir / PACK_INDEX).write_text(json.dumps(index, ensure_ascii=False), encoding='utf-8')
+    
+    logger.info(f"Corpus empaqueté: {len(entries)} fichiers, {offset / target_sr / 3600:.2f} h -> {pack_dir}")
+    return pack_dir
+
+class PackedCorpus:
+    """
+    Lecture d'un corpus pré-décodé par pack_corpus
+    
+    Le buffer d'échantillons est mappé en mémoire : en float32, waveform()
+    retourne une vue sans copie ; en int16, la tranche est convertie en
+    float32 à la volée.
+    
+    Les fichiers sont identifiés par leur chemin relatif à la racine du
+    corpus. find() ne sert un fichier que si sa taille et son mtime sont
+    ceux de l'empaquetage (vérifiés une fois, via validate ou os.stat) :
+    un WAV remplacé depuis est relu normalement.
+    """
+    
+    def __init__(self, pack_dir: Path, corpus_root: Optional[Path] = None):
+        """
+        Args:
+            pack_dir: Dossier produit par pack_corpus
+            corpus_root: Racine du corpus (défaut: celle enregistrée dans l'index)
+        """
+        self.pack_dir = Path(pack_dir)
+        index = json.loads((self.pack_dir / PACK_INDEX).read_text(encoding='utf-8'))
+        self.sample_rate = index['sample_rate']
+        self.dtype = index['dtype']
+        self.int16_scale = index.get('int16_scale', 32767)
+        self.corpus_root = os.path.abspath(corpus_root or index.get('corpus_root', '.'))
+        self.entries = index['entries']
+        self.samples = np.load(self.pack_dir / PACK_SAMPLES, mmap_mode='r')
+        self._by_path = {entry['path']: entry for entry in self.entries}
+        self._fresh = set()  # Chemins dont taille / mtime ont été vérifiés
+        logger.info(f"Corpus empaqueté chargé: {len(self.entries)} fichiers ({self.pack_dir})")
+    
+    def __len__(self) -> int:
+        return len(self.entries)
+    
+    def __contains__(self, rel_path: str) -> bool:
+        return rel_path in self._by_path
+    
+    @staticmethod
+    def _matches(entry: dict, size: int, mtime_ns: int) -> bool:
+        return entry.get('size') == size and entry.get('mtime_ns') == mtime_ns
+    
+    def validate(self, manifest_entries: Iterable[dict]) -> int:
+        """
+        Compare l'index au manifeste du corpus (chemin, taille, mtime_ns)
+        
+        Les entrées modifiées depuis l'empaquetage (ou empaquetées sans ces
+        métadonnées) sont écartées ; les autres n'ont plus à être vérifiées
+        par find().
+        
+        Returns:
+            Nombre d'entrées écartées
+        """
+        stale = 0
+        for m in manifest_entries:
+            entry = self._by_path.get(m['path'])
+            if entry is None:
+                continue
+            if self._matches(entry, m['size'], m['mtime_ns']):
+                self._fresh.add(m['path'])
+            else:
+                del self._by_path[m['path']]
+                stale += 1
+        if stale:
+            logger.warning(f"{stale} fichiers modifiés depuis l'empaquetage : relus depuis les WAV (relancer pack_corpus.py)")
+        return stale
+    
+    def find(self, wav_path: Path) -> Optional[str]:
+        """
+        Chemin relatif de wav_path s'il est servi par le buffer, sinon None
+        
+        None si le fichier est hors du corpus empaqueté, absent de l'index
+        ou modifié depuis l'empaquetage (taille / mtime différents).
+        """
+        try:
+            rel_path = Path(os.path.relpath(os.path.abspath(wav_path), self.corpus_root)).as_posix()
+        except ValueError:  # Autre lecteur (Windows)
+            return None
+        entry = self._by_path.get(rel_path)
+        if entry is None:
+            return None
+        if rel_path not in self._fresh:
+            try:
+                st = os.stat(wav_path)
+            except OSError:
+                return None
+            if not self._matches(entry, st.st_size, st.st_mtime_ns):
+                return None
+            self._fresh.add(rel_path)
+        return rel_path
+    
+    def entry(self, rel_path: str) -> dict:
+        """Entrée d'index (offset, longueur, métadonnées, référence)"""
+        return self._by_path[rel_path]
+    
+    def waveform(self, rel_path: str) -> np.ndarray:
+        """Signal mono 1D float32 à self.sample_rate"""
+        entry = self._by_path[rel_path]
+        data = self.samples[entry['offset']:entry['offset'] + entry['num_samples']]
+        if self.dtype == "int16":
+            return data.astype(np.float32) / np.float32(self.int16_scale)
+        return data
+    
+    def reference(self, rel_path: str) -> str:
+        """Référence textuelle nettoyée"""
+        return self._by_path[rel_path]['reference']
+    
+    def wav_paths(self, corpus_root: Path) -> List[Path]:
+        """Chemins d'origine des fichiers empaquetés"""
+        return [Path(corpus_root) / entry['path'] for entry in self.entries]
+    
+    def num_samples(self, corpus_root: Path) -> dict:
+        """Longueurs en échantillons par chemin (pour scheduler.plan_batches)"""
+        return {Path(corpus_root) / entry['path']: entry['num_samples'] for entry in self.entries}
+
+def benchmark_loading(wav_files: List[Path], target_sr: int = 16000, batch_size: int = 16) -> dict:
+    """
+    Micro-benchmark du chargement audio (latence moyenne par fichier, en ms)
+    
+    Compare le chargement fichier par fichier sans cache de resampler,
+    avec cache, et le chargement groupé (load_audio_batch).
+    """
+    def per_file(use_cache: bool) -> float:
+        start = time.perf_counter()
+        for wav_path in wav_files:
+            if not use_cache:
+                get_resampler.cache_clear()
+            load_audio(wav_path, target_sr)
+        return (time.perf_counter() - start) / len(wav_files) * 1000
+    
+    def batched() -> float:
+        start = time.perf_counter()
+        for i in range(0, len(wav_files), batch_size):
+            load_audio_batch(wav_files[i:i + batch_size], target_sr)
+        return (time.perf_counter() - start) / len(wav_files) * 1000
+    
+    results = {
+        'sans_cache_ms': per_file(use_cache=False),
+        'cache_ms': per_file(use_cache=True),
+        'batch_ms': batched()
+    }
+    logger.info(
+        f"Chargement audio ({len(wav_files)} fichiers) : "
+        f"sans cache {results['sans_cache_ms']:.2f} ms | cache {results['cache_ms']:.2f} ms | "
+        f"batch {results['batch_ms']:.2f} ms par fichier"
+    )
+    return results
+
+if __name__ == "__main__":
+    import sys
+    corpus = Path(sys.argv[1]) if len(sys.argv) > 1 else Path("data/corpus")
+    benchmark_loading(collect_wav_files(corpus))
@@ -1,23 +1,22 @@
-"""Configuration globale du projet ASR"""
-import torch
+"""
+Configuration globale du projet ASR
+
+L'import est sans effet de bord : le device n'est résolu qu'au premier
+accès à config.DEVICE (torch n'est importé qu'à ce moment), et la
+journalisation fichier est activée par le point d'entrée (setup_logging).
+
+Chaque constante peut être surchargée par une variable d'environnement
+ASR_<NOM> (ex. ASR_DEVICE=cpu, ASR_BATCH_SIZE=32, ASR_PROJECT_ROOT=/data/cpm)
+ou, depuis un script, par override(nom=valeur).
+"""
 from pathlib import Path
 import os
 from loguru import logger
 
-# Setup logging
-LOG_DIR = Path.home() / "projet-cpm" / "logs"
-LOG_DIR.mkdir(parents=True, exist_ok=True)
-
-logger.add(
-    LOG_DIR / "asr_{time:YYYY-MM-DD}.log",
-    rotation="00:00",
-    retention="30 days",
-    level="INFO",
-    format="{time:YYYY-MM-DD HH:mm:ss} | {level: <8} | {name}:{function}:{line} - {message}"
-)
-
 def get_device():
     """Détecte et configure le device optimal"""
+    import torch
+    
     if torch.cuda.is_available():
         device = torch.device("cuda")
         torch.backends.cudnn.benchmark = True
@@ -36,28 +35,173 @@ def get_device():
         logger.warning("GPU non disponible, utilisation CPU")
         return torch.device("cpu")
 
+def _resolve_device():
+    """Device imposé (ASR_DEVICE / override) ou détecté"""
+    import torch
+    
+    forced = os.environ.get("ASR_DEVICE")
+    if forced:
+        logger.info(f"Device imposé: {forced}")
+        return torch.device(forced)
+    return get_device()
+
+def __getattr__(name: str):
+    # PEP 562 : DEVICE n'est calculé (et torch importé) qu'au premier accès
+    if name == "DEVICE":
+        device = _resolve_device()
+        globals()["DEVICE"] = device
+        return device
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 # Configuration
-DEVICE = get_device()
-PROJECT_ROOT = Path.home() / "projet-cpm"
+PROJECT_ROOT = Path(os.environ.get("ASR_PROJECT_ROOT", Path.home() / "projet-cpm"))
 DATA_DIR = PROJECT_ROOT / "data"
 CORPUS_DIR = DATA_DIR / "corpus"
 MODELS_DIR = DATA_DIR / "models"
+PACKED_CORPUS_DIR = DATA_DIR / "packed"  # Corpus pré-décodé (pack_corpus.py)
+MANIFEST_DIR = DATA_DIR / "manifests"  # Manifestes JSONL des corpus (manifest.py)
+LM_BINARY_DIR = MODELS_DIR / "kenlm"  # LM KenLM convertis en binaire (cache par hash de l'ARPA, index par chemin/taille/mtime)
+SCAN_WORKERS = 8  # Threads de parcours du corpus et de lecture des en-têtes
 LOG_DIR = PROJECT_ROOT / "logs"
 
 # Model config
 MODEL_NAME = "facebook/wav2vec2-base-960h"
 SAMPLE_RATE = 16000
 BATCH_SIZE = 12
+MAX_BATCH_SAMPLES = 60 * SAMPLE_RATE  # Budget paddé par passe (~60 s d'audio)
+PAD_UNMASKED_BATCHES = False  # Modèles sans masque d'attention : padding autorisé (plus rapide, logits dépendants du batch)
+LOADER_WORKERS = 4  # Threads de lecture audio du pipeline
+PREFETCH_BATCHES = 2  # Batches en attente max entre deux étages du pipeline
 USE_FP16 = True
+USE_INT8 = False  # Quantification dynamique int8 (CPU), voir model_loader.load_quantized_model
+BACKEND = "torch"  # "torch" ou "onnx" (ONNX Runtime CPU, voir model_loader.load_onnx_model)
+PRECISIONS = ("fp32", "fp16", "bf16", "int8")  # Précisions de model_loader.optimize_for_inference
+
+# Audio long (inference.compute_logits_long)
+CHUNK_LENGTH_S = 30.0  # Fenêtre par passe du modèle ; au-delà, l'audio est découpé
+CHUNK_CONTEXT_S = 5.0  # Contexte de chaque côté d'une fenêtre, recouvert puis écarté
+CHUNK_BATCH_SIZE = 4  # Fenêtres par passe du modèle
+
+# Reconnaissance en flux (streaming.StreamingRecognizer)
+STREAM_STEP_MS = 100  # Audio nouveau déclenchant une passe du modèle
+STREAM_LEFT_CONTEXT_S = 2.0  # Contexte gauche redonné au modèle à chaque passe
+STREAM_LOOKAHEAD_MS = 200  # Frames les plus récentes laissées provisoires
+
+# Serveur de transcription (server.py / serve_asr.py)
+SERVER_HOST = "127.0.0.1"
+SERVER_PORT = 8080
+SERVER_MAX_BATCH = 16  # Requêtes max regroupées dans une passe du modèle
+SERVER_MAX_WAIT_MS = 20  # Attente max pour compléter un micro-batch
+SERVER_MAX_UPLOAD_MB = 50
+
+# Décodage
+DECODE_WORKERS = max(1, (os.cpu_count() or 1) - 1)  # Processus de beam search
+KENLM_BUILD_BINARY = "build_binary"  # Exécutable KenLM (nom dans le PATH ou chemin complet)
+KENLM_QUANTIZE_BITS = 8  # Bits des probabilités / backoffs du binaire trie (0 = sans quantification)
 
 # Cache HuggingFace
 CACHE_DIR = PROJECT_ROOT / ".cache" / "huggingface"
-os.environ['TRANSFORMERS_CACHE'] = str(CACHE_DIR)
-os.environ['HF_HOME'] = str(CACHE_DIR)
 
-logger.info(f"Configuration chargée - Device: {DEVICE}")
+# Cache des logits acoustiques
+USE_LOGITS_CACHE = True
+LOGITS_CACHE_DIR = PROJECT_ROOT / ".cache" / "logits"
+LOGITS_CACHE_MAX_BYTES = 5 * 10**9
+LOGITS_CACHE_FLOAT16 = False  # Entrées 2x plus petites, logits arrondis (aussi au premier calcul)
+
+# Journalisation
+LOG_LEVEL = "INFO"
+
+# Instrumentation (temps par étape, compteurs, profilage ; voir instrumentation.py)
+INSTRUMENT = False
+METRICS_DIR = PROJECT_ROOT / "metrics"
+PROFILE_FILES = 0  # Fichiers échantillonnés profilés après la transcription
+PROFILER = "cprofile"  # cprofile ou torch
+
+def _cast(value: str, default):
+    """Convertit une variable d'environnement au type de la valeur par défaut"""
+    if isinstance(default, bool):
+        return value.strip().lower() in ("1", "true", "yes", "on", "oui")
+    if isinstance(default, Path):
+        return Path(value)
+    return type(default)(value)
+
+def _apply_env_overrides():
+    """Surcharges ASR_<NOM> des constantes (int, float, str, bool, Path)"""
+    for name, default in list(globals().items()):
+        value = os.environ.get(f"ASR_{name}")
+        if value is None or not name.isupper() or name in ("PROJECT_ROOT", "DEVICE"):
+            continue
+        if isinstance(default, (bool, int, float, str, Path)):
+            globals()[name] = _cast(value, default)
+
+_apply_env_overrides()
+
+def override(**values):
+    """
+    Surcharge des constantes depuis un point d'entrée (ex. arguments CLI)
+    
+    Les noms sont insensibles à la casse : override(device="cpu", batch_size=8).
+    Les valeurs None sont ignorées (option CLI non renseignée).
+    
+    Changer PROJECT_ROOT déplace aussi les chemins qui en dérivent (DATA_DIR,
+    CORPUS_DIR, LOG_DIR, ...) ; un chemin passé dans le même appel ou déjà
+    surchargé hors de l'ancienne racine est conservé. Les modules lisent
+    config.X à l'appel (défauts None), pas à l'import.
+    """
+    values = {name.upper(): value for name, value in values.items() if value is not None}
+    if "PROJECT_ROOT" in values:
+        _move_project_root(Path(values.pop("PROJECT_ROOT")))
+    for name, value in values.items():
+        if name == "DEVICE":
+            import torch
+            value = torch.device(value)
+        elif name not in globals():
+            raise AttributeError(f"Paramètre de configuration inconnu: {name}")
+        globals()[name] = value
+
+def _move_project_root(new_root: Path):
+    """Rebase sur new_root les chemins situés sous l'ancienne PROJECT_ROOT"""
+    old_root = PROJECT_ROOT
+    for name, value in list(globals().items()):
+        if not name.isupper() or name == "PROJECT_ROOT" or not isinstance(value, Path):
+            continue
+        try:
+            globals()[name] = new_root / value.relative_to(old_root)
+        except ValueError:
+            continue
+    globals()["PROJECT_ROOT"] = new_root
+
+def configure_hf_cache():
+    """Dossier de cache HuggingFace (à appeler avant d'importer transformers)"""
+    os.environ.setdefault('TRANSFORMERS_CACHE', str(CACHE_DIR))
+    os.environ.setdefault('HF_HOME', str(CACHE_DIR))
+
+_logging_ready = False
+
+def setup_logging(level: str = None, log_dir: Path = None):
+    """
+    Active le journal fichier quotidien (appelé par les points d'entrée)
+    
+    Args:
+        level: Niveau minimal du journal fichier (défaut: LOG_LEVEL)
+        log_dir: Dossier des journaux (défaut: LOG_DIR)
+    """
+    global _logging_ready
+    if _logging_ready:
+        return
+    
+    log_dir = Path(log_dir or LOG_DIR)
+    log_dir.mkdir(parents=True, exist_ok=True)
+    logger.add(
+        log_dir / "asr_{time:YYYY-MM-DD}.log",
+        rotation="00:00",
+        retention="30 days",
+        level=level or LOG_LEVEL,
+        format="{time:YYYY-MM-DD HH:mm:ss} | {level: <8} | {name}:{function}:{line} - {message}"
+    )
+    _logging_ready = True
 
 if __name__ == "__main__":
-    print(f"Device: {DEVICE}")
+    print(f"Device: {_resolve_device()}")
     print(f"Project: {PROJECT_ROOT}")
     print(f"Corpus: {CORPUS_DIR}")
@@ -0,0 +1,155 @@
+"""Décodage CTC (beam search) parallélisé sur un pool de processus"""
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Iterator, List, Optional, Tuple
+import numpy as np
+from loguru import logger
+import audio_utils
+import config
+import model_loader
+
+# Décodeur propre à chaque processus worker (construit une seule fois)
+_worker_decoder = None
+
+def _init_worker(processor, lm_path):
+    """Initialise le décodeur pyctcdecode dans le processus worker"""
+    global _worker_decoder
+    _worker_decoder = model_loader.load_decoder(processor, lm_path)
+
+def _decode_in_worker(logits: np.ndarray) -> str:
+    """Décode des logits avec le décodeur du worker"""
+    return _worker_decoder.decode(logits)
+
+def _ping() -> bool:
+    return True
+
+def _start_pool(num_workers: int, initializer, initargs: tuple) -> ProcessPoolExecutor:
+    """
+    Pool de workers forkés, démarrés immédiatement
+
+    ProcessPoolExecutor ne forke ses workers qu'au premier submit() : si cet
+    appel vient d'un thread du pipeline, le fork a lieu pendant que d'autres
+    threads (lecture audio, passe du modèle) tiennent peut-être des verrous
+    torch / OpenMP, qui resteraient verrouillés à jamais dans l'enfant. Une
+    tâche vide est donc soumise ici, depuis le thread appelant, et attendue
+    (avec fork, tous les workers sont créés à ce premier submit).
+    """
+    pool = ProcessPoolExecutor(
+        max_workers=num_workers,
+        mp_context=multiprocessing.get_context("fork"),
+        initializer=initializer,
+        initargs=initargs
+    )
+    pool.submit(_ping).result()
+    return pool
+
+# Logits du corpus partagés avec les workers de sweep (hérités par fork)
+_worker_logits = None
+
+def _init_sweep_worker(processor, lm_path, logits_list):
+    """Initialise un worker de sweep : décodeur + logits du corpus"""
+    global _worker_logits
+    _init_worker(processor, lm_path)
+    _worker_logits = logits_list
+
+def _run_trial(params: dict) -> Tuple[dict, List[str], float]:
+    """Décode tout le corpus avec un jeu d'hyperparamètres"""
+    _worker_decoder.reset_params(alpha=params['alpha'], beta=params['beta'])
+    start = time.perf_counter()
+    texts = [
+        audio_utils.clean_text(_worker_decoder.decode(logits, beam_width=params['beam_width']))
+        for logits in _worker_logits
+    ]
+    return params, texts, time.perf_counter() - start
+
+def sweep(
+    processor,
+    lm_path: Optional[Path],
+    logits_list: List[np.ndarray],
+    trials: List[dict],
+    num_workers: Optional[int] = None
+) -> Iterator[Tuple[dict, List[str], float]]:
+    """
+    Évalue plusieurs jeux d'hyperparamètres du décodeur en parallèle
+    
+    Chaque worker charge le LM une seule fois et hérite des logits du
+    corpus ; seul le jeu de paramètres (alpha, beta, beam_width) transite
+    pour chaque essai.
+    
+    Args:
+        processor: Le processeur Wav2Vec2
+        lm_path: Chemin vers le fichier .arpa ou .bin (KenLM)
+        logits_list: Logits [frames, vocab] de chaque énoncé
+        trials: Liste de dicts {'alpha', 'beta', 'beam_width'}
+        num_workers: Nombre de processus (défaut: config.DECODE_WORKERS)
+        
+    Yields:
+        (params, hypothèses nettoyées, temps de décodage en s) dans l'ordre de trials
+    """
+    num_workers = config.DECODE_WORKERS if num_workers is None else num_workers
+    logger.info(f"Sweep de {len(trials)} configurations sur {num_workers} workers...")
+    # Conversion (ou empreinte) de l'ARPA faite ici une fois, pas dans chaque worker
+    lm_path = model_loader.convert_lm_to_binary(lm_path) if lm_path else None
+    with _start_pool(num_workers, _init_sweep_worker, (processor, lm_path, logits_list)) as pool:
+        yield from pool.map(_run_trial, trials)
+
+class ParallelDecoder:
+    """
+    Beam search pyctcdecode réparti sur plusieurs processus
+    
+    Chaque worker construit son propre décodeur (et charge le LM) une seule
+    fois via model_loader.load_decoder ; les logits lui sont ensuite envoyés
+    par lots et les résultats sont récupérés dans l'ordre d'envoi.
+    """
+    
+    def __init__(
+        self,
+        processor,
+        lm_path: Optional[Path] = None,
+        num_workers: Optional[int] = None,
+        chunksize: int = 4
+    ):
+        """
+        Args:
+            processor: Le processeur Wav2Vec2
+            lm_path: Chemin vers le fichier .arpa ou .bin (KenLM)
+            num_workers: Nombre de processus de décodage (défaut: config.DECODE_WORKERS)
+            chunksize: Nombre de logits envoyés par tâche à un worker
+        """
+        num_workers = config.DECODE_WORKERS if num_workers is None else num_workers
+        self.num_workers = num_workers
+        self.chunksize = chunksize
+        
+        # Conversion (ou empreinte) de l'ARPA faite ici une fois, pas dans chaque worker
+        lm_path = model_loader.convert_lm_to_binary(lm_path) if lm_path else None
+        logger.info(f"Démarrage de {num_workers} workers de décodage (LM={lm_path if lm_path else 'None'})...")
+        # Workers démarrés ici, avant les threads du pipeline (voir _start_pool)
+        self.pool = _start_pool(num_workers, _init_worker, (processor, lm_path))
+    
+    def decode(self, logits: np.ndarray) -> str:
+        """Décode un seul énoncé (même interface que BeamSearchDecoderCTC)"""
+        return self.pool.submit(_decode_in_worker, logits).result()
+    
+    def decode_many(self, logits_list: List[np.ndarray]) -> List[str]:
+        """
+        Décode une liste d'énoncés en parallèle
+        
+        Returns:
+            Textes décodés (non nettoyés), dans l'ordre de logits_list
+        """
+        return list(self.pool.map(_decode_in_worker, logits_list, chunksize=self.chunksize))
+    
+    def close(self):
+        """Arrête les workers"""
+        self.pool.shutdown(wait=True)
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc):
+        self.close()
+
+if __name__ == "__main__":
+    print("decoding.py - Décodage CTC parallèle")
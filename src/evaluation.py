@@ -1,7 +1,8 @@
 """Évaluation WER et bootstrap CI"""
+from concurrent.futures import ProcessPoolExecutor
 import numpy as np
-from jiwer import wer
-from typing import List, Tuple
+from jiwer import wer, process_words
+from typing import Dict, Hashable, List, Tuple
 from loguru import logger
 
 def compute_wer(references: List[str], hypotheses: List[str]) -> float:
@@ -26,6 +27,69 @@ def compute_wer(references: List[str], hypotheses: List[str]) -> float:
     
     return W * 100
 
+def bootstrap_means(
+    values: np.ndarray,
+    n_boot: int = 2000,
+    seed: int = 42,
+    max_chunk_elems: int = 10_000_000
+) -> np.ndarray:
+    """
+    Moyennes bootstrap vectorisées
+    
+    Cas général : les indices de ré-échantillonnage forment une matrice
+    n_boot x n, générée par blocs de lignes pour borner la mémoire
+    (max_chunk_elems indices par bloc).
+    
+    Lorsque les valeurs prennent peu de valeurs distinctes (WER par fichier
+    sur des séquences courtes), tirer n indices uniformes revient à tirer
+    les effectifs de chaque valeur distincte selon une loi multinomiale :
+    le coût devient n_boot x nb_valeurs_distinctes au lieu de n_boot x n.
+    
+    Args:
+        values: Valeurs par fichier, shape (n,) ou (n, k) pour k métriques
+            ré-échantillonnées avec les mêmes indices (bootstrap apparié)
+        n_boot: Nombre d'itérations bootstrap
+        seed: Seed pour reproductibilité
+        max_chunk_elems: Nombre max d'éléments tirés par bloc
+        
+    Returns:
+        Moyennes bootstrap, shape (n_boot,) ou (n_boot, k)
+        
+    Raises:
+        ValueError: Si values est vide (moyenne non définie)
+    """
+    rng = np.random.default_rng(seed)
+    values = np.asarray(values, dtype=float)
+    n = len(values)
+    if n == 0:
+        raise ValueError("Bootstrap impossible : aucune valeur à ré-échantillonner")
+    
+    unique, counts = np.unique(values, axis=0, return_counts=True)
+    compress = len(unique) * 4 <= n
+    if compress:
+        values, probs = unique, counts / n
+    
+    boot_means = np.empty((n_boot,) + values.shape[1:])
+    row_cost = len(values) if compress else n
+    rows_per_chunk = max(1, max_chunk_elems // max(row_cost, 1))
+    
+    for start in range(0, n_boot, rows_per_chunk):
+        stop = min(n_boot, start + rows_per_chunk)
+        if compress:
+            weights = rng.multinomial(n, probs, size=stop - start) / n
+            boot_means[start:stop] = weights @ values
+        else:
+            sample_idx = rng.integers(0, n, size=(stop - start, n))
+            boot_means[start:stop] = values[sample_idx].mean(axis=1)
+    
+    return boot_means
+
+def per_file_wer(references: List[str], hypotheses: List[str]) -> np.ndarray:
+    """WER de chaque fichier (fraction, pas en pourcentage)"""
+    return np.array([
+        wer(r, h) for r, h in zip(references, hypotheses)
+    ], dtype=float)
+
 def bootstrap_ci(
     references: List[str],
     hypotheses: List[str],
@@ -46,32 +110,263 @@ def bootstrap_ci(
     Returns:
         (wer_mean, ci_low, ci_high) en pourcentage
     """
-    rng = np.random.default_rng(seed)
-    
     # Calcul WER par fichier
-    per_file_wer = np.array([
-        wer(r, h) for r, h in zip(references, hypotheses)
-    ], dtype=float)
-    
-    n = len(per_file_wer)
+    wers = per_file_wer(references, hypotheses)
     
     # Bootstrap
-    boot_means = []
-    for _ in range(n_boot):
-        sample_idx = rng.choice(n, size=n, replace=True)
-        boot_sample = per_file_wer[sample_idx]
-        boot_means.append(boot_sample.mean())
-    
-    boot_means = np.sort(boot_means)
+    boot_means = bootstrap_means(wers, n_boot=n_boot, seed=seed)
     
     # Calcul IC
-    wer_mean = per_file_wer.mean()
-    ci_low = float(np.quantile(boot_means, alpha / 2))
-    ci_high = float(np.quantile(boot_means, 1 - alpha / 2))
+    wer_mean = wers.mean()
+    ci_low, ci_high = np.quantile(boot_means, [alpha / 2, 1 - alpha / 2])
     
     logger.info(f"WER: {wer_mean*100:.2f}% [IC95: {ci_low*100:.2f}% - {ci_high*100:.2f}%]")
     
-    return wer_mean * 100, ci_low * 100, ci_high * 100
+    return wer_mean * 100, float(ci_low) * 100, float(ci_high) * 100
+
+def paired_bootstrap_ci(
+    references: List[str],
+    hypotheses_a: List[str],
+    hypotheses_b: List[str],
+    n_boot: int = 2000,
+    alpha: float = 0.05,
+    seed: int = 42
+) -> Tuple[float, float, float, float]:
+    """
+    Bootstrap apparié de la différence de WER entre deux systèmes (A - B)
+    
+    Les deux systèmes sont ré-échantillonnés avec les mêmes fichiers à
+    chaque itération, ce qui neutralise la variance due aux fichiers.
+    
+    Args:
+        references: Liste des transcriptions de référence
+        hypotheses_a: Transcriptions du système A (ex: NoLM)
+        hypotheses_b: Transcriptions du système B (ex: LM)
+        n_boot: Nombre d'itérations bootstrap
+        alpha: Niveau de significativité (0.05 = IC à 95%)
+        seed: Seed pour reproductibilité
+        
+    Returns:
+        (delta, ci_low, ci_high) en points de pourcentage, et p-value
+        bilatérale (proportion des itérations où la différence change de signe)
+    """
+    wers = np.stack([
+        per_file_wer(references, hypotheses_a),
+        per_file_wer(references, hypotheses_b)
+    ], axis=1)
+    
+    boot_means = bootstrap_means(wers, n_boot=n_boot, seed=seed)
+    boot_delta = boot_means[:, 0] - boot_means[:, 1]
+    
+    delta = wers[:, 0].mean() - wers[:, 1].mean()
+    ci_low, ci_high = np.quantile(boot_delta, [alpha / 2, 1 - alpha / 2])
+    p_value = min(1.0, 2 * min((boot_delta <= 0).mean(), (boot_delta >= 0).mean()))
+    
+    logger.info(
+        f"ΔWER (A - B): {delta*100:+.2f} pts [IC95: {ci_low*100:+.2f} - {ci_high*100:+.2f}] "
+        f"(p={p_value:.4f})"
+    )
+    
+    return delta * 100, float(ci_low) * 100, float(ci_high) * 100, float(p_value)
+
+# Colonnes des comptes d'erreurs : substitutions, suppressions, insertions, mots de référence
+ERROR_COUNT_COLUMNS = ("S", "D", "I", "N")
+
+def compute_error_counts(references: List[str], hypotheses: List[str]) -> np.ndarray:
+    """
+    Comptes d'opérations d'édition de chaque paire (référence, hypothèse)
+    
+    Toutes les paires sont alignées en un seul appel à jiwer ; le bootstrap
+    et les WER par groupe travaillent ensuite sur ces entiers, sans
+    ré-aligner de chaînes.
+    
+    Args:
+        references: Liste des transcriptions de référence
+        hypotheses: Liste des transcriptions prédites
+        
+    Returns:
+        Tableau int64 de shape (n, 4) : colonnes S, D, I, N (ERROR_COUNT_COLUMNS)
+    """
+    if len(references) != len(hypotheses):
+        raise ValueError(f"Mismatch: {len(references)} refs vs {len(hypotheses)} hyps")
+    
+    if len(references) == 0:
+        return np.zeros((0, len(ERROR_COUNT_COLUMNS)), dtype=np.int64)
+    
+    output = process_words(references, hypotheses)
+    
+    counts = np.zeros((len(references), len(ERROR_COUNT_COLUMNS)), dtype=np.int64)
+    for i, (chunks, ref_words) in enumerate(zip(output.alignments, output.references)):
+        for chunk in chunks:
+            if chunk.type == "substitute":
+                counts[i, 0] += chunk.ref_end_idx - chunk.ref_start_idx
+            elif chunk.type == "delete":
+                counts[i, 1] += chunk.ref_end_idx - chunk.ref_start_idx
+            elif chunk.type == "insert":
+                counts[i, 2] += chunk.hyp_end_idx - chunk.hyp_start_idx
+        counts[i, 3] = len(ref_words)
+    
+    return counts
+
+def wer_from_counts(counts: np.ndarray) -> float:
+    """WER corpus (en pourcentage) à partir des comptes S, D, I, N sommés"""
+    totals = np.asarray(counts).sum(axis=0)
+    return (totals[0] + totals[1] + totals[2]) / totals[3] * 100
+
+def bootstrap_ci_counts(
+    counts: np.ndarray,
+    n_boot: int = 2000,
+    alpha: float = 0.05,
+    seed: int = 42
+) -> Tuple[float, float, float]:
+    """
+    WER corpus avec intervalle de confiance par bootstrap sur les comptes
+    
+    Chaque itération ré-échantillonne les fichiers et calcule
+    (S + D + I) / N sur les comptes sommés, ce qui pondère chaque fichier
+    par son nombre de mots (contrairement à la moyenne des WER par fichier).
+    
+    Args:
+        counts: Comptes (n, 4) issus de compute_error_counts
+        n_boot: Nombre d'itérations bootstrap
+        alpha: Niveau de significativité (0.05 = IC à 95%)
+        seed: Seed pour reproductibilité
+        
+    Returns:
+        (wer, ci_low, ci_high) en pourcentage
+    """
+    counts = np.asarray(counts)
+    errors_and_words = np.stack([counts[:, :3].sum(axis=1), counts[:, 3]], axis=1)
+    
+    boot = bootstrap_means(errors_and_words, n_boot=n_boot, seed=seed)
+    boot_wer = boot[:, 0] / boot[:, 1]
+    
+    wer_value = wer_from_counts(counts)
+    ci_low, ci_high = np.quantile(boot_wer, [alpha / 2, 1 - alpha / 2]) * 100
+    
+    logger.info(f"WER corpus: {wer_value:.2f}% [IC95: {ci_low:.2f}% - {ci_high:.2f}%] (N={len(counts)})")
+    
+    return wer_value, float(ci_low), float(ci_high)
+
+def paired_bootstrap_ci_counts(
+    counts_a: np.ndarray,
+    counts_b: np.ndarray,
+    n_boot: int = 2000,
+    alpha: float = 0.05,
+    seed: int = 42
+) -> Tuple[float, float, float, float]:
+    """
+    Bootstrap apparié de la différence de WER corpus entre deux systèmes (A - B)
+    
+    Args:
+        counts_a: Comptes (n, 4) du système A (ex: NoLM)
+        counts_b: Comptes (n, 4) du système B (ex: LM), mêmes fichiers
+        n_boot: Nombre d'itérations bootstrap
+        alpha: Niveau de significativité (0.05 = IC à 95%)
+        seed: Seed pour reproductibilité
+        
+    Returns:
+        (delta, ci_low, ci_high) en points de pourcentage, et p-value bilatérale
+    """
+    counts_a, counts_b = np.asarray(counts_a), np.asarray(counts_b)
+    values = np.stack([
+        counts_a[:, :3].sum(axis=1),
+        counts_b[:, :3].sum(axis=1),
+        counts_a[:, 3]
+    ], axis=1)
+    
+    boot = bootstrap_means(values, n_boot=n_boot, seed=seed)
+    boot_delta = (boot[:, 0] - boot[:, 1]) / boot[:, 2]
+    
+    delta = wer_from_counts(counts_a) - wer_from_counts(counts_b)
+    ci_low, ci_high = np.quantile(boot_delta, [alpha / 2, 1 - alpha / 2]) * 100
+    p_value = min(1.0, 2 * min((boot_delta <= 0).mean(), (boot_delta >= 0).mean()))
+    
+    logger.info(
+        f"ΔWER corpus (A - B): {delta:+.2f} pts [IC95: {ci_low:+.2f} - {ci_high:+.2f}] "
+        f"(p={p_value:.4f})"
+    )
+    
+    return delta, float(ci_low), float(ci_high), float(p_value)
+
+def bootstrap_ci_counts_multi(
+    counts_list: List[np.ndarray],
+    n_boot: int = 2000,
+    alpha: float = 0.05,
+    seed: int = 42
+) -> List[Tuple[float, float, float]]:
+    """
+    WER corpus et IC de plusieurs systèmes évalués sur les mêmes fichiers
+    
+    Un seul bootstrap pour tous les systèmes : les erreurs de chacun et le
+    nombre de mots (commun) sont ré-échantillonnés avec les mêmes indices.
+    
+    Args:
+        counts_list: Comptes (n, 4) de chaque système (mêmes fichiers, même ordre)
+        n_boot: Nombre d'itérations bootstrap
+        alpha: Niveau de significativité (0.05 = IC à 95%)
+        seed: Seed pour reproductibilité
+        
+    Returns:
+        [(wer, ci_low, ci_high)] en pourcentage, un par système
+    """
+    counts_list = [np.asarray(counts) for counts in counts_list]
+    values = np.stack(
+        [counts[:, :3].sum(axis=1) for counts in counts_list] + [counts_list[0][:, 3]], axis=1
+    )
+    
+    boot = bootstrap_means(values, n_boot=n_boot, seed=seed)
+    boot_wer = boot[:, :-1] / boot[:, -1:]
+    ci_low, ci_high = np.quantile(boot_wer, [alpha / 2, 1 - alpha / 2], axis=0) * 100
+    
+    return [
+        (float(wer_from_counts(counts)), float(low), float(high))
+        for counts, low, high in zip(counts_list, ci_low, ci_high)
+    ]
+
+def _group_ci_task(task):
+    """Tâche de grouped_bootstrap_ci_counts (fonction de module : picklable)"""
+    key, counts_list, n_boot, alpha, seed = task
+    return key, bootstrap_ci_counts_multi(counts_list, n_boot, alpha, seed)
+
+def grouped_bootstrap_ci_counts(
+    groups: Dict[Hashable, List[np.ndarray]],
+    n_boot: int = 2000,
+    alpha: float = 0.05,
+    seed: int = 42,
+    num_workers: int = 1
+) -> Dict[Hashable, List[Tuple[float, float, float]]]:
+    """
+    WER et IC de tous les groupes d'une analyse (SNR, locuteur, longueur...)
+    
+    Chaque groupe est traité par bootstrap_ci_counts_multi (un bootstrap
+    pour tous ses systèmes) ; les groupes sont répartis sur num_workers
+    processus. Chaque groupe garde la même seed : les résultats ne
+    dépendent pas du nombre de processus. Les groupes vides (aucun fichier,
+    ex. un shard ou un CSV partiel) sont ignorés avec un avertissement et
+    absents du résultat.
+    
+    Args:
+        groups: {clé du groupe: [comptes (n_g, 4) de chaque système]}
+        n_boot: Nombre d'itérations bootstrap
+        alpha: Niveau de significativité (0.05 = IC à 95%)
+        seed: Seed pour reproductibilité
+        num_workers: Nombre de processus (1 = séquentiel)
+        
+    Returns:
+        {clé du groupe: [(wer, ci_low, ci_high)] par système}
+    """
+    tasks = []
+    for key, counts_list in groups.items():
+        if len(counts_list[0]) == 0:
+            logger.warning(f"Groupe {key} vide : ignoré dans l'analyse")
+            continue
+        tasks.append((key, counts_list, n_boot, alpha, seed))
+    
+    if num_workers > 1 and len(tasks) > 1:
+        with ProcessPoolExecutor(max_workers=min(num_workers, len(tasks))) as pool:
+            return dict(pool.map(_group_ci_task, tasks))
+    return dict(map(_group_ci_task, tasks))
 
 def print_evaluation_results(
     wer_value: float,
@@ -84,7 +379,7 @@ def print_evaluation_results(
     Affiche les résultats d'évaluation de manière formatée
     
     Args:
-        wer_value: WER moyen (%)
+        wer_value: WER (%)
         ci_low: Borne inférieure IC95 (%)
         ci_high: Borne supérieure IC95 (%)
         n_files: Nombre de fichiers évalués
@@ -95,7 +390,7 @@ def print_evaluation_results(
         print(f"ÉVALUATION: {label}")
     print("="*60)
     print(f"Nombre de fichiers: {n_files}")
-    print(f"WER moyen:          {wer_value:.2f}%")
+    print(f"WER:                {wer_value:.2f}%")
     print(f"IC95:               [{ci_low:.2f}%, {ci_high:.2f}%]")
     print("="*60 + "\n")
 
@@ -1,21 +1,34 @@
 """Fonctions d'inférence ASR"""
+import hashlib
+import os
+import threading
+from types import SimpleNamespace
 import torch
+import numpy as np
 from pathlib import Path
-from typing import List, Tuple
+from typing import Dict, Iterator, List, Optional, Tuple
 from loguru import logger
 from tqdm import tqdm
 import audio_utils
 import config
+import decoding
+import instrumentation
 
-@torch.no_grad()
-def transcribe_greedy(
+@torch.inference_mode()
+def compute_logits(
     wav_path: Path,
     processor,
     model,
-    device=config.DEVICE
-) -> str:
+    device=None
+) -> np.ndarray:
     """
-    Transcription greedy (sans modèle de langage)
+    Calcule les logits acoustiques d'un fichier (une seule passe du modèle)
+    
+    Les logits obtenus peuvent ensuite être décodés par autant de
+    décodeurs que nécessaire (greedy, beam search avec ou sans LM).
+    
+    Au-delà de config.CHUNK_LENGTH_S, l'audio est découpé en fenêtres
+    (voir compute_logits_long) pour borner la mémoire.
     
     Args:
         wav_path: Chemin vers le fichier WAV
@@ -24,30 +37,512 @@ def transcribe_greedy(
         device: Device (cuda/cpu)
         
     Returns:
-        Texte transcrit nettoyé
+        Logits [frames, vocab] en numpy (CPU)
     """
     waveform, sr = audio_utils.load_audio(wav_path, config.SAMPLE_RATE)
+    return compute_logits_long(waveform.squeeze(0).numpy(), processor, model, device=device)
+
+def decode_logits(logits: np.ndarray, processor, decoder=None) -> str:
+    """
+    Décode des logits déjà calculés
+    
+    Args:
+        logits: Logits [frames, vocab] (numpy)
+        processor: Wav2Vec2Processor (utilisé pour le décodage greedy)
+        decoder: CTC decoder pyctcdecode (None = greedy argmax)
+        
+    Returns:
+        Texte transcrit nettoyé
+    """
+    if decoder is None:
+        with instrumentation.stage("decode.greedy"):
+            pred_ids = np.argmax(logits, axis=-1)
+            text = processor.decode(pred_ids)
+    else:
+        with instrumentation.stage("decode.lm"):
+            text = decoder.decode(logits)
+    
+    return audio_utils.clean_text(text)
+
+def decode_logits_batch(batch_logits: List[np.ndarray], processor, decoder=None) -> List[str]:
+    """
+    Décode plusieurs énoncés avec un même décodeur
+    
+    Un decoding.ParallelDecoder répartit le batch sur ses workers ;
+    les autres décodeurs traitent les énoncés un par un.
+    
+    Returns:
+        Textes transcrits nettoyés, dans l'ordre de batch_logits
+    """
+    if isinstance(decoder, decoding.ParallelDecoder):
+        with instrumentation.stage("decode.lm_batch"):
+            texts = decoder.decode_many(batch_logits)
+        return [audio_utils.clean_text(text) for text in texts]
+    return [decode_logits(logits, processor, decoder) for logits in batch_logits]
+
+def transcribe_multi(
+    wav_path: Path,
+    processor,
+    model,
+    decoders: Dict[str, Optional[object]],
+    device=None
+) -> Dict[str, str]:
+    """
+    Transcrit un fichier avec plusieurs décodeurs en partageant les logits
+    
+    Args:
+        wav_path: Chemin vers le fichier WAV
+        processor: Wav2Vec2Processor
+        model: Wav2Vec2ForCTC
+        decoders: Dict {nom: décodeur} (None = greedy)
+        device: Device (cuda/cpu)
+        
+    Returns:
+        Dict {nom: texte transcrit}
+    """
+    logits = compute_logits(wav_path, processor, model, device)
+    return {
+        name: decode_logits(logits, processor, decoder)
+        for name, decoder in decoders.items()
+    }
+
+def iter_batches(items: List, batch_size: int) -> Iterator[List]:
+    """Découpe une liste en batches successifs de taille batch_size"""
+    for i in range(0, len(items), batch_size):
+        yield items[i:i + batch_size]
+
+def pads_batches(processor) -> bool:
+    """
+    Vrai si compute_logits_batch passe un batch en une seule passe paddée
+    
+    Faux pour les modèles sans masque d'attention (type wav2vec2-base), sauf
+    config.PAD_UNMASKED_BATCHES : chaque signal passe alors seul, sans padding.
+    """
+    return bool(processor.feature_extractor.return_attention_mask or config.PAD_UNMASKED_BATCHES)
+
+@torch.inference_mode()
+def compute_logits_batch(
+    waveforms: List[np.ndarray],
+    processor,
+    model,
+    device=None
+) -> List[np.ndarray]:
+    """
+    Calcule les logits d'un batch de signaux en une seule passe du modèle
+    
+    Les signaux sont paddés par le processeur ; le masque d'attention sert
+    à retrouver le nombre de frames réel de chaque énoncé. Il n'est transmis
+    au modèle que si le processeur le prévoit (return_attention_mask).
+    
+    Les modèles sans masque (type wav2vec2-base) voient le padding : la
+    group norm de l'extracteur et l'attention le prennent en compte, et les
+    logits d'un énoncé dépendraient alors des autres signaux du batch
+    (WER différent d'un run fichier par fichier, d'un découpage en shards à
+    l'autre). Pour ces modèles, les signaux passent donc un par un, sauf si
+    config.PAD_UNMASKED_BATCHES autorise le padding (plus rapide, résultats
+    dépendants du batch).
+    
+    Args:
+        waveforms: Liste de signaux mono 1D (numpy, config.SAMPLE_RATE)
+        processor: Wav2Vec2Processor
+        model: Wav2Vec2ForCTC
+        device: Device (cuda/cpu) ; défaut: config.DEVICE
+        
+    Returns:
+        Liste des logits [frames_i, vocab] (numpy, CPU), un par signal
+    """
+    device = device or config.DEVICE
+    if len(waveforms) > 1 and not pads_batches(processor):
+        return [
+            logits
+            for waveform in waveforms
+            for logits in compute_logits_batch([waveform], processor, model, device)
+        ]
+    
+    with instrumentation.stage("processor"):
+        inputs = processor(
+            waveforms,
+            sampling_rate=config.SAMPLE_RATE,
+            return_tensors="pt",
+            padding=True,
+            return_attention_mask=True
+        )
+    
+    input_values = inputs.input_values.to(device, dtype=model.dtype)
+    attention_mask = inputs.attention_mask
+    
+    with instrumentation.stage("model.forward"):
+        if processor.feature_extractor.return_attention_mask:
+            logits = model(input_values, attention_mask=attention_mask.to(device)).logits
+        else:
+            logits = model(input_values).logits
+        logits = logits.float().cpu().numpy()
+    instrumentation.count("model.batches")
+    instrumentation.count("model.samples", int(input_values.shape[0] * input_values.shape[-1]))
+    
+    frame_lengths = model._get_feat_extract_output_lengths(attention_mask.sum(dim=-1))
+    
+    return [logits[i, :int(n)].copy() for i, n in enumerate(frame_lengths)]
+
+def samples_per_frame(model) -> int:
+    """Nombre d'échantillons audio par frame de logits (produit des strides convolutifs)"""
+    return int(np.prod(model.config.conv_stride))
+
+def plan_chunks(num_samples: int, chunk_samples: int, context_samples: int) -> List[Tuple[int, int, int]]:
+    """
+    Découpe un signal en fenêtres recouvrantes
+    
+    Deux fenêtres consécutives se recouvrent de 2 x context_samples ; chaque
+    fenêtre ne garde que sa partie centrale, les bords servant de contexte.
+    Les zones gardées se suivent sans trou ni recouvrement.
+    
+    Returns:
+        Liste de (début, fin) de la fenêtre et début de la zone gardée,
+        sous la forme (start, end, keep_from) ; la zone gardée de la
+        fenêtre i s'arrête à keep_from de la fenêtre i+1
+    """
+    step = chunk_samples - 2 * context_samples
+    if step <= 0:
+        raise ValueError(f"Fenêtre ({chunk_samples}) trop courte pour un contexte de {context_samples} échantillons")
+    
+    chunks = []
+    start = 0
+    while True:
+        end = min(start + chunk_samples, num_samples)
+        chunks.append((start, end, start + context_samples if start > 0 else 0))
+        if end >= num_samples:
+            return chunks
+        start += step
+
+@torch.inference_mode()
+def compute_logits_long(
+    waveform: np.ndarray,
+    processor,
+    model,
+    chunk_length_s: Optional[float] = None,
+    context_s: Optional[float] = None,
+    chunk_batch_size: Optional[int] = None,
+    device=None
+) -> np.ndarray:
+    """
+    Calcule les logits d'un signal de durée quelconque par fenêtres
+    
+    Le signal est découpé en fenêtres de chunk_length_s recouvertes de
+    context_s de chaque côté (plan_chunks), passées au modèle par batches de
+    chunk_batch_size ; les frames de contexte sont écartées et les parties
+    centrales concaténées. La mémoire du modèle ne dépend donc que de la
+    taille des fenêtres. Les frontières sont alignées sur les frames pour
+    que les logits recollés se suivent exactement.
+    
+    Args:
+        waveform: Signal mono 1D (numpy, config.SAMPLE_RATE)
+        processor: Wav2Vec2Processor
+        model: Wav2Vec2ForCTC
+        chunk_length_s: Durée d'une fenêtre en secondes (défaut: config.CHUNK_LENGTH_S)
+        context_s: Contexte écarté de chaque côté, en secondes, au moins une
+            frame (défaut: config.CHUNK_CONTEXT_S)
+        chunk_batch_size: Nombre de fenêtres par passe du modèle (défaut: config.CHUNK_BATCH_SIZE)
+        device: Device (cuda/cpu)
+        
+    Returns:
+        Logits [frames, vocab] en numpy (CPU) pour tout le signal
+    """
+    chunk_length_s = config.CHUNK_LENGTH_S if chunk_length_s is None else chunk_length_s
+    context_s = config.CHUNK_CONTEXT_S if context_s is None else context_s
+    chunk_batch_size = config.CHUNK_BATCH_SIZE if chunk_batch_size is None else chunk_batch_size
+    frame = samples_per_frame(model)
+    chunk_samples = max(frame, int(chunk_length_s * config.SAMPLE_RATE) // frame * frame)
+    context_samples = int(context_s * config.SAMPLE_RATE) // frame * frame
+    if context_samples < frame:
+        # Sans contexte, une fenêtre de N frames n'en produit que N - 1
+        # (champ réceptif des convolutions) : les logits recollés seraient trop courts
+        raise ValueError(f"Contexte ({context_s}s) plus court qu'une frame ({frame} échantillons)")
     
-    inputs = processor(
-        waveform.squeeze().numpy(),
-        sampling_rate=config.SAMPLE_RATE,
-        return_tensors="pt",
-        padding=True
+    if len(waveform) <= chunk_samples:
+        return compute_logits_batch([waveform], processor, model, device)[0]
+    
+    chunks = plan_chunks(len(waveform), chunk_samples, context_samples)
+    instrumentation.count("model.long_chunks", len(chunks))
+    
+    # Fenêtres pleines groupées ; la dernière (plus courte) passe seule
+    # pour ne pas introduire de padding dans les autres
+    groups = list(iter_batches(list(range(len(chunks) - 1)), chunk_batch_size)) + [[len(chunks) - 1]]
+    
+    pieces = []
+    for group in groups:
+        batch_logits = compute_logits_batch(
+            [waveform[chunks[i][0]:chunks[i][1]] for i in group], processor, model, device
+        )
+        for i, logits in zip(group, batch_logits):
+            start, _, keep_from = chunks[i]
+            first = (keep_from - start) // frame
+            last = (chunks[i + 1][2] - start) // frame if i + 1 < len(chunks) else len(logits)
+            pieces.append(logits[first:last])
+    
+    return np.concatenate(pieces, axis=0)
+
+def transcribe_long(
+    wav_path: Path,
+    processor,
+    model,
+    decoders: Dict[str, Optional[object]],
+    chunk_length_s: Optional[float] = None,
+    context_s: Optional[float] = None,
+    device=None
+) -> Dict[str, str]:
+    """
+    Transcrit un enregistrement long (fenêtres recouvrantes, logits recollés)
+    
+    Les décodeurs (greedy ou LM) s'appliquent aux logits recollés, donc à
+    l'enregistrement entier : pas de mot coupé en frontière de fenêtre.
+    
+    Returns:
+        Dict {nom: texte transcrit}
+    """
+    waveform, _ = audio_utils.load_audio(wav_path, config.SAMPLE_RATE)
+    logits = compute_logits_long(
+        waveform.squeeze(0).numpy(), processor, model, chunk_length_s, context_s, device=device
     )
+    return {
+        name: decode_logits(logits, processor, decoder)
+        for name, decoder in decoders.items()
+    }
+
+def transcribe_batch(
+    wav_paths: List[Path],
+    processor,
+    model,
+    decoders: Dict[str, Optional[object]],
+    device=None
+) -> List[Dict[str, str]]:
+    """
+    Transcrit un batch de fichiers (une passe du modèle pour tout le batch)
+    
+    Args:
+        wav_paths: Liste des fichiers WAV du batch
+        processor: Wav2Vec2Processor
+        model: Wav2Vec2ForCTC
+        decoders: Dict {nom: décodeur} (None = greedy)
+        device: Device (cuda/cpu)
+        
+    Returns:
+        Liste de dicts {nom: texte transcrit}, dans l'ordre de wav_paths
+    """
+    waveforms = [
+        audio_utils.load_audio(wav_path, config.SAMPLE_RATE)[0].squeeze(0).numpy()
+        for wav_path in wav_paths
+    ]
     
-    logits = model(inputs.input_values.to(device)).logits
-    pred_ids = torch.argmax(logits, dim=-1)
-    text = processor.batch_decode(pred_ids)[0]
+    batch_logits = compute_logits_batch(waveforms, processor, model, device)
+    texts = {
+        name: decode_logits_batch(batch_logits, processor, decoder)
+        for name, decoder in decoders.items()
+    }
+    return [{name: texts[name][i] for name in decoders} for i in range(len(wav_paths))]
+
+class OnnxWav2Vec2:
+    """
+    Backend ONNX Runtime (CPU) pour un Wav2Vec2ForCTC exporté
     
-    return audio_utils.clean_text(text)
+    Expose la partie de l'interface de Wav2Vec2ForCTC utilisée par ce
+    module (appel -> .logits, dtype, longueurs de sortie de l'extracteur
+    de features) : il se substitue au modèle PyTorch sans autre changement.
+    Le graphe est exporté par model_loader.export_onnx.
+    """
+    
+    def __init__(self, onnx_path: Path, model_config, num_threads: Optional[int] = None):
+        """
+        Args:
+            onnx_path: Chemin du modèle .onnx
+            model_config: Wav2Vec2Config du modèle exporté
+            num_threads: Nombre de threads intra-op ONNX Runtime (None = défaut)
+        """
+        try:
+            import onnxruntime as ort
+        except ImportError as e:
+            raise ImportError("Backend ONNX : installez onnxruntime (pip install onnxruntime)") from e
+        
+        options = ort.SessionOptions()
+        if num_threads:
+            options.intra_op_num_threads = num_threads
+        
+        self.session = ort.InferenceSession(str(onnx_path), options, providers=["CPUExecutionProvider"])
+        self.input_names = {i.name for i in self.session.get_inputs()}
+        self.config = model_config
+        self.dtype = torch.float32
+    
+    def __call__(self, input_values: torch.Tensor, attention_mask: Optional[torch.Tensor] = None):
+        feeds = {"input_values": input_values.detach().cpu().numpy()}
+        if attention_mask is not None and "attention_mask" in self.input_names:
+            feeds["attention_mask"] = attention_mask.detach().cpu().numpy().astype(np.int64)
+        logits = self.session.run(["logits"], feeds)[0]
+        return SimpleNamespace(logits=torch.from_numpy(logits))
+    
+    def _get_feat_extract_output_lengths(self, input_lengths: torch.Tensor) -> torch.Tensor:
+        """Nombre de frames en sortie des convolutions (même calcul que Wav2Vec2ForCTC)"""
+        for kernel, stride in zip(self.config.conv_kernel, self.config.conv_stride):
+            input_lengths = torch.div(input_lengths - kernel, stride, rounding_mode="floor") + 1
+        return input_lengths
+
+class LogitsCache:
+    """
+    Cache disque des logits acoustiques (un fichier .npy par audio)
+    
+    La clé combine le hash du contenu audio, le modèle, la fréquence
+    d'échantillonnage et la précision de stockage : un fichier modifié ou un
+    autre modèle invalident l'entrée. Les entrées sont relues en mémoire
+    mappée ; au-delà de max_bytes, les moins récemment utilisées sont
+    supprimées (LRU via mtime).
+    
+    Les logits sont stockés en float32 (relus à l'identique). En float16
+    (config.LOGITS_CACHE_FLOAT16), put renvoie les logits arrondis : les
+    décoder au premier calcul comme à la relecture donne les mêmes
+    transcriptions, cache froid ou chaud.
+    """
+    
+    def __init__(
+        self,
+        cache_dir: Optional[Path] = None,
+        max_bytes: Optional[int] = None,
+        model_id: Optional[str] = None,
+        sample_rate: Optional[int] = None,
+        float16: Optional[bool] = None
+    ):
+        """
+        Args:
+            cache_dir: Dossier du cache (défaut: config.LOGITS_CACHE_DIR)
+            max_bytes: Taille max du cache sur disque en octets (défaut: config.LOGITS_CACHE_MAX_BYTES)
+            model_id: Identifiant du modèle acoustique (fait partie de la clé) ;
+                par défaut config.MODEL_NAME|config.BACKEND, suffixé de |int8 si
+                config.USE_INT8 et de |padded si config.PAD_UNMASKED_BATCHES (les
+                logits ONNX et PyTorch, exacts et paddés ne sont pas partagés)
+            sample_rate: Fréquence d'échantillonnage, fait partie de la clé (défaut: config.SAMPLE_RATE)
+            float16: Stockage en float16 (défaut: config.LOGITS_CACHE_FLOAT16)
+        """
+        cache_dir = config.LOGITS_CACHE_DIR if cache_dir is None else cache_dir
+        max_bytes = config.LOGITS_CACHE_MAX_BYTES if max_bytes is None else max_bytes
+        sample_rate = config.SAMPLE_RATE if sample_rate is None else sample_rate
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        if model_id is None:
+            model_id = f"{config.MODEL_NAME}|{config.BACKEND}" + ("|int8" if config.USE_INT8 else "")
+            if config.PAD_UNMASKED_BATCHES:
+                model_id += "|padded"  # Logits dépendants du batch (voir compute_logits_batch)
+        self.model_id = model_id
+        self.sample_rate = sample_rate
+        self.dtype = np.float16 if (config.LOGITS_CACHE_FLOAT16 if float16 is None else float16) else np.float32
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._size = sum(f.stat().st_size for f in self.cache_dir.glob("*.npy"))
+        logger.info(f"Cache de logits: {self.cache_dir} ({self._size / 1e6:.1f} Mo)")
+    
+    def key(self, wav_path: Path, samples: Optional[np.ndarray] = None) -> str:
+        """
+        Clé de cache : hash du contenu audio + modèle + fréquence
+        
+        Si samples est fourni (signal déjà décodé, ex. corpus empaqueté),
+        c'est lui qui est hashé au lieu des octets du fichier.
+        """
+        if samples is not None:
+            h = hashlib.sha1(np.ascontiguousarray(samples).view(np.uint8))
+        else:
+            h = hashlib.sha1(Path(wav_path).read_bytes())
+        h.update(f"|{self.model_id}|{self.sample_rate}|{np.dtype(self.dtype).name}".encode())
+        return h.hexdigest()
+    
+    def _path(self, key: str) -> Path:
+        return self.cache_dir / f"{key}.npy"
+    
+    def get(self, key: str) -> Optional[np.ndarray]:
+        """Retourne les logits [frames, vocab] en float32, ou None si absents"""
+        path = self._path(key)
+        try:
+            logits = np.load(path, mmap_mode='r')
+            os.utime(path)  # Marque l'entrée comme récemment utilisée
+            logits = logits.astype(np.float32)
+        except (FileNotFoundError, ValueError, OSError):
+            with self._lock:
+                self.misses += 1
+            return None
+        with self._lock:
+            self.hits += 1
+        return logits
+    
+    def put(self, key: str, logits: np.ndarray) -> np.ndarray:
+        """
+        Enregistre des logits (écriture atomique) puis applique l'éviction LRU
+        
+        Returns:
+            Les logits tels que get les relira (float32, arrondis si le cache
+            est en float16) : à décoder à la place des logits calculés
+        """
+        stored = np.asarray(logits).astype(self.dtype)
+        path = self._path(key)
+        tmp_path = path.with_suffix(f".{threading.get_ident()}.tmp")
+        with open(tmp_path, 'wb') as f:
+            np.save(f, stored)
+        
+        with self._lock:
+            # Entrée remplacée : sa taille ne compte plus
+            try:
+                self._size -= path.stat().st_size
+            except FileNotFoundError:
+                pass
+            os.replace(tmp_path, path)
+            self._size += path.stat().st_size
+            if self._size > self.max_bytes:
+                self._evict()
+        
+        return stored.astype(np.float32)
+    
+    def _evict(self):
+        """Supprime les entrées les plus anciennes jusqu'à repasser sous max_bytes"""
+        entries = sorted(
+            ((f.stat().st_mtime, f.stat().st_size, f) for f in self.cache_dir.glob("*.npy")),
+            key=lambda e: e[0]
+        )
+        self._size = sum(size for _, size, _ in entries)
+        for _, size, f in entries:
+            if self._size <= self.max_bytes:
+                break
+            f.unlink(missing_ok=True)
+            self._size -= size
+    
+    def log_stats(self):
+        """Affiche le taux de succès du cache"""
+        total = self.hits + self.misses
+        rate = self.hits / total * 100 if total else 0.0
+        logger.info(f"Cache de logits: {self.hits}/{total} hits ({rate:.1f}%), {self._size / 1e6:.1f} Mo")
+
+def transcribe_greedy(
+    wav_path: Path,
+    processor,
+    model,
+    device=None
+) -> str:
+    """
+    Transcription greedy (sans modèle de langage)
+    
+    Args:
+        wav_path: Chemin vers le fichier WAV
+        processor: Wav2Vec2Processor
+        model: Wav2Vec2ForCTC
+        device: Device (cuda/cpu)
+        
+    Returns:
+        Texte transcrit nettoyé
+    """
+    logits = compute_logits(wav_path, processor, model, device)
+    return decode_logits(logits, processor)
 
-@torch.no_grad()
 def transcribe_with_lm(
     wav_path: Path,
     processor,
     model,
     decoder,
-    device=config.DEVICE
+    device=None
 ) -> str:
     """
     Transcription avec modèle de langage (beam search)
@@ -62,62 +557,69 @@ def transcribe_with_lm(
     Returns:
         Texte transcrit nettoyé
     """
-    waveform, sr = audio_utils.load_audio(wav_path, config.SAMPLE_RATE)
-    
-    inputs = processor(
-        waveform.squeeze().numpy(),
-        sampling_rate=config.SAMPLE_RATE,
-        return_tensors="pt",
-        padding=True
-    )
-    
-    logits = model(inputs.input_values.to(device)).logits
-    logits_np = logits[0].cpu().numpy()
-    
-    text = decoder.decode(logits_np)
-    return audio_utils.clean_text(text)
+    logits = compute_logits(wav_path, processor, model, device)
+    return decode_logits(logits, processor, decoder)
 
 def batch_transcribe(
     wav_files: List[Path],
     processor,
     model,
     decoder=None,
-    use_lm: bool = False
+    use_lm: bool = False,
+    batch_size: Optional[int] = None,
+    references: Optional[Dict[Path, Optional[str]]] = None
 ) -> Tuple[List[str], List[str]]:
     """
     Transcription batch avec progress bar et logs
     
+    Les fichiers sont traités par mini-batches paddés via pipeline.run_pipeline
+    (lecture, passe du modèle et décodage recouverts) ; si un batch échoue
+    (fichier corrompu...), ses fichiers sont repris un par un pour isoler
+    l'erreur.
+    
     Args:
         wav_files: Liste des fichiers WAV
         processor: Wav2Vec2Processor
         model: Wav2Vec2ForCTC
         decoder: CTC decoder (optionnel)
         use_lm: Utiliser le modèle de langage
+        batch_size: Nombre de fichiers par passe du modèle (défaut: config.BATCH_SIZE)
+        references: Références par chemin (manifeste) ; sinon lues dans les .txt
         
     Returns:
         (references, hypotheses) - listes des transcriptions
     """
+    batch_size = config.BATCH_SIZE if batch_size is None else batch_size
+    # Import local : pipeline dépend de ce module
+    import pipeline
+    
+    known_refs = references
     references = []
     hypotheses = []
     
     mode = "avec LM" if use_lm else "greedy"
-    logger.info(f"Début transcription de {len(wav_files)} fichiers ({mode})")
+    logger.info(f"Début transcription de {len(wav_files)} fichiers ({mode}, batch={batch_size})")
     
+    decoders = {"hyp": decoder if use_lm else None}
+    batches = list(iter_batches(wav_files, batch_size))
     errors = 0
     
-    for wav_path in tqdm(wav_files, desc=f"Transcription {mode}"):
+    transcriptions = pipeline.run_pipeline(batches, processor, model, decoders)
+    for wav_path, hyps, error in tqdm(transcriptions, total=len(wav_files), desc=f"Transcription {mode}"):
         try:
-            # Charger la référence
-            ref = audio_utils.load_reference(wav_path)
+            if error is not None:
+                raise error
             
-            # Transcrire
-            if use_lm and decoder:
-                hyp = transcribe_with_lm(wav_path, processor, model, decoder)
+            # Charger la référence
+            if known_refs is not None and wav_path in known_refs:
+                ref = known_refs[wav_path]
+                if ref is None:
+                    raise FileNotFoundError(f"Transcription introuvable pour {wav_path.name}")
             else:
-                hyp = transcribe_greedy(wav_path, processor, model)
+                ref = audio_utils.load_reference(wav_path)
             
             references.append(ref)
-            hypotheses.append(hyp)
+            hypotheses.append(hyps["hyp"])
             
         except Exception as e:
             logger.error(f"Erreur sur {wav_path.name}: {e}")
@@ -0,0 +1,259 @@
+"""
+Instrumentation du pipeline : temps par étape, compteurs, profilage échantillonné
+
+Désactivée par défaut : stage() renvoie alors un contexte vide partagé et
+count() retourne immédiatement, le coût se limite à un test de booléen.
+Activée par enable() (option --instrument des points d'entrée) ou par
+ASR_INSTRUMENT=1, chaque étape alimente un histogramme (p50 / p95 / p99)
+exportable en JSON ou au format texte Prometheus.
+
+Usage:
+    with instrumentation.stage("model.forward"):
+        logits = model(...)
+    instrumentation.count("files")
+"""
+import contextlib
+import json
+import math
+import random
+import threading
+import time
+from pathlib import Path
+from typing import Callable, List
+from loguru import logger
+import config
+
+# Bornes des histogrammes (secondes) : progression géométrique de 10 µs à ~1000 s
+BUCKETS = tuple(1e-5 * 2 ** (i / 4) for i in range(4 * 27))
+
+_enabled = config.INSTRUMENT
+_lock = threading.Lock()
+_histograms = {}
+_counters = {}
+_NULL = contextlib.nullcontext()
+
+class Histogram:
+    """Histogramme de durées à seaux fixes (percentiles approchés par interpolation)"""
+
+    def __init__(self):
+        self.buckets = [0] * (len(BUCKETS) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.min = math.inf
+        self.max = 0.0
+
+    def observe(self, seconds: float):
+        # Recherche dichotomique du premier seau dont la borne >= seconds
+        lo, hi = 0, len(BUCKETS)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if BUCKETS[mid] < seconds:
+                lo = mid + 1
+            else:
+                hi = mid
+        self.buckets[lo] += 1
+        self.count += 1
+        self.sum += seconds
+        self.min = min(self.min, seconds)
+        self.max = max(self.max, seconds)
+
+    def percentile(self, q: float) -> float:
+        """Percentile q (0-100) en secondes, borné par le min et le max observés"""
+        if self.count == 0:
+            return 0.0
+        rank = q / 100 * self.count
+        seen = 0
+        for i, n in enumerate(self.buckets):
+            if n and seen + n >= rank:
+                low = BUCKETS[i - 1] if i > 0 else 0.0
+                high = BUCKETS[i] if i < len(BUCKETS) else self.max
+                value = low + (high - low) * (rank - seen) / n
+                return min(max(value, self.min), self.max)
+            seen += n
+        return self.max
+
+class _Timer:
+    __slots__ = ("name", "start")
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        observe(self.name, time.perf_counter() - self.start)
+        return False
+
+def enable():
+    """Active la collecte (à appeler par le point d'entrée)"""
+    global _enabled
+    _enabled = True
+
+def disable():
+    global _enabled
+    _enabled = False
+
+def is_enabled() -> bool:
+    return _enabled
+
+def reset():
+    """Efface histogrammes et compteurs"""
+    with _lock:
+        _histograms.clear()
+        _counters.clear()
+
+def stage(name: str):
+    """Contexte chronométrant une étape (contexte vide si désactivé)"""
+    if not _enabled:
+        return _NULL
+    return _Timer(name)
+
+def observe(name: str, seconds: float):
+    """Ajoute une durée mesurée ailleurs à l'histogramme de l'étape name"""
+    if not _enabled:
+        return
+    with _lock:
+        histogram = _histograms.get(name)
+        if histogram is None:
+            histogram = _histograms[name] = Histogram()
+        histogram.observe(seconds)
+
+def count(name: str, n: int = 1):
+    """Incrémente un compteur (fichiers, batches, erreurs, échantillons...)"""
+    if not _enabled:
+        return
+    with _lock:
+        _counters[name] = _counters.get(name, 0) + n
+
+def snapshot() -> dict:
+    """
+    État courant des mesures
+
+    Returns:
+        {'stages': {nom: {count, total_s, mean_ms, p50_ms, p95_ms, p99_ms, max_ms}},
+         'counters': {nom: valeur}}
+    """
+    with _lock:
+        stages = {
+            name: {
+                'count': h.count,
+                'total_s': h.sum,
+                'mean_ms': h.sum / h.count * 1000 if h.count else 0.0,
+                'p50_ms': h.percentile(50) * 1000,
+                'p95_ms': h.percentile(95) * 1000,
+                'p99_ms': h.percentile(99) * 1000,
+                'max_ms': h.max * 1000,
+            }
+            for name, h in sorted(_histograms.items())
+        }
+        return {'stages': stages, 'counters': dict(sorted(_counters.items()))}
+
+def to_prometheus(prefix: str = "asr") -> str:
+    """Mesures au format texte d'exposition Prometheus"""
+    lines = [
+        f"# HELP {prefix}_stage_duration_seconds Durée des étapes du pipeline",
+        f"# TYPE {prefix}_stage_duration_seconds histogram",
+    ]
+    with _lock:
+        for name, h in sorted(_histograms.items()):
+            cumulative = 0
+            for bound, n in zip(BUCKETS, h.buckets):
+                cumulative += n
+                if n:  # Seaux vides omis (les seaux restent cumulatifs)
+                    lines.append(f'{prefix}_stage_duration_seconds_bucket{{stage="{name}",le="{bound:.6g}"}} {cumulative}')
+            lines.append(f'{prefix}_stage_duration_seconds_bucket{{stage="{name}",le="+Inf"}} {h.count}')
+            lines.append(f'{prefix}_stage_duration_seconds_sum{{stage="{name}"}} {h.sum:.6f}')
+            lines.append(f'{prefix}_stage_duration_seconds_count{{stage="{name}"}} {h.count}')
+        for name, value in sorted(_counters.items()):
+            metric = f"{prefix}_{name.replace('.', '_')}_total"
+            lines.append(f"# TYPE {metric} counter")
+            lines.append(f"{metric} {value}")
+    return "\n".join(lines) + "\n"
+
+def export(path: Path):
+    """Écrit les mesures : format Prometheus si path finit par .prom, JSON sinon"""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    if path.suffix == ".prom":
+        path.write_text(to_prometheus(), encoding='utf-8')
+    else:
+        path.write_text(json.dumps(snapshot(), indent=2, ensure_ascii=False), encoding='utf-8')
+    logger.info(f"Mesures d'instrumentation : {path}")
+
+def log_summary():
+    """Tableau des étapes (temps total, p50 / p95 / p99) dans le journal"""
+    snap = snapshot()
+    if not snap['stages'] and not snap['counters']:
+        return
+    logger.info("Instrumentation (ms) :")
+    for name, s in snap['stages'].items():
+        logger.info(
+            f"  {name:<22} n={s['count']:>6} | total {s['total_s']:>8.2f}s | "
+            f"p50 {s['p50_ms']:>8.2f} | p95 {s['p95_ms']:>8.2f} | p99 {s['p99_ms']:>8.2f}"
+        )
+    for name, value in snap['counters'].items():
+        logger.info(f"  {name:<22} {value}")
+
+def report(path: Path):
+    """Fin de run : résumé dans le journal et export des mesures (si activée)"""
+    if not _enabled:
+        return
+    log_summary()
+    export(path)
+
+def profile_files(
+    wav_files: List[Path],
+    fn: Callable[[Path], object],
+    num_files: int,
+    output_dir: Path,
+    profiler: str = "cprofile",
+    seed: int = 0
+) -> List[Path]:
+    """
+    Profile fn sur num_files fichiers tirés au hasard (une passe séquentielle)
+
+    Le pipeline répartit les étapes sur plusieurs threads, qu'un profileur
+    attaché au thread principal ne verrait pas : les fichiers échantillonnés
+    sont donc retraités un par un, de bout en bout, dans le thread courant.
+
+    Args:
+        wav_files: Fichiers candidats
+        fn: Traitement complet d'un fichier (ex. inference.transcribe_multi)
+        num_files: Nombre de fichiers profilés
+        output_dir: Dossier des profils
+        profiler: "cprofile" (.prof, lisible par pstats / snakeviz) ou
+            "torch" (trace Chrome .json de torch.profiler)
+        seed: Seed du tirage
+
+    Returns:
+        Chemins des profils écrits
+    """
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    sample = random.Random(seed).sample(list(wav_files), min(num_files, len(wav_files)))
+
+    outputs = []
+    for wav_path in sample:
+        stem = Path(wav_path).stem
+        if profiler == "torch":
+            from torch.profiler import ProfilerActivity, profile
+
+            with profile(activities=[ProfilerActivity.CPU], record_shapes=True) as prof:
+                fn(wav_path)
+            out = output_dir / f"{stem}.trace.json"
+            prof.export_chrome_trace(str(out))
+        elif profiler == "cprofile":
+            import cProfile
+
+            prof = cProfile.Profile()
+            prof.runcall(fn, wav_path)
+            out = output_dir / f"{stem}.prof"
+            prof.dump_stats(out)
+        else:
+            raise ValueError(f"Profileur inconnu: {profiler} (cprofile ou torch)")
+        outputs.append(out)
+
+    logger.info(f"{len(outputs)} profils ({profiler}) écrits dans {output_dir}")
+    return outputs
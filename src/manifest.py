@@ -0,0 +1,249 @@
+"""Manifeste du corpus (JSONL) : inventaire des WAV, métadonnées et références"""
+import fnmatch
+import hashlib
+import json
+import math
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+from loguru import logger
+import audio_utils
+import config
+
+def manifest_path(corpus_root: Path) -> Path:
+    """Emplacement par défaut du manifeste d'un corpus (un fichier par racine)"""
+    corpus_root = Path(corpus_root).resolve()
+    digest = hashlib.sha1(str(corpus_root).encode()).hexdigest()[:8]
+    return config.MANIFEST_DIR / f"{corpus_root.name}-{digest}.jsonl"
+
+def _scan_dir(path: str) -> Tuple[List[str], Dict[str, Tuple[int, int]], Dict[str, int]]:
+    """
+    Liste un dossier avec os.scandir
+
+    Returns:
+        (sous-dossiers, {nom wav: (taille, mtime_ns)}, {nom txt: mtime_ns})
+    """
+    subdirs, wavs, txts = [], {}, {}
+    try:
+        with os.scandir(path) as it:
+            for entry in it:
+                if entry.is_dir(follow_symlinks=True):
+                    subdirs.append(entry.path)
+                elif entry.name.endswith('.wav'):
+                    st = entry.stat()
+                    wavs[entry.name] = (st.st_size, st.st_mtime_ns)
+                elif entry.name.endswith('.txt'):
+                    txts[entry.name] = entry.stat().st_mtime_ns
+    except OSError as e:
+        logger.error(f"Dossier illisible {path}: {e}")
+    return subdirs, wavs, txts
+
+def scan_corpus(corpus_root: Path, num_workers: Optional[int] = None) -> Dict[str, Tuple[int, int, Optional[int]]]:
+    """
+    Parcourt le corpus en parallèle (un niveau de l'arborescence à la fois)
+
+    Chaque dossier n'est listé qu'une fois ; sur un système de fichiers
+    réseau, les listings d'un même niveau sont lancés en parallèle.
+
+    Returns:
+        {chemin relatif posix: (taille, mtime_ns du wav, mtime_ns du txt ou None)}
+    """
+    num_workers = config.SCAN_WORKERS if num_workers is None else num_workers
+    corpus_root = Path(corpus_root)
+    files = {}
+    level = [str(corpus_root)]
+    with ThreadPoolExecutor(max_workers=num_workers) as pool:
+        while level:
+            next_level = []
+            for dir_path, (subdirs, wavs, txts) in zip(level, pool.map(_scan_dir, level)):
+                rel_dir = Path(dir_path).relative_to(corpus_root)
+                for name, (size, mtime_ns) in wavs.items():
+                    txt_mtime_ns = txts.get(name[:-len('.wav')] + '.txt')
+                    files[(rel_dir / name).as_posix()] = (size, mtime_ns, txt_mtime_ns)
+                next_level.extend(subdirs)
+            level = next_level
+    return files
+
+def _describe(corpus_root: Path, rel_path: str, stat: Tuple[int, int, Optional[int]]) -> dict:
+    """Entrée de manifeste : en-tête audio, métadonnées du chemin et référence"""
+    wav_path = Path(corpus_root) / rel_path
+    size, mtime_ns, txt_mtime_ns = stat
+    snr, speaker, length = audio_utils.parse_metadata(wav_path)
+    entry = {
+        'path': rel_path,
+        'filename': wav_path.name,
+        'size': size,
+        'mtime_ns': mtime_ns,
+        'txt_mtime_ns': txt_mtime_ns,
+        'sample_rate': None,
+        'num_frames': None,
+        'snr': snr,
+        'speaker': speaker,
+        'length': length,
+        'reference': None
+    }
+    try:
+        info = audio_utils.get_audio_info(wav_path)
+        entry['sample_rate'] = info['sample_rate']
+        entry['num_frames'] = info['num_frames']
+    except Exception as e:
+        logger.error(f"En-tête illisible {wav_path.name}: {e}")
+    if txt_mtime_ns is not None:
+        entry['reference'] = audio_utils.clean_text(wav_path.with_suffix('.txt').read_text(encoding='utf-8'))
+    return entry
+
+def load_manifest(path: Path) -> Dict[str, dict]:
+    """Relit un manifeste JSONL ({chemin relatif: entrée}) ; vide s'il n'existe pas"""
+    entries = {}
+    path = Path(path)
+    if not path.exists():
+        return entries
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                entry = json.loads(line)
+            except json.JSONDecodeError:
+                # Ligne tronquée (écriture interrompue) : sera recalculée
+                continue
+            entries[entry['path']] = entry
+    return entries
+
+def _write_manifest(entries: List[dict], path: Path):
+    """Écriture atomique (fichier temporaire puis renommage)"""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix('.tmp')
+    with open(tmp, 'w', encoding='utf-8') as f:
+        for entry in entries:
+            f.write(json.dumps(entry, ensure_ascii=False) + '\n')
+    os.replace(tmp, path)
+
+def build_manifest(
+    corpus_root: Path,
+    path: Optional[Path] = None,
+    num_workers: Optional[int] = None,
+    refresh: bool = True
+) -> List[dict]:
+    """
+    Construit ou met à jour le manifeste d'un corpus
+
+    Le manifeste existant est réutilisé : seuls les fichiers nouveaux ou
+    dont la taille / le mtime (wav ou txt) ont changé sont relus (en-tête
+    audio + référence) ; les fichiers disparus sont retirés.
+
+    Args:
+        corpus_root: Racine du corpus
+        path: Fichier manifeste (défaut: manifest_path(corpus_root))
+        num_workers: Threads de parcours et de lecture des en-têtes (défaut: config.SCAN_WORKERS)
+        refresh: Si False et que le manifeste existe, il est relu tel quel
+
+    Returns:
+        Entrées triées par chemin relatif
+    """
+    num_workers = config.SCAN_WORKERS if num_workers is None else num_workers
+    corpus_root = Path(corpus_root)
+    path = Path(path) if path is not None else manifest_path(corpus_root)
+
+    previous = load_manifest(path)
+    if previous and not refresh:
+        logger.info(f"Manifeste: {len(previous)} fichiers ({path})")
+        return [previous[k] for k in sorted(previous)]
+
+    start = time.perf_counter()
+    files = scan_corpus(corpus_root, num_workers)
+
+    entries = {}
+    stale = []
+    for rel_path, stat in files.items():
+        old = previous.get(rel_path)
+        if old is not None and (old['size'], old['mtime_ns'], old['txt_mtime_ns']) == stat:
+            entries[rel_path] = old
+        else:
+            stale.append(rel_path)
+
+    with ThreadPoolExecutor(max_workers=num_workers) as pool:
+        for entry in pool.map(lambda rel_path: _describe(corpus_root, rel_path, files[rel_path]), stale):
+            entries[entry['path']] = entry
+
+    removed = len(set(previous) - set(files))
+    result = [entries[k] for k in sorted(entries)]
+    if stale or removed or not path.exists():
+        _write_manifest(result, path)
+
+    logger.info(
+        f"Manifeste: {len(result)} fichiers ({len(stale)} mis à jour, {removed} retirés) "
+        f"en {time.perf_counter() - start:.2f}s -> {path}"
+    )
+    return result
+
+def _match_parts(parts: Tuple[str, ...], pattern_parts: Tuple[str, ...]) -> bool:
+    """Correspondance segment par segment ("**" = zéro ou plusieurs dossiers)"""
+    if not pattern_parts:
+        return not parts
+    head, rest = pattern_parts[0], pattern_parts[1:]
+    if head == "**":
+        return any(_match_parts(parts[i:], rest) for i in range(len(parts) + 1))
+    return bool(parts) and fnmatch.fnmatchcase(parts[0], head) and _match_parts(parts[1:], rest)
+
+def glob_match(rel_path: str, pattern: str) -> bool:
+    """
+    Chemin relatif (posix) sélectionné par un pattern, comme Path.glob
+
+    "*", "?" et "[...]" ne franchissent pas les "/" ; "**" couvre zéro ou
+    plusieurs dossiers (donc aussi la racine pour "**/*.wav"). Un "**" final
+    ne désigne que des dossiers : aucun fichier ne correspond.
+    """
+    pattern_parts = tuple(p for p in pattern.split("/") if p)
+    if pattern_parts and pattern_parts[-1] == "**":
+        return False
+    return _match_parts(tuple(rel_path.split("/")), pattern_parts)
+
+def select(entries: List[dict], pattern: str = "**/*.wav") -> List[dict]:
+    """Filtre les entrées avec un pattern glob relatif à la racine du corpus (mêmes fichiers que Path.glob)"""
+    return [e for e in entries if glob_match(e['path'], pattern)]
+
+def shard_index(rel_path: str, num_shards: int) -> int:
+    """Shard d'un fichier : hash stable (sha1) de son chemin relatif, identique sur toutes les machines"""
+    digest = hashlib.sha1(rel_path.encode('utf-8')).hexdigest()
+    return int(digest[:16], 16) % num_shards
+
+def shard(entries: List[dict], index: int, num_shards: int) -> List[dict]:
+    """
+    Entrées attribuées au shard index (0 <= index < num_shards)
+
+    L'attribution ne dépend que du chemin relatif : elle ne change pas avec
+    l'ordre du parcours ni avec l'ajout d'autres fichiers au corpus.
+    """
+    if not 0 <= index < num_shards:
+        raise ValueError(f"Shard {index} invalide pour {num_shards} shards")
+    return [e for e in entries if shard_index(e['path'], num_shards) == index]
+
+def wav_paths(entries: List[dict], corpus_root: Path) -> List[Path]:
+    """Chemins absolus des fichiers du manifeste"""
+    return [Path(corpus_root) / e['path'] for e in entries]
+
+def num_samples(entries: List[dict], corpus_root: Path, target_sr: Optional[int] = None) -> Dict[Path, int]:
+    """
+    Longueurs après ré-échantillonnage (équivalent de scheduler.get_num_samples
+    sans relire les en-têtes) ; les fichiers illisibles sont absents
+    """
+    target_sr = config.SAMPLE_RATE if target_sr is None else target_sr
+    return {
+        Path(corpus_root) / e['path']: math.ceil(e['num_frames'] * target_sr / e['sample_rate'])
+        for e in entries
+        if e['num_frames'] is not None
+    }
+
+def references(entries: List[dict], corpus_root: Path) -> Dict[Path, Optional[str]]:
+    """Références nettoyées par chemin (None si le .txt est absent)"""
+    return {Path(corpus_root) / e['path']: e['reference'] for e in entries}
+
+if __name__ == "__main__":
+    import sys
+
+    root = Path(sys.argv[1]) if len(sys.argv) > 1 else config.CORPUS_DIR
+    build_manifest(root)
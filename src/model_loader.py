@@ -1,30 +1,401 @@
 """Chargement des modèles et décodeurs"""
 import torch
-from transformers import Wav2Vec2ForCTC, Wav2Vec2Processor
-from pyctcdecode import build_ctcdecoder
+import numpy as np
 import config
+config.configure_hf_cache()  # Avant l'import de transformers
+from transformers import Wav2Vec2Config, Wav2Vec2ForCTC, Wav2Vec2Processor
+import kenlm
+from pyctcdecode import Alphabet, BeamSearchDecoderCTC, LanguageModel, build_ctcdecoder
+from pyctcdecode.language_model import load_unigram_set_from_arpa
 from loguru import logger
+from pathlib import Path
+import hashlib
+import json
 import os
+import shutil
+import subprocess
+import time
 
-def load_model():
-    """Charge le modèle acoustique et le processeur"""
-    logger.info(f"Chargement du modèle {config.MODEL_NAME}...")
+# Précisions supportées par optimize_for_inference
+PRECISIONS = config.PRECISIONS
+
+def load_wav2vec2_model(model_name: str = None, device=None):
+    """
+    Charge le modèle acoustique et le processeur
+    
+    Args:
+        model_name: Nom ou chemin du modèle (défaut: config.MODEL_NAME)
+        device: Device cible (défaut: config.DEVICE)
+        
+    Returns:
+        (processor, model) avec le modèle en mode évaluation
+    """
+    model_name = model_name or config.MODEL_NAME
+    device = device or config.DEVICE
+    logger.info(f"Chargement du modèle {model_name}...")
     try:
-        processor = Wav2Vec2Processor.from_pretrained(config.MODEL_NAME)
-        model = Wav2Vec2ForCTC.from_pretrained(config.MODEL_NAME).to(config.DEVICE)
+        processor = Wav2Vec2Processor.from_pretrained(model_name)
+        model = Wav2Vec2ForCTC.from_pretrained(model_name).to(device)
         model.eval() # Mode évaluation important
         return processor, model
     except Exception as e:
         logger.error(f"Erreur chargement modèle: {e}")
         raise
 
-def load_decoder(processor, lm_path=None):
+def use_cpu_device(backend: str):
+    """
+    Impose config.DEVICE = cpu pour un backend CPU uniquement (int8, ONNX)
+    
+    Les appels sans device explicite (pipeline, serveur, flux...) envoient
+    les entrées sur config.DEVICE : sur une machine CUDA, le modèle CPU
+    recevrait sinon des tenseurs GPU.
+    """
+    if config.DEVICE.type != "cpu":
+        logger.info(f"Backend {backend} (CPU uniquement) : device {config.DEVICE} remplacé par cpu")
+        config.override(device="cpu")
+
+def load_model():
+    """Charge le modèle acoustique et le processeur (ONNX si config.BACKEND == "onnx", int8 si config.USE_INT8)"""
+    if config.BACKEND == "onnx":
+        return load_onnx_model()
+    if config.USE_INT8:
+        return load_quantized_model()
+    return load_wav2vec2_model()
+
+def quantize_model(model):
+    """
+    Quantification dynamique int8 des couches linéaires (CPU)
+    
+    Les poids des nn.Linear (projections d'attention, feed-forward, tête CTC)
+    passent en int8 ; les activations sont quantifiées à la volée. Les
+    convolutions de l'extracteur de features restent en fp32.
+    """
+    return torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+
+def quantized_checkpoint_path(model_name: str = None) -> Path:
+    """Chemin du checkpoint int8 associé à un modèle"""
+    model_name = model_name or config.MODEL_NAME
+    return config.MODELS_DIR / f"{model_name.strip('/').replace('/', '__')}-int8.pt"
+
+def _replace_linear_with_quantized(module):
+    """Remplace les nn.Linear par des couches int8 dynamiques vides (à remplir par load_state_dict)"""
+    for name, child in module.named_children():
+        if type(child) is torch.nn.Linear:
+            setattr(module, name, torch.ao.nn.quantized.dynamic.Linear(
+                child.in_features, child.out_features, bias_=child.bias is not None, dtype=torch.qint8
+            ))
+        else:
+            _replace_linear_with_quantized(child)
+
+def load_quantized_model(model_name: str = None, checkpoint: Path = None):
+    """
+    Charge le modèle quantifié int8 (CPU), depuis le checkpoint s'il existe
+    
+    Au premier appel, le modèle fp32 est quantifié et son state_dict int8
+    sauvegardé. Les démarrages suivants construisent le squelette du modèle
+    avec des couches int8 vides et y chargent directement les poids
+    quantifiés, sans repasser par la quantification.
+    
+    Args:
+        model_name: Nom ou chemin du modèle (défaut: config.MODEL_NAME)
+        checkpoint: Chemin du checkpoint int8 (défaut: quantized_checkpoint_path)
+        
+    Returns:
+        (processor, model) quantifié, en mode évaluation sur CPU ;
+        config.DEVICE passe à cpu (voir use_cpu_device)
+    """
+    model_name = model_name or config.MODEL_NAME
+    checkpoint = Path(checkpoint) if checkpoint else quantized_checkpoint_path(model_name)
+    use_cpu_device("int8")
+    
+    if checkpoint.exists():
+        logger.info(f"Chargement du modèle int8 {checkpoint}...")
+        processor = Wav2Vec2Processor.from_pretrained(model_name)
+        model_config = Wav2Vec2Config.from_pretrained(model_name)
+        model = Wav2Vec2ForCTC(model_config)
+        _replace_linear_with_quantized(model)
+        model.load_state_dict(torch.load(checkpoint, map_location="cpu"))
+        return processor, optimize_for_inference(model)
+    
+    processor, model = load_wav2vec2_model(model_name, device=torch.device("cpu"))
+    model = optimize_for_inference(model, precision="int8")
+    
+    checkpoint.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = checkpoint.with_suffix(".tmp")
+    torch.save(model.state_dict(), tmp_path)
+    os.replace(tmp_path, checkpoint)
+    logger.info(f"Checkpoint int8 sauvegardé: {checkpoint}")
+    return processor, model
+
+class _LogitsOnly(torch.nn.Module):
+    """Enveloppe d'export : tenseurs en entrée, logits seuls en sortie"""
+    
+    def __init__(self, model, with_attention_mask: bool):
+        super().__init__()
+        self.model = model
+        self.with_attention_mask = with_attention_mask
+    
+    def forward(self, input_values, attention_mask=None):
+        if self.with_attention_mask:
+            return self.model(input_values, attention_mask=attention_mask).logits
+        return self.model(input_values).logits
+
+def onnx_model_path(model_name: str = None) -> Path:
+    """Chemin du modèle ONNX exporté associé à un modèle"""
+    model_name = model_name or config.MODEL_NAME
+    return config.MODELS_DIR / f"{model_name.strip('/').replace('/', '__')}.onnx"
+
+def export_onnx(model, processor, onnx_path: Path = None, opset: int = 17) -> Path:
+    """
+    Exporte Wav2Vec2ForCTC en ONNX (axes batch et temps dynamiques)
+    
+    Le masque d'attention n'est une entrée du graphe que si le processeur
+    le produit (return_attention_mask). La parité des logits avec PyTorch
+    est vérifiée juste après l'export (verify_onnx_parity).
+    
+    Args:
+        model: Wav2Vec2ForCTC (fp32)
+        processor: Le processeur Wav2Vec2
+        onnx_path: Chemin de sortie (défaut: onnx_model_path())
+        opset: Version d'opset ONNX
+        
+    Returns:
+        Chemin du modèle exporté
+    """
+    onnx_path = Path(onnx_path) if onnx_path else onnx_model_path()
+    onnx_path.parent.mkdir(parents=True, exist_ok=True)
+    
+    with_mask = bool(processor.feature_extractor.return_attention_mask)
+    wrapper = _LogitsOnly(model.float().cpu(), with_mask).eval()
+    
+    dummy = torch.randn(2, config.SAMPLE_RATE)
+    args = (dummy, torch.ones_like(dummy, dtype=torch.long)) if with_mask else (dummy,)
+    input_names = ["input_values", "attention_mask"] if with_mask else ["input_values"]
+    dynamic_axes = {name: {0: "batch", 1: "samples"} for name in input_names}
+    dynamic_axes["logits"] = {0: "batch", 1: "frames"}
+    
+    logger.info(f"Export ONNX vers {onnx_path}...")
+    with torch.no_grad():
+        torch.onnx.export(
+            wrapper, args, str(onnx_path),
+            input_names=input_names,
+            output_names=["logits"],
+            dynamic_axes=dynamic_axes,
+            opset_version=opset,
+            dynamo=False
+        )
+    
+    verify_onnx_parity(model, processor, onnx_path)
+    return onnx_path
+
+def verify_onnx_parity(model, processor, onnx_path: Path, atol: float = 1e-3, rtol: float = 1e-3):
+    """
+    Vérifie que les logits ONNX Runtime égalent ceux de PyTorch (à la tolérance près)
+    
+    Le contrôle porte sur un batch paddé de deux signaux de longueurs
+    différentes, avec des longueurs distinctes de celle de l'export.
+    
+    Raises:
+        AssertionError: si un écart dépasse la tolérance
+    """
+    # Import local : inference dépend (via decoding) de ce module
+    import inference
+    
+    rng = np.random.default_rng(0)
+    waveforms = [
+        rng.standard_normal(int(1.3 * config.SAMPLE_RATE)).astype(np.float32),
+        rng.standard_normal(int(0.7 * config.SAMPLE_RATE)).astype(np.float32)
+    ]
+    
+    onnx_model = inference.OnnxWav2Vec2(onnx_path, model.config)
+    expected = inference.compute_logits_batch(waveforms, processor, model.float().cpu(), torch.device("cpu"))
+    actual = inference.compute_logits_batch(waveforms, processor, onnx_model, torch.device("cpu"))
+    
+    for exp, act in zip(expected, actual):
+        np.testing.assert_allclose(act, exp, atol=atol, rtol=rtol, err_msg="Logits ONNX != PyTorch")
+    logger.info(f"Parité ONNX / PyTorch vérifiée (atol={atol}, rtol={rtol})")
+
+def load_onnx_model(model_name: str = None, onnx_path: Path = None, num_threads: int = None):
+    """
+    Charge le backend ONNX Runtime, en exportant le modèle au premier appel
+    
+    Args:
+        model_name: Nom ou chemin du modèle (défaut: config.MODEL_NAME)
+        onnx_path: Chemin du modèle .onnx (défaut: onnx_model_path(model_name))
+        num_threads: Nombre de threads intra-op ONNX Runtime
+        
+    Returns:
+        (processor, inference.OnnxWav2Vec2) ; config.DEVICE passe à cpu
+    """
+    import inference
+    
+    model_name = model_name or config.MODEL_NAME
+    onnx_path = Path(onnx_path) if onnx_path else onnx_model_path(model_name)
+    use_cpu_device("ONNX")
+    
+    if not onnx_path.exists():
+        processor, model = load_wav2vec2_model(model_name, device=torch.device("cpu"))
+        export_onnx(model, processor, onnx_path)
+        del model
+    else:
+        processor = Wav2Vec2Processor.from_pretrained(model_name)
+    
+    logger.info(f"Backend ONNX Runtime: {onnx_path}")
+    model_config = Wav2Vec2Config.from_pretrained(model_name)
+    return processor, inference.OnnxWav2Vec2(onnx_path, model_config, num_threads)
+
+def optimize_for_inference(model, precision: str = "fp32", num_threads: int = None):
+    """
+    Prépare le modèle pour l'inférence
+    
+    Args:
+        model: Wav2Vec2ForCTC
+        precision: "fp32", "fp16" / "bf16" (poids en demi-précision) ou
+            "int8" (quantification dynamique des couches linéaires, CPU)
+        num_threads: Nombre de threads intra-op PyTorch (None = défaut)
+        
+    Returns:
+        Le modèle optimisé (mode évaluation, sans gradients)
+    """
+    if precision not in PRECISIONS:
+        raise ValueError(f"Précision inconnue: {precision} (attendu: {', '.join(PRECISIONS)})")
+    
+    if num_threads:
+        torch.set_num_threads(num_threads)
+        logger.info(f"Threads PyTorch: {num_threads}")
+    
+    model.eval()
+    for param in model.parameters():
+        param.requires_grad_(False)
+    
+    device = next(model.parameters()).device
+    if precision == "fp16":
+        if device.type != "cuda":
+            logger.warning("fp16 non supporté efficacement sur CPU, passage en fp32")
+        else:
+            model = model.half()
+    elif precision == "bf16":
+        model = model.to(torch.bfloat16)
+    elif precision == "int8":
+        if device.type != "cpu":
+            logger.warning("Quantification int8 disponible sur CPU uniquement, passage en fp32")
+        else:
+            model = quantize_model(model)
+    
+    logger.info(f"Modèle prêt pour l'inférence (précision: {precision})")
+    return model
+
+def _sha256(path: Path, block_size: int = 1 << 20) -> str:
+    """Empreinte SHA-256 d'un fichier (lu par blocs)"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+def _lm_index_path() -> Path:
+    """Index {chemin|taille|mtime|quantification de l'ARPA: nom du binaire}"""
+    return config.LM_BINARY_DIR / "index.json"
+
+def _read_lm_index() -> dict:
+    """Index des binaires (vide s'il est absent ou illisible)"""
+    try:
+        return json.loads(_lm_index_path().read_text(encoding='utf-8'))
+    except (OSError, ValueError):
+        return {}
+
+def _record_lm_binary(key: str, binary_path: Path):
+    """Ajoute key -> binary_path à l'index (écriture atomique)"""
+    index = _read_lm_index()
+    index[key] = binary_path.name
+    path = _lm_index_path()
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    tmp.write_text(json.dumps(index, indent=1, sort_keys=True), encoding='utf-8')
+    os.replace(tmp, path)
+
+def _unigrams_path(binary_path: Path) -> Path:
+    """Liste des mots du LM, conservée à côté du binaire (absente du format binaire)"""
+    return Path(binary_path).with_suffix(".unigrams.txt")
+
+def convert_lm_to_binary(lm_path, quantize_bits: int = None) -> Path:
+    """
+    Convertit (une seule fois) un LM ARPA en binaire KenLM trie quantifié
+
+    Le binaire est mis en cache dans config.LM_BINARY_DIR sous un nom tiré
+    du SHA-256 de l'ARPA : un ARPA modifié est reconverti, un ARPA identique
+    (même copié ailleurs) réutilise le binaire. Un index (chemin, taille,
+    mtime) évite de re-hacher l'ARPA à chaque appel ; le hash n'est calculé
+    que si l'ARPA est inconnu de l'index ou a changé. Les mots du LM (unigrammes,
+    utilisés par pyctcdecode pour les mots partiels) sont extraits en même
+    temps, le format binaire ne permettant pas de les relire.
+
+    Args:
+        lm_path: Chemin vers le fichier .arpa (les autres formats sont renvoyés tels quels)
+        quantize_bits: Bits de quantification (défaut: config.KENLM_QUANTIZE_BITS, 0 = aucune)
+
+    Returns:
+        Chemin du binaire, ou l'ARPA si build_binary est indisponible ou échoue
+    """
+    lm_path = Path(lm_path)
+    if lm_path.suffix != ".arpa":
+        return lm_path
+    quantize_bits = config.KENLM_QUANTIZE_BITS if quantize_bits is None else quantize_bits
+
+    suffix = f"-q{quantize_bits}" if quantize_bits else ""
+    st = lm_path.stat()
+    key = f"{lm_path.resolve()}|{st.st_size}|{st.st_mtime_ns}|{suffix}"
+    name = _read_lm_index().get(key)
+    if name and (config.LM_BINARY_DIR / name).exists():
+        return config.LM_BINARY_DIR / name
+
+    binary_path = config.LM_BINARY_DIR / f"{lm_path.stem}-{_sha256(lm_path)[:16]}{suffix}.bin"
+    if binary_path.exists():
+        _record_lm_binary(key, binary_path)
+        return binary_path
+
+    build_binary = shutil.which(config.KENLM_BUILD_BINARY)
+    if build_binary is None:
+        logger.warning(f"{config.KENLM_BUILD_BINARY} (KenLM) introuvable : LM chargé depuis l'ARPA")
+        return lm_path
+
+    logger.info(f"Conversion de {lm_path.name} en binaire KenLM (une seule fois)...")
+    start = time.perf_counter()
+    binary_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = binary_path.with_name(binary_path.name + ".tmp")
+    cmd = [build_binary]
+    if quantize_bits:
+        cmd += ["-q", str(quantize_bits), "-b", str(quantize_bits)]
+    cmd += ["trie", str(lm_path), str(tmp)]
+    try:
+        subprocess.run(cmd, check=True, capture_output=True, text=True)
+    except (OSError, subprocess.CalledProcessError) as e:
+        logger.warning(f"Échec de build_binary ({getattr(e, 'stderr', None) or e}) : LM chargé depuis l'ARPA")
+        tmp.unlink(missing_ok=True)
+        return lm_path
+
+    # Unigrammes écrits avant le binaire : un binaire présent a toujours sa liste de mots
+    unigrams = sorted(load_unigram_set_from_arpa(str(lm_path)))
+    _unigrams_path(binary_path).write_text("\n".join(unigrams) + "\n", encoding='utf-8')
+    os.replace(tmp, binary_path)
+    _record_lm_binary(key, binary_path)
+
+    logger.info(
+        f"LM binaire : {binary_path} ({binary_path.stat().st_size / 1e6:.1f} Mo, "
+        f"ARPA {lm_path.stat().st_size / 1e6:.1f} Mo) en {time.perf_counter() - start:.1f}s"
+    )
+    return binary_path
+
+def load_decoder(processor, lm_path=None, alpha: float = 0.5, beta: float = 1.5):
     """
     Construit le décodeur CTC (avec ou sans Language Model)
     
     Args:
         processor: Le processeur Wav2Vec2
-        lm_path: Chemin vers le fichier .arpa ou .bin (KenLM)
+        lm_path: Chemin vers le fichier .arpa ou .bin (KenLM) ; un ARPA est
+            remplacé par son binaire (convert_lm_to_binary)
+        alpha: Poids du modèle de langage
+        beta: Bonus par mot inséré
     """
     vocab_dict = processor.tokenizer.get_vocab()
     sorted_vocab = sorted((v, k) for k, v in vocab_dict.items())
@@ -38,15 +409,64 @@ def load_decoder(processor, lm_path=None):
         if labels[i] in [processor.tokenizer.word_delimiter_token, '|']:
             labels[i] = " "
     
+    if lm_path:
+        lm_path = convert_lm_to_binary(lm_path)
     logger.info(f"Construction du décodeur (LM={lm_path if lm_path else 'None'})...")
+    start = time.perf_counter()
     
-    decoder = build_ctcdecoder(
-        labels=labels,
-        kenlm_model_path=str(lm_path) if lm_path else None,
-    )
+    if lm_path and Path(lm_path).suffix != ".arpa":
+        # Binaire KenLM projeté en mémoire (mmap paresseux) : les workers de
+        # décodage partagent les pages du cache système au lieu d'en avoir chacun une copie
+        kenlm_config = kenlm.Config()
+        kenlm_config.load_method = kenlm.LoadMethod.LAZY
+        kenlm_model = kenlm.Model(str(lm_path), kenlm_config)
+        unigrams_path = _unigrams_path(lm_path)
+        unigrams = unigrams_path.read_text(encoding='utf-8').split() if unigrams_path.exists() else None
+        decoder = BeamSearchDecoderCTC(
+            Alphabet.build_alphabet(labels),
+            LanguageModel(kenlm_model, unigrams, alpha=alpha, beta=beta)
+        )
+    else:
+        decoder = build_ctcdecoder(
+            labels=labels,
+            kenlm_model_path=str(lm_path) if lm_path else None,
+            alpha=alpha,
+            beta=beta,
+        )
     
+    if lm_path:
+        logger.info(f"Décodeur prêt en {time.perf_counter() - start:.2f}s ({Path(lm_path).name})")
     return decoder
 
+def load_language_model(lm_path=None, processor=None, num_workers: int = 1):
+    """
+    Charge le décodeur beam search avec modèle de langage
+    
+    Args:
+        lm_path: Chemin vers le fichier .arpa ou .bin (KenLM)
+        processor: Le processeur Wav2Vec2 (rechargé depuis config.MODEL_NAME si absent)
+        num_workers: Nombre de processus de décodage (> 1 : decoding.ParallelDecoder)
+        
+    Returns:
+        Le décodeur, ou None si le LM est introuvable ou illisible
+    """
+    if lm_path is None or not Path(lm_path).exists():
+        logger.error(f"Modèle de langage introuvable: {lm_path}")
+        return None
+    
+    if processor is None:
+        processor = Wav2Vec2Processor.from_pretrained(config.MODEL_NAME)
+    
+    try:
+        if num_workers > 1:
+            # Import local : decoding dépend de ce module
+            import decoding
+            return decoding.ParallelDecoder(processor, lm_path, num_workers)
+        return load_decoder(processor, lm_path)
+    except Exception as e:
+        logger.error(f"Erreur chargement LM: {e}")
+        return None
+
 if __name__ == "__main__":
     p, m = load_model()
     print("✅ Modèle chargé avec succès")
\ No newline at end of file
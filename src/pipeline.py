@@ -0,0 +1,319 @@
+"""Pipeline producteur/consommateur : lecture audio, passe du modèle et décodage en parallèle"""
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+from loguru import logger
+import audio_utils
+import config
+import inference
+import instrumentation
+
+# Marqueur de fin de flux entre deux étages
+_DONE = object()
+
+# Délai max (s) avant qu'un étage bloqué sur une file ne constate l'arrêt du pipeline
+_POLL_S = 0.1
+
+class StageStats:
+    """Temps actif / en attente d'un étage du pipeline"""
+    
+    def __init__(self, name: str):
+        self.name = name
+        self.busy = 0.0
+        self.idle = 0.0
+        self.items = 0
+    
+    def log(self):
+        total = self.busy + self.idle
+        ratio = self.busy / total * 100 if total > 0 else 0.0
+        logger.info(
+            f"{self.name:<10} {self.items:>6} batches | actif {self.busy:>8.2f}s | "
+            f"attente {self.idle:>8.2f}s | occupation {ratio:>5.1f}%"
+        )
+
+def _timed_get(q: queue.Queue, stats: StageStats, stop: threading.Event):
+    """Lit la file amont ; _DONE si le pipeline est arrêté"""
+    start = time.perf_counter()
+    try:
+        while True:
+            try:
+                return q.get(timeout=_POLL_S)
+            except queue.Empty:
+                if stop.is_set():
+                    return _DONE
+    finally:
+        stats.idle += time.perf_counter() - start
+
+def _timed_put(q: queue.Queue, item, stats: StageStats, stop: threading.Event) -> bool:
+    """Écrit dans la file aval ; False (élément abandonné) si le pipeline est arrêté"""
+    start = time.perf_counter()
+    try:
+        while not stop.is_set():
+            try:
+                q.put(item, timeout=_POLL_S)
+                return True
+            except queue.Full:
+                continue
+        return False
+    finally:
+        stats.idle += time.perf_counter() - start
+
+def _load(wav_path: Path, cache=None, packed=None):
+    """
+    Prépare un fichier pour l'étage modèle
+    
+    Si le fichier figure dans le corpus empaqueté (audio_utils.PackedCorpus)
+    et n'a pas été modifié depuis, le signal est une tranche du buffer mappé
+    au lieu d'une lecture du WAV.
+    
+    Returns:
+        (clé de cache, logits en cache, signal 1D ou exception) ; le signal
+        n'est pas lu si les logits sont déjà en cache
+    """
+    try:
+        samples = None
+        rel_path = packed.find(wav_path) if packed is not None else None
+        if rel_path is not None:
+            samples = packed.waveform(rel_path)
+        key = None
+        if cache is not None:
+            key = cache.key(wav_path, samples)
+            logits = cache.get(key)
+            if logits is not None:
+                instrumentation.count("cache.hits")
+                return key, logits, None
+            instrumentation.count("cache.misses")
+        if samples is not None:
+            return key, None, samples
+        return key, None, audio_utils.load_audio(wav_path, config.SAMPLE_RATE)[0].squeeze(0).numpy()
+    except Exception as e:
+        instrumentation.count("errors.load")
+        return None, None, e
+
+def _decode_batch(batch: List[Path], results: List, processor, decoders: Optional[Dict[str, Optional[object]]]) -> List[Tuple]:
+    """Décode les logits d'un batch ; repli fichier par fichier en cas d'échec"""
+    valid = [i for i, r in enumerate(results) if not isinstance(r, Exception)]
+    outputs = [(wav_path, None, r) if isinstance(r, Exception) else None for wav_path, r in zip(batch, results)]
+    
+    if decoders is None:
+        for i in valid:
+            outputs[i] = (batch[i], results[i], None)
+        return outputs
+    
+    try:
+        texts = {
+            name: inference.decode_logits_batch([results[i] for i in valid], processor, decoder)
+            for name, decoder in decoders.items()
+        }
+        for k, i in enumerate(valid):
+            outputs[i] = (batch[i], {name: texts[name][k] for name in decoders}, None)
+    except Exception:
+        for i in valid:
+            try:
+                hyps = {
+                    name: inference.decode_logits(results[i], processor, decoder)
+                    for name, decoder in decoders.items()
+                }
+                outputs[i] = (batch[i], hyps, None)
+            except Exception as e:
+                outputs[i] = (batch[i], None, e)
+    
+    return outputs
+
+def run_pipeline(
+    batches: List[List[Path]],
+    processor,
+    model,
+    decoders: Optional[Dict[str, Optional[object]]],
+    num_loaders: Optional[int] = None,
+    prefetch_batches: Optional[int] = None,
+    lengths: Optional[Dict[Path, int]] = None,
+    report=None,
+    cache=None,
+    packed=None,
+    device=None
+) -> Iterator[Tuple[Path, Optional[Dict[str, str]], Optional[Exception]]]:
+    """
+    Transcrit des batches en recouvrant lecture audio, passe du modèle et décodage
+    
+    Trois étages tournent en parallèle, reliés par des files bornées :
+    un pool de threads lit et ré-échantillonne les WAV, un thread modèle
+    calcule les logits de chaque batch prêt, un thread de décodage applique
+    les décodeurs. Les files bornées (prefetch_batches) limitent le nombre de
+    batches en mémoire : un étage en avance se bloque jusqu'à ce que l'étage
+    suivant ait consommé.
+    
+    Une exception hors des erreurs par fichier (itérateur de batches, pool,
+    cache...) est transmise d'étage en étage puis relevée par ce générateur :
+    le flux ne s'arrête jamais silencieusement sur un résultat incomplet. Si
+    l'appelant arrête l'itération (break, erreur, close), les étages
+    s'arrêtent au lieu de rester bloqués sur une file pleine.
+    
+    Args:
+        batches: Liste de batches (listes de chemins WAV)
+        processor: Wav2Vec2Processor
+        model: Wav2Vec2ForCTC
+        decoders: Dict {nom: décodeur} (None = greedy) ; si decoders est
+            None, l'étage de décodage renvoie directement les logits
+        num_loaders: Nombre de threads de lecture audio (défaut: config.LOADER_WORKERS)
+        prefetch_batches: Taille max de chaque file inter-étages, en batches
+            (défaut: config.PREFETCH_BATCHES)
+        lengths: Longueurs en échantillons (pour le rapport de padding)
+        report: scheduler.BatchReport optionnel
+        cache: inference.LogitsCache optionnel ; les fichiers en cache ne
+            sont ni relus ni passés au modèle
+        packed: audio_utils.PackedCorpus optionnel ; les fichiers empaquetés
+            sont servis depuis le buffer mappé (sans décodage WAV)
+        device: Device (cuda/cpu)
+        
+    Yields:
+        (wav_path, hyps, erreur) dans l'ordre des batches ; hyps vaut None
+        et erreur est renseignée si le fichier n'a pas pu être transcrit
+    """
+    num_loaders = config.LOADER_WORKERS if num_loaders is None else num_loaders
+    prefetch_batches = config.PREFETCH_BATCHES if prefetch_batches is None else prefetch_batches
+    ready_q = queue.Queue(maxsize=prefetch_batches)
+    logits_q = queue.Queue(maxsize=prefetch_batches)
+    out_q = queue.Queue(maxsize=prefetch_batches)
+    
+    stats = {name: StageStats(name) for name in ("lecture", "modèle", "décodage")}
+    stop = threading.Event()
+    
+    # Chaque étage transmet les exceptions (amont ou les siennes) à l'étage
+    # suivant, puis _DONE ; decode_stage les fait remonter jusqu'à l'appelant
+    def load_stage():
+        s = stats["lecture"]
+        try:
+            with ThreadPoolExecutor(max_workers=num_loaders) as pool:
+                for batch in batches:
+                    if stop.is_set():
+                        break
+                    start = time.perf_counter()
+                    loaded = list(pool.map(lambda wav_path: _load(wav_path, cache, packed), batch))
+                    s.busy += time.perf_counter() - start
+                    s.items += 1
+                    if not _timed_put(ready_q, (batch, loaded), s, stop):
+                        break
+        except Exception as e:
+            _timed_put(ready_q, e, s, stop)
+        finally:
+            _timed_put(ready_q, _DONE, s, stop)
+    
+    long_samples = int(config.CHUNK_LENGTH_S * config.SAMPLE_RATE)
+    
+    def model_stage():
+        s = stats["modèle"]
+        try:
+            while True:
+                item = _timed_get(ready_q, s, stop)
+                if item is _DONE:
+                    break
+                if isinstance(item, Exception):
+                    _timed_put(logits_q, item, s, stop)
+                    continue
+                batch, loaded = item
+                start = time.perf_counter()
+                
+                # Logits en cache ou erreur de lecture : rien à calculer
+                results = [
+                    cached if cached is not None else (w if isinstance(w, Exception) else None)
+                    for _, cached, w in loaded
+                ]
+                todo = [i for i, r in enumerate(results) if r is None]
+                # Audio long : fenêtres recouvrantes, hors du batch
+                short = [i for i in todo if len(loaded[i][2]) <= long_samples]
+                try:
+                    if short:
+                        batch_logits = inference.compute_logits_batch(
+                            [loaded[i][2] for i in short], processor, model, device
+                        )
+                        for i, logits in zip(short, batch_logits):
+                            results[i] = logits
+                except Exception as e:
+                    # Repli fichier par fichier (ci-dessous) pour isoler l'erreur
+                    logger.warning(f"Échec du batch ({e}), repli fichier par fichier")
+                for i in todo:
+                    if results[i] is None:
+                        try:
+                            results[i] = inference.compute_logits_long(loaded[i][2], processor, model, device=device)
+                        except Exception as e_file:
+                            results[i] = e_file
+                
+                if cache is not None:
+                    # Logits décodés = logits relus d'un cache chaud (float16 arrondi)
+                    for i in todo:
+                        key = loaded[i][0]
+                        if key is not None and not isinstance(results[i], Exception):
+                            try:
+                                results[i] = cache.put(key, results[i])
+                            except OSError as e:
+                                logger.warning(f"Écriture cache impossible ({batch[i].name}): {e}")
+                
+                elapsed = time.perf_counter() - start
+                s.busy += elapsed
+                s.items += 1
+                if not _timed_put(logits_q, (batch, results, elapsed), s, stop):
+                    break
+        except Exception as e:
+            _timed_put(logits_q, e, s, stop)
+        finally:
+            _timed_put(logits_q, _DONE, s, stop)
+    
+    def decode_stage():
+        s = stats["décodage"]
+        try:
+            while True:
+                item = _timed_get(logits_q, s, stop)
+                if item is _DONE:
+                    break
+                if isinstance(item, Exception):
+                    raise item
+                batch, results, forward_time = item
+                start = time.perf_counter()
+                
+                outputs = _decode_batch(batch, results, processor, decoders)
+                
+                elapsed = time.perf_counter() - start
+                s.busy += elapsed
+                s.items += 1
+                if report is not None and lengths is not None:
+                    report.record([lengths[p] for p in batch if p in lengths], forward_time + elapsed)
+                if not _timed_put(out_q, outputs, s, stop):
+                    break
+        except Exception as e:
+            _timed_put(out_q, e, s, stop)
+        finally:
+            _timed_put(out_q, _DONE, s, stop)
+    
+    threads = [
+        threading.Thread(target=stage, name=f"pipeline-{stage.__name__}", daemon=True)
+        for stage in (load_stage, model_stage, decode_stage)
+    ]
+    for t in threads:
+        t.start()
+    
+    try:
+        while True:
+            outputs = out_q.get()
+            if outputs is _DONE:
+                break
+            if isinstance(outputs, Exception):
+                raise outputs
+            yield from outputs
+    finally:
+        # Fin normale, exception ou itération abandonnée : les étages bloqués s'arrêtent
+        stop.set()
+        for t in threads:
+            t.join()
+    
+    logger.info("===== PIPELINE : OCCUPATION DES ÉTAGES =====")
+    for s in stats.values():
+        s.log()
+    if cache is not None:
+        cache.log_stats()
+
+if __name__ == "__main__":
+    print("pipeline.py - Pipeline de transcription (lecture / modèle / décodage)")
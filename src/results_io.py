@@ -0,0 +1,173 @@
+"""Écriture incrémentale des résultats détaillés (CSV) avec reprise"""
+import csv
+import os
+import re
+from pathlib import Path
+from typing import List, Set
+from loguru import logger
+
+# Colonnes de results_detailed.csv
+RESULT_COLUMNS = ["Filename", "SNR", "Speaker", "Length", "Reference", "Hyp_NoLM", "Hyp_LM"]
+
+def _repair_partial_line(path: Path):
+    """Tronque une dernière ligne incomplète (arrêt brutal pendant l'écriture)"""
+    with open(path, 'rb+') as f:
+        data = f.read()
+        if data and not data.endswith(b"\n"):
+            f.truncate(data.rfind(b"\n") + 1)
+            logger.warning(f"Dernière ligne incomplète supprimée dans {path.name}")
+
+def shard_path(path: Path, index: int, num_shards: int) -> Path:
+    """CSV partiel d'un shard : results_detailed.csv -> results_detailed.shard-K-of-N.csv"""
+    path = Path(path)
+    return path.with_name(f"{path.stem}.shard-{index}-of-{num_shards}{path.suffix}")
+
+def find_shards(path: Path) -> List[Path]:
+    """
+    CSV partiels d'un run découpé en shards, triés par indice
+
+    Raises:
+        FileNotFoundError: Aucun shard, ou shards manquants
+        ValueError: Shards de découpages différents (nombres de shards distincts)
+    """
+    path = Path(path)
+    pattern = re.compile(re.escape(path.stem) + r"\.shard-(\d+)-of-(\d+)" + re.escape(path.suffix) + "$")
+    found = {}
+    for candidate in path.parent.glob(f"{path.stem}.shard-*{path.suffix}"):
+        match = pattern.match(candidate.name)
+        if match:
+            found[(int(match.group(1)), int(match.group(2)))] = candidate
+    if not found:
+        raise FileNotFoundError(f"Aucun shard de {path.name} dans {path.parent}")
+
+    counts = {n for _, n in found}
+    if len(counts) > 1:
+        raise ValueError(f"Shards de découpages différents ({sorted(counts)}) dans {path.parent}")
+    num_shards = counts.pop()
+    missing = [k for k in range(num_shards) if (k, num_shards) not in found]
+    if missing:
+        raise FileNotFoundError(f"Shards manquants pour {path.name} : {missing} (sur {num_shards})")
+    return [found[(k, num_shards)] for k in range(num_shards)]
+
+def _read_rows(path: Path) -> List[dict]:
+    _repair_partial_line(path)
+    with open(path, newline='', encoding='utf-8') as f:
+        return list(csv.DictReader(f))
+
+def _write_sorted(rows: List[dict], path: Path, columns: List[str]):
+    """Écrit les lignes triées par Filename (écriture atomique)"""
+    rows = sorted(rows, key=lambda row: row["Filename"])
+    tmp = path.with_name(path.name + ".tmp")
+    with open(tmp, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.DictWriter(f, fieldnames=columns)
+        writer.writeheader()
+        writer.writerows(rows)
+    os.replace(tmp, path)
+
+def sort_results(path: Path, columns: List[str] = RESULT_COLUMNS):
+    """
+    Trie un CSV de résultats par Filename
+
+    L'ordre d'écriture dépend des batches et des reprises : trié, le CSV
+    (et les statistiques qui en découlent) ne dépend plus que de son contenu.
+    """
+    _write_sorted(_read_rows(Path(path)), Path(path), columns)
+
+def merge_shards(shard_paths: List[Path], output: Path, columns: List[str] = RESULT_COLUMNS) -> int:
+    """
+    Fusionne les CSV partiels des shards en un CSV trié par Filename
+
+    Le résultat est identique, octet pour octet, au CSV d'un run unique
+    trié par sort_results, quel que soit le nombre de shards.
+
+    Returns:
+        Nombre de lignes écrites
+
+    Raises:
+        ValueError: Fichier présent dans plusieurs shards
+    """
+    rows = {}
+    for path in shard_paths:
+        for row in _read_rows(Path(path)):
+            if row["Filename"] in rows:
+                raise ValueError(f"{row['Filename']} présent dans plusieurs shards ({Path(path).name})")
+            rows[row["Filename"]] = row
+    _write_sorted(list(rows.values()), Path(output), columns)
+    logger.info(f"{len(shard_paths)} shards fusionnés : {len(rows)} lignes dans {Path(output).name}")
+    return len(rows)
+
+def load_completed(path: Path) -> Set[str]:
+    """Noms des fichiers déjà présents dans un CSV de résultats"""
+    if not path.exists() or path.stat().st_size == 0:
+        return set()
+    with open(path, newline='', encoding='utf-8') as f:
+        return {row["Filename"] for row in csv.DictReader(f)}
+
+class ResultsWriter:
+    """
+    Ajoute les lignes de résultats au CSV au fil de l'eau
+    
+    Les lignes sont vidées sur disque toutes les flush_every lignes : un
+    arrêt brutal ne perd au plus que ce dernier lot. En mode reprise, les
+    lignes existantes sont conservées et `completed` liste les fichiers
+    déjà transcrits, à exclure du run.
+    """
+    
+    def __init__(
+        self,
+        path: Path,
+        columns: List[str] = RESULT_COLUMNS,
+        flush_every: int = 50,
+        resume: bool = True
+    ):
+        """
+        Args:
+            path: Chemin du CSV de sortie
+            columns: Colonnes du CSV
+            flush_every: Nombre de lignes entre deux écritures sur disque
+            resume: Conserver les résultats existants (sinon le fichier est écrasé)
+        """
+        self.path = Path(path)
+        self.flush_every = flush_every
+        self.completed = set()
+        self._pending = 0
+        
+        resuming = resume and self.path.exists() and self.path.stat().st_size > 0
+        if resuming:
+            _repair_partial_line(self.path)
+            self.completed = load_completed(self.path)
+            logger.info(f"Reprise : {len(self.completed)} fichiers déjà présents dans {self.path.name}")
+        
+        self._file = open(self.path, 'a' if resuming else 'w', newline='', encoding='utf-8')
+        self._writer = csv.DictWriter(self._file, fieldnames=columns)
+        if not resuming:
+            self._writer.writeheader()
+    
+    def write(self, row: dict):
+        """Ajoute une ligne de résultat"""
+        self._writer.writerow(row)
+        self.completed.add(row["Filename"])
+        self._pending += 1
+        if self._pending >= self.flush_every:
+            self.flush()
+    
+    def flush(self):
+        """Force l'écriture sur disque des lignes en attente"""
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._pending = 0
+    
+    def close(self):
+        """Vide les lignes en attente et ferme le fichier"""
+        if not self._file.closed:
+            self.flush()
+            self._file.close()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc):
+        self.close()
+
+if __name__ == "__main__":
+    print("results_io.py - Écriture incrémentale des résultats")
@@ -0,0 +1,142 @@
+"""Ordonnancement des batches par longueur (réduction du padding)"""
+import math
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, List, Optional
+from loguru import logger
+import audio_utils
+import config
+
+def get_num_samples(wav_files: List[Path], target_sr: Optional[int] = None) -> Dict[Path, int]:
+    """
+    Nombre d'échantillons de chaque fichier après ré-échantillonnage
+    
+    Seul l'en-tête des fichiers est lu (audio_utils.get_audio_info).
+    Les fichiers illisibles sont absents du dict retourné.
+    """
+    target_sr = config.SAMPLE_RATE if target_sr is None else target_sr
+    lengths = {}
+    for wav_path in wav_files:
+        try:
+            info = audio_utils.get_audio_info(wav_path)
+        except Exception as e:
+            logger.error(f"En-tête illisible {wav_path.name}: {e}")
+            continue
+        lengths[wav_path] = math.ceil(info['num_frames'] * target_sr / info['sample_rate'])
+    return lengths
+
+def plan_batches(
+    wav_files: List[Path],
+    max_batch_samples: Optional[int] = None,
+    max_batch_size: Optional[int] = None,
+    lengths: Optional[Dict[Path, int]] = None
+) -> List[List[Path]]:
+    """
+    Regroupe les fichiers en batches de longueurs homogènes
+    
+    Les fichiers sont triés par durée puis remplis tant que le coût paddé
+    du batch (plus long énoncé x nombre d'énoncés) reste sous le budget.
+    Un fichier plus long que le budget forme un batch à lui seul.
+    
+    Args:
+        wav_files: Liste des fichiers WAV
+        max_batch_samples: Budget d'échantillons paddés par passe du modèle (défaut: config.MAX_BATCH_SAMPLES)
+        max_batch_size: Nombre max de fichiers par batch (optionnel)
+        lengths: Longueurs pré-calculées (sinon lues via get_num_samples)
+        
+    Returns:
+        Liste de batches (listes de chemins), du plus court au plus long
+    """
+    max_batch_samples = config.MAX_BATCH_SAMPLES if max_batch_samples is None else max_batch_samples
+    if lengths is None:
+        lengths = get_num_samples(wav_files)
+    
+    readable = sorted((p for p in wav_files if p in lengths), key=lambda p: (lengths[p], str(p)))
+    
+    batches = []
+    current = []
+    for wav_path in readable:
+        # Trié par ordre croissant : le nouveau fichier devient le plus long
+        padded_cost = lengths[wav_path] * (len(current) + 1)
+        full = max_batch_size is not None and len(current) >= max_batch_size
+        if current and (padded_cost > max_batch_samples or full):
+            batches.append(current)
+            current = []
+        current.append(wav_path)
+    if current:
+        batches.append(current)
+    
+    # Fichiers illisibles : isolés pour que l'erreur soit journalisée sans bloquer un batch
+    batches.extend([p] for p in wav_files if p not in lengths)
+    
+    logger.info(
+        f"{len(batches)} batches planifiés pour {len(wav_files)} fichiers "
+        f"(budget {max_batch_samples} échantillons)"
+    )
+    return batches
+
+class BatchReport:
+    """Statistiques de padding et de débit par bucket de durée"""
+    
+    def __init__(self, bucket_width: float = 1.0, sample_rate: Optional[int] = None, padded: bool = True):
+        """
+        Args:
+            bucket_width: Largeur des buckets en secondes (durée max du batch)
+            sample_rate: Fréquence d'échantillonnage des longueurs enregistrées (défaut: config.SAMPLE_RATE)
+            padded: Mode de passe réellement utilisé (inference.pads_batches) :
+                True = une passe paddée par batch, False = une passe par signal
+                (aucun padding)
+        """
+        sample_rate = config.SAMPLE_RATE if sample_rate is None else sample_rate
+        self.bucket_width = bucket_width
+        self.sample_rate = sample_rate
+        self.padded = padded
+        self.buckets = defaultdict(lambda: {
+            'batches': 0, 'forwards': 0, 'utterances': 0, 'samples': 0, 'padded_samples': 0, 'seconds': 0.0
+        })
+    
+    def record(self, batch_lengths: List[int], elapsed: float):
+        """Enregistre un batch traité (longueurs en échantillons, durée en s)"""
+        if not batch_lengths:
+            return
+        max_len = max(batch_lengths)
+        bucket = int(max_len / self.sample_rate // self.bucket_width)
+        stats = self.buckets[bucket]
+        stats['batches'] += 1
+        stats['forwards'] += 1 if self.padded else len(batch_lengths)
+        stats['utterances'] += len(batch_lengths)
+        stats['samples'] += sum(batch_lengths)
+        stats['padded_samples'] += max_len * len(batch_lengths) if self.padded else sum(batch_lengths)
+        stats['seconds'] += elapsed
+    
+    def summary(self) -> List[dict]:
+        """Une ligne par bucket : passes du modèle, padding ratio et énoncés/s"""
+        rows = []
+        for bucket in sorted(self.buckets):
+            stats = self.buckets[bucket]
+            padded = stats['padded_samples']
+            rows.append({
+                'bucket': f"{bucket * self.bucket_width:.1f}-{(bucket + 1) * self.bucket_width:.1f}s",
+                'batches': stats['batches'],
+                'forwards': stats['forwards'],
+                'utterances': stats['utterances'],
+                'padding_ratio': 1 - stats['samples'] / padded if padded else 0.0,
+                'utt_per_sec': stats['utterances'] / stats['seconds'] if stats['seconds'] > 0 else 0.0
+            })
+        return rows
+    
+    def log_summary(self):
+        """Affiche le mode de passe puis le rapport par bucket dans les logs"""
+        if self.padded:
+            logger.info("Passes du modèle : une passe paddée par batch")
+        else:
+            logger.info("Passes du modèle : un signal par passe (modèle sans masque d'attention), aucun padding")
+        logger.info(f"{'Bucket':<12} {'Batches':>8} {'Passes':>7} {'Utt':>6} {'Padding':>8} {'Utt/s':>8}")
+        for row in self.summary():
+            logger.info(
+                f"{row['bucket']:<12} {row['batches']:>8} {row['forwards']:>7} {row['utterances']:>6} "
+                f"{row['padding_ratio']*100:>7.1f}% {row['utt_per_sec']:>8.2f}"
+            )
+
+if __name__ == "__main__":
+    print("scheduler.py - Ordonnancement des batches par longueur")
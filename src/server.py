@@ -0,0 +1,314 @@
+"""Serveur de transcription asyncio (HTTP / WebSocket) avec micro-batching des requêtes"""
+import asyncio
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+import numpy as np
+from aiohttp import WSMsgType, web
+from loguru import logger
+import audio_utils
+import config
+import inference
+
+class LatencyWindow:
+    """Dernières mesures de latence (fenêtre glissante) et leurs percentiles"""
+
+    def __init__(self, size: int = 10_000):
+        self.values = deque(maxlen=size)
+
+    def add(self, seconds: float):
+        self.values.append(seconds)
+
+    def percentiles(self) -> Dict[str, float]:
+        """p50 / p95 / p99 en millisecondes (0 si aucune mesure)"""
+        if not self.values:
+            return {'p50': 0.0, 'p95': 0.0, 'p99': 0.0}
+        p50, p95, p99 = np.percentile(np.array(self.values) * 1000, [50, 95, 99])
+        return {'p50': float(p50), 'p95': float(p95), 'p99': float(p99)}
+
+class MicroBatcher:
+    """
+    Regroupe les requêtes concurrentes en micro-batches
+
+    Une requête attend au plus max_wait_ms que d'autres la rejoignent ;
+    le batch part dès qu'il atteint max_batch_size requêtes ou le budget
+    d'échantillons paddés. Les passes du modèle tournent dans un thread
+    unique (le modèle n'est jamais appelé en parallèle) pour ne pas
+    bloquer la boucle asyncio.
+
+    Les modèles sans masque d'attention (type wav2vec2-base, voir
+    inference.pads_batches) font une passe par signal : attendre d'autres
+    requêtes n'ajouterait que de la latence. Le batch part alors sans
+    attente, avec les seules requêtes déjà en file (décodage groupé).
+    """
+
+    def __init__(
+        self,
+        processor,
+        model,
+        decoders: Dict[str, Optional[object]],
+        max_batch_size: Optional[int] = None,
+        max_wait_ms: Optional[float] = None,
+        max_batch_samples: Optional[int] = None,
+        device=None
+    ):
+        """
+        Args:
+            processor: Wav2Vec2Processor
+            model: Wav2Vec2ForCTC (ou backend compatible)
+            decoders: Dict {nom: décodeur} (None = greedy), comme inference.transcribe_multi
+            max_batch_size: Requêtes max par passe du modèle (défaut: config.SERVER_MAX_BATCH)
+            max_wait_ms: Attente max pour compléter un batch (défaut:
+                config.SERVER_MAX_WAIT_MS ; ignorée si le modèle ne peut pas
+                grouper ses passes)
+            max_batch_samples: Budget d'échantillons paddés par passe (défaut: config.MAX_BATCH_SAMPLES)
+            device: Device (cuda/cpu)
+        """
+        max_batch_size = config.SERVER_MAX_BATCH if max_batch_size is None else max_batch_size
+        max_wait_ms = config.SERVER_MAX_WAIT_MS if max_wait_ms is None else max_wait_ms
+        max_batch_samples = config.MAX_BATCH_SAMPLES if max_batch_samples is None else max_batch_samples
+        self.processor = processor
+        self.model = model
+        self.decoders = decoders
+        self.max_batch_size = max_batch_size
+        self.batched_forward = inference.pads_batches(processor)
+        self.max_wait = max_wait_ms / 1000 if self.batched_forward else 0.0
+        if not self.batched_forward:
+            logger.info("Modèle sans masque d'attention : une passe par requête, micro-batches sans attente")
+        self.max_batch_samples = max_batch_samples
+        self.device = device
+        self.long_samples = int(config.CHUNK_LENGTH_S * config.SAMPLE_RATE)
+
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="modele")
+        self._queue = None
+        self._carry = None
+        self._task = None
+
+        self.requests = 0
+        self.errors = 0
+        self.batches = 0
+        self.batched_requests = 0
+        self.in_flight = 0
+        self.latency = LatencyWindow()
+        self.queue_wait = LatencyWindow()
+        self.batch_time = LatencyWindow()
+
+    async def start(self):
+        """Démarre la boucle de batching (dans la boucle asyncio courante)"""
+        self._queue = asyncio.Queue()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Arrête la boucle de batching et le thread modèle"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        self._executor.shutdown(wait=True)
+
+    async def submit(self, waveform: np.ndarray) -> Dict[str, str]:
+        """
+        Transcrit un signal (mono float32, config.SAMPLE_RATE)
+
+        Returns:
+            Dict {nom du décodeur: texte}
+        """
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        start = time.perf_counter()
+        self.requests += 1
+        self.in_flight += 1
+        await self._queue.put((waveform, future, start))
+        try:
+            return await future
+        except Exception:
+            self.errors += 1
+            raise
+        finally:
+            self.in_flight -= 1
+            self.latency.add(time.perf_counter() - start)
+
+    async def _collect(self) -> List[tuple]:
+        """Attend une requête puis complète le batch pendant au plus max_wait (puis avec les requêtes déjà en file)"""
+        first = self._carry if self._carry is not None else await self._queue.get()
+        self._carry = None
+        batch = [first]
+        longest = len(first[0])
+
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.max_wait
+        while len(batch) < self.max_batch_size and longest <= self.long_samples:
+            timeout = deadline - loop.time()
+            try:
+                if timeout > 0:
+                    item = await asyncio.wait_for(self._queue.get(), timeout)
+                else:
+                    item = self._queue.get_nowait()
+            except (asyncio.TimeoutError, asyncio.QueueEmpty):
+                break
+            # Hors budget (ou audio long) : l'item ouvrira le batch suivant
+            candidate = max(longest, len(item[0]))
+            if len(item[0]) > self.long_samples or candidate * (len(batch) + 1) > self.max_batch_samples:
+                self._carry = item
+                break
+            batch.append(item)
+            longest = candidate
+        return batch
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = await self._collect()
+            now = time.perf_counter()
+            for _, _, start in batch:
+                self.queue_wait.add(now - start)
+
+            waveforms = [waveform for waveform, _, _ in batch]
+            results = await loop.run_in_executor(self._executor, self._process, waveforms)
+            self.batch_time.add(time.perf_counter() - now)
+            self.batches += 1
+            self.batched_requests += len(batch)
+
+            for (_, future, _), result in zip(batch, results):
+                if future.done():
+                    continue  # Client parti entre-temps
+                if isinstance(result, Exception):
+                    future.set_exception(result)
+                else:
+                    future.set_result(result)
+
+    def _process(self, waveforms: List[np.ndarray]) -> List:
+        """Passe du modèle et décodage (thread modèle) ; repli requête par requête en cas d'échec"""
+        try:
+            if len(waveforms) == 1:
+                batch_logits = [inference.compute_logits_long(waveforms[0], self.processor, self.model, device=self.device)]
+            else:
+                batch_logits = inference.compute_logits_batch(waveforms, self.processor, self.model, self.device)
+            texts = {
+                name: inference.decode_logits_batch(batch_logits, self.processor, decoder)
+                for name, decoder in self.decoders.items()
+            }
+            return [{name: texts[name][i] for name in self.decoders} for i in range(len(waveforms))]
+        except Exception as e:
+            if len(waveforms) == 1:
+                logger.error(f"Échec de la transcription: {e}")
+                return [e]
+            logger.warning(f"Échec du batch ({e}), repli requête par requête")
+            return [self._process([waveform])[0] for waveform in waveforms]
+
+    def metrics(self) -> dict:
+        """Profondeur de file, débit et percentiles de latence"""
+        return {
+            'queue_depth': self._queue.qsize() if self._queue is not None else 0,
+            'in_flight': self.in_flight,
+            'requests': self.requests,
+            'errors': self.errors,
+            'batches': self.batches,
+            'mean_batch_size': self.batched_requests / self.batches if self.batches else 0.0,
+            'batched_forward': self.batched_forward,
+            'latency_ms': self.latency.percentiles(),
+            'queue_wait_ms': self.queue_wait.percentiles(),
+            'batch_time_ms': self.batch_time.percentiles()
+        }
+
+BATCHER = web.AppKey("batcher", MicroBatcher)
+
+async def _read_upload(request: web.Request) -> bytes:
+    """Fichier audio d'une requête : champ multipart 'file' ou corps brut"""
+    if request.content_type.startswith("multipart/"):
+        reader = await request.multipart()
+        async for part in reader:
+            if part.name == "file":
+                return await part.read()
+        raise web.HTTPBadRequest(text="Champ multipart 'file' manquant")
+    return await request.read()
+
+async def _transcribe_bytes(batcher: MicroBatcher, data: bytes) -> dict:
+    """Décode l'audio (hors boucle asyncio) puis le soumet au micro-batching"""
+    start = time.perf_counter()
+    loop = asyncio.get_running_loop()
+    try:
+        waveform = await loop.run_in_executor(None, audio_utils.decode_audio_bytes, data, config.SAMPLE_RATE)
+    except Exception as e:
+        raise ValueError(f"Audio illisible: {e}") from e
+    hyps = await batcher.submit(waveform)
+    return {
+        'hyps': hyps,
+        'duration_s': len(waveform) / config.SAMPLE_RATE,
+        'latency_ms': (time.perf_counter() - start) * 1000
+    }
+
+async def handle_transcribe(request: web.Request) -> web.Response:
+    """POST /transcribe : un fichier audio -> {hyps, duration_s, latency_ms}"""
+    data = await _read_upload(request)
+    if not data:
+        return web.json_response({'error': "Corps de requête vide"}, status=400)
+    try:
+        result = await _transcribe_bytes(request.app[BATCHER], data)
+    except ValueError as e:
+        return web.json_response({'error': str(e)}, status=400)
+    except Exception as e:
+        return web.json_response({'error': str(e)}, status=500)
+    return web.json_response(result)
+
+async def handle_websocket(request: web.Request) -> web.WebSocketResponse:
+    """
+    GET /ws : chaque message binaire est un fichier audio
+
+    Les messages sont traités concurremment (ils peuvent partager un
+    micro-batch) ; chaque réponse JSON porte l'id du message (0, 1, ...).
+    """
+    ws = web.WebSocketResponse()
+    await ws.prepare(request)
+    batcher = request.app[BATCHER]
+
+    async def answer(message_id: int, data: bytes):
+        try:
+            result = await _transcribe_bytes(batcher, data)
+        except Exception as e:
+            result = {'error': str(e)}
+        if not ws.closed:
+            await ws.send_json({'id': message_id, **result})
+
+    tasks = set()
+    message_id = 0
+    async for msg in ws:
+        if msg.type == WSMsgType.BINARY:
+            task = asyncio.create_task(answer(message_id, msg.data))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+            message_id += 1
+        elif msg.type == WSMsgType.TEXT:
+            await ws.send_json({'error': "Messages binaires (fichiers audio) attendus"})
+    if tasks:
+        await asyncio.gather(*tasks, return_exceptions=True)
+    return ws
+
+async def handle_metrics(request: web.Request) -> web.Response:
+    """GET /metrics : file d'attente, débit et latences"""
+    return web.json_response(request.app[BATCHER].metrics())
+
+async def handle_health(request: web.Request) -> web.Response:
+    return web.json_response({'status': "ok"})
+
+def create_app(batcher: MicroBatcher) -> web.Application:
+    """Application aiohttp ; le batcher démarre et s'arrête avec elle"""
+    app = web.Application(client_max_size=config.SERVER_MAX_UPLOAD_MB * 1024 * 1024)
+    app[BATCHER] = batcher
+
+    async def on_startup(app):
+        await app[BATCHER].start()
+
+    async def on_cleanup(app):
+        await app[BATCHER].stop()
+
+    app.on_startup.append(on_startup)
+    app.on_cleanup.append(on_cleanup)
+    app.router.add_post("/transcribe", handle_transcribe)
+    app.router.add_get("/ws", handle_websocket)
+    app.router.add_get("/metrics", handle_metrics)
+    app.router.add_get("/health", handle_health)
+    return app
@@ -0,0 +1,222 @@
+"""Reconnaissance en flux : audio reçu par petits morceaux, hypothèses partielles et finales"""
+import time
+import numpy as np
+from pathlib import Path
+from typing import Iterator, Optional
+from loguru import logger
+import audio_utils
+import config
+import inference
+
+class StreamingRecognizer:
+    """
+    Transcription incrémentale d'un flux audio (ex. morceaux de 20 à 100 ms)
+
+    Wav2Vec2 n'est pas causal : à chaque pas (dès step_ms d'audio nouveau),
+    le modèle est relancé sur une fenêtre glissante = contexte gauche déjà
+    transcrit + audio nouveau. Les frames à plus de lookahead_ms de la fin
+    du flux sont figées (leurs logits ne seront plus recalculés) ; les
+    dernières frames restent provisoires et sont recalculées au pas suivant.
+    L'hypothèse partielle (greedy) couvre frames figées + provisoires ;
+    l'hypothèse finale (finish) applique le décodeur (LM ou greedy) à
+    l'ensemble des logits figés.
+
+    Usage:
+        recognizer = StreamingRecognizer(processor, model, decoder)
+        for chunk in simulate_stream(wav_path, chunk_ms=40):
+            print(recognizer.accept_chunk(chunk)['text'])
+        print(recognizer.finish()['text'])
+        recognizer.reset()  # énoncé suivant
+    """
+
+    # En dessous, le signal est plus court que le champ réceptif de l'extracteur
+    MIN_WINDOW_SAMPLES = 400
+
+    def __init__(
+        self,
+        processor,
+        model,
+        decoder=None,
+        step_ms: Optional[float] = None,
+        left_context_s: Optional[float] = None,
+        lookahead_ms: Optional[float] = None,
+        device=None
+    ):
+        """
+        Args:
+            processor: Wav2Vec2Processor
+            model: Wav2Vec2ForCTC (ou backend compatible, ex. inference.OnnxWav2Vec2)
+            decoder: Décodeur des hypothèses finales (model_loader.load_decoder) ; None = greedy
+            step_ms: Audio nouveau (ms) déclenchant une passe du modèle (défaut: config.STREAM_STEP_MS)
+            left_context_s: Contexte gauche (s) redonné au modèle à chaque pas (défaut: config.STREAM_LEFT_CONTEXT_S)
+            lookahead_ms: Frames plus récentes que ce délai laissées provisoires (défaut: config.STREAM_LOOKAHEAD_MS)
+            device: Device (cuda/cpu)
+        """
+        step_ms = config.STREAM_STEP_MS if step_ms is None else step_ms
+        left_context_s = config.STREAM_LEFT_CONTEXT_S if left_context_s is None else left_context_s
+        lookahead_ms = config.STREAM_LOOKAHEAD_MS if lookahead_ms is None else lookahead_ms
+        self.processor = processor
+        self.model = model
+        self.decoder = decoder
+        self.device = device
+
+        sr = config.SAMPLE_RATE
+        self.frame = inference.samples_per_frame(model)
+        self.step = max(1, int(step_ms * sr / 1000))
+        self.left_context = int(left_context_s * sr) // self.frame * self.frame
+        self.lookahead = int(lookahead_ms * sr / 1000)
+        self.reset()
+
+    def reset(self):
+        """Prépare un nouvel énoncé (audio, logits et statistiques remis à zéro)"""
+        self._buffer = np.zeros(0, dtype=np.float32)
+        self._buffer_start = 0  # Indice global du premier échantillon du buffer
+        self._received = 0  # Échantillons reçus
+        self._pending = 0  # Échantillons reçus depuis la dernière passe
+        self._committed = 0  # Fin (échantillons, alignée sur les frames) des logits figés
+        self._stable_logits = []
+        self._stable_ids = []
+        self._tail_ids = np.zeros(0, dtype=np.int64)
+        self.partial = ""
+        self.latencies = []
+        self.compute_time = 0.0
+        self.model_calls = 0
+
+    def accept_chunk(self, chunk: np.ndarray) -> dict:
+        """
+        Ajoute un morceau d'audio (mono, float32, config.SAMPLE_RATE)
+
+        Returns:
+            {'text': hypothèse partielle, 'is_final': False,
+             'latency_ms': temps de traitement du morceau, 'audio_s': audio reçu}
+        """
+        start = time.perf_counter()
+        chunk = np.asarray(chunk, dtype=np.float32).reshape(-1)
+        self._buffer = np.concatenate([self._buffer, chunk])
+        self._received += len(chunk)
+        self._pending += len(chunk)
+
+        if self._pending >= self.step:
+            self._update(final=False)
+
+        return self._result(start, is_final=False)
+
+    def finish(self) -> dict:
+        """
+        Termine l'énoncé : fige les dernières frames et décode le tout
+
+        Returns:
+            {'text': hypothèse finale, 'is_final': True, 'latency_ms', 'audio_s'}
+        """
+        start = time.perf_counter()
+        if self._received > self._committed:
+            self._update(final=True)
+
+        if self._stable_logits:
+            logits = np.concatenate(self._stable_logits, axis=0)
+            self.partial = inference.decode_logits(logits, self.processor, self.decoder)
+        return self._result(start, is_final=True)
+
+    def _result(self, start: float, is_final: bool) -> dict:
+        latency = time.perf_counter() - start
+        self.latencies.append(latency)
+        self.compute_time += latency
+        return {
+            'text': self.partial,
+            'is_final': is_final,
+            'latency_ms': latency * 1000,
+            'audio_s': self._received / config.SAMPLE_RATE
+        }
+
+    def _update(self, final: bool):
+        """Passe du modèle sur contexte gauche + audio nouveau, puis mise à jour des logits figés"""
+        window_start = max(0, self._committed - self.left_context)
+        audio = self._buffer[window_start - self._buffer_start:]
+        if len(audio) < self.MIN_WINDOW_SAMPLES:
+            return
+
+        logits = inference.compute_logits_batch([audio], self.processor, self.model, self.device)[0]
+        self.model_calls += 1
+
+        # Frames locales : frame f <-> échantillon global window_start + f * frame
+        first = (self._committed - window_start) // self.frame
+        if final:
+            stable_end = len(logits)
+        else:
+            stable_end = (self._received - self.lookahead - window_start) // self.frame
+            stable_end = min(max(first, stable_end), len(logits))
+
+        if stable_end > first:
+            self._stable_logits.append(logits[first:stable_end])
+            self._stable_ids.append(np.argmax(logits[first:stable_end], axis=-1))
+        self._tail_ids = np.argmax(logits[stable_end:], axis=-1)
+        self._committed = window_start + stable_end * self.frame
+        self._pending = 0
+
+        # L'audio antérieur au contexte gauche ne sera plus relu
+        keep_from = max(0, self._committed - self.left_context)
+        self._buffer = self._buffer[keep_from - self._buffer_start:]
+        self._buffer_start = keep_from
+
+        ids = np.concatenate(self._stable_ids + [self._tail_ids])
+        self.partial = audio_utils.clean_text(self.processor.decode(ids))
+
+    def stats(self) -> dict:
+        """
+        Latence par morceau et facteur temps réel de l'énoncé en cours
+
+        Returns:
+            Dict (audio_s, compute_s, rtf, chunks, model_calls,
+            latency_ms_p50 / p95 / max)
+        """
+        audio_s = self._received / config.SAMPLE_RATE
+        latencies_ms = np.array(self.latencies) * 1000 if self.latencies else np.zeros(1)
+        return {
+            'audio_s': audio_s,
+            'compute_s': self.compute_time,
+            'rtf': self.compute_time / audio_s if audio_s > 0 else 0.0,
+            'chunks': len(self.latencies),
+            'model_calls': self.model_calls,
+            'latency_ms_p50': float(np.percentile(latencies_ms, 50)),
+            'latency_ms_p95': float(np.percentile(latencies_ms, 95)),
+            'latency_ms_max': float(latencies_ms.max())
+        }
+
+    def log_stats(self):
+        """Affiche latence et facteur temps réel"""
+        s = self.stats()
+        logger.info(
+            f"Flux: {s['audio_s']:.2f}s d'audio, {s['chunks']} morceaux, {s['model_calls']} passes | "
+            f"RTF {s['rtf']:.3f} | latence p50 {s['latency_ms_p50']:.1f} ms, "
+            f"p95 {s['latency_ms_p95']:.1f} ms, max {s['latency_ms_max']:.1f} ms"
+        )
+
+def simulate_stream(
+    wav_path: Path,
+    chunk_ms: float = 40,
+    target_sr: Optional[int] = None,
+    realtime: bool = False
+) -> Iterator[np.ndarray]:
+    """
+    Simule un flux micro à partir d'un WAV
+
+    Args:
+        wav_path: Fichier WAV
+        chunk_ms: Durée de chaque morceau (ms)
+        target_sr: Fréquence d'échantillonnage du flux (défaut: config.SAMPLE_RATE)
+        realtime: Si True, attend la durée de chaque morceau (cadence réelle)
+
+    Yields:
+        Morceaux mono float32 de chunk_ms (le dernier peut être plus court)
+    """
+    target_sr = config.SAMPLE_RATE if target_sr is None else target_sr
+    waveform, _ = audio_utils.load_audio(wav_path, target_sr)
+    signal = waveform.squeeze(0).numpy()
+    size = max(1, int(chunk_ms * target_sr / 1000))
+
+    next_time = time.perf_counter()
+    for i in range(0, len(signal), size):
+        if realtime:
+            next_time += size / target_sr
+            time.sleep(max(0.0, next_time - time.perf_counter()))
+        yield signal[i:i + size]
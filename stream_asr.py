@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Simulation de reconnaissance en flux : un WAV est envoyé par petits morceaux
+Usage: python stream_asr.py --wav data/corpus/.../file.wav --chunk-ms 40 --use-lm --lm-path lm.arpa
+"""
+import sys
+from pathlib import Path
+import argparse
+
+# Ajouter src/ au PYTHONPATH
+sys.path.insert(0, str(Path(__file__).parent / "src"))
+
+import config
+import audio_utils
+import model_loader
+import streaming
+
+
+def parse_args():
+    """Parse les arguments de ligne de commande"""
+    parser = argparse.ArgumentParser(
+        description="Reconnaissance en flux simulée : hypothèses partielles, latence et RTF"
+    )
+    
+    parser.add_argument("--wav", type=Path, nargs="+", required=True,
+                        help="Fichier(s) WAV à envoyer en flux (un énoncé par fichier)")
+    parser.add_argument("--chunk-ms", type=float, default=40,
+                        help="Durée des morceaux envoyés (défaut: 40 ms)")
+    parser.add_argument("--step-ms", type=float, default=config.STREAM_STEP_MS,
+                        help=f"Audio nouveau déclenchant une passe du modèle (défaut: {config.STREAM_STEP_MS} ms)")
+    parser.add_argument("--left-context", type=float, default=config.STREAM_LEFT_CONTEXT_S,
+                        help=f"Contexte gauche en secondes (défaut: {config.STREAM_LEFT_CONTEXT_S})")
+    parser.add_argument("--realtime", action="store_true",
+                        help="Envoyer les morceaux à la cadence réelle")
+    parser.add_argument("--use-lm", action="store_true",
+                        help="Décoder l'hypothèse finale avec le modèle de langage")
+    parser.add_argument("--lm-path", type=Path, default=None,
+                        help="Chemin vers le fichier .arpa du modèle de langage")
+    
+    return parser.parse_args()
+
+
+def main():
+    """Fonction principale"""
+    args = parse_args()
+    config.setup_logging()
+    
+    processor, model = model_loader.load_model()
+    decoder = model_loader.load_language_model(args.lm_path, processor) if args.use_lm else None
+    
+    recognizer = streaming.StreamingRecognizer(
+        processor, model, decoder, step_ms=args.step_ms, left_context_s=args.left_context
+    )
+    
+    for wav_path in args.wav:
+        recognizer.reset()
+        last = None
+        for chunk in streaming.simulate_stream(wav_path, args.chunk_ms, realtime=args.realtime):
+            result = recognizer.accept_chunk(chunk)
+            if result['text'] != last:
+                print(f"[{result['audio_s']:6.2f}s] … {result['text']}")
+                last = result['text']
+        
+        final = recognizer.finish()
+        print(f"[{final['audio_s']:6.2f}s] ✔ {final['text']}")
+        
+        reference_path = wav_path.with_suffix('.txt')
+        if reference_path.exists():
+            print(f"          REF {audio_utils.load_reference(wav_path)}")
+        recognizer.log_stats()
+    
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+Sweep des hyperparamètres du décodeur (alpha, beta, beam_width)
+Usage: python sweep_decoder.py --corpus data/corpus --lm-path lm.arpa --alphas 0.3 0.5 1.0 --betas 0 1.5
+"""
+import sys
+from pathlib import Path
+import argparse
+import itertools
+import time
+import numpy as np
+import pandas as pd
+from loguru import logger
+
+# Ajouter src/ au PYTHONPATH
+sys.path.insert(0, str(Path(__file__).parent / "src"))
+
+import config
+import model_loader
+import inference
+import evaluation
+import scheduler
+import pipeline
+import decoding
+import manifest
+
+
+def parse_args():
+    """Parse les arguments de ligne de commande"""
+    parser = argparse.ArgumentParser(
+        description="Sweep des hyperparamètres du décodeur pyctcdecode sur logits pré-calculés"
+    )
+    
+    parser.add_argument("--corpus", type=Path, default=config.CORPUS_DIR,
+                        help=f"Dossier contenant les fichiers .wav (défaut: {config.CORPUS_DIR})")
+    parser.add_argument("--lm-path", type=Path, required=True,
+                        help="Chemin vers le fichier .arpa ou .bin du modèle de langage")
+    parser.add_argument("--pattern", type=str, default="**/*.wav",
+                        help="Pattern de recherche des fichiers WAV (défaut: **/*.wav)")
+    parser.add_argument("--skip-scan", action="store_true",
+                        help="Réutiliser le manifeste du corpus sans re-parcourir l'arborescence")
+    parser.add_argument("--alphas", type=float, nargs="+", default=[0.3, 0.5, 0.7, 1.0],
+                        help="Valeurs de alpha (poids du LM)")
+    parser.add_argument("--betas", type=float, nargs="+", default=[0.0, 0.5, 1.5, 3.0],
+                        help="Valeurs de beta (bonus par mot)")
+    parser.add_argument("--beam-widths", type=int, nargs="+", default=[50, 100],
+                        help="Largeurs de faisceau")
+    parser.add_argument("--random", type=int, default=None,
+                        help="Recherche aléatoire : nombre de tirages dans les bornes de --alphas/--betas")
+    parser.add_argument("--workers", type=int, default=config.DECODE_WORKERS,
+                        help=f"Nombre de processus de décodage (défaut: {config.DECODE_WORKERS})")
+    parser.add_argument("--max-files", type=int, default=None,
+                        help="Nombre max de fichiers à traiter (pour tests rapides)")
+    parser.add_argument("--seed", type=int, default=42,
+                        help="Seed pour la recherche aléatoire (défaut: 42)")
+    parser.add_argument("--output", type=Path, default=config.PROJECT_ROOT / "sweep_results.csv",
+                        help="Fichier CSV du tableau de résultats")
+    
+    return parser.parse_args()
+
+
+def build_trials(args) -> list:
+    """Grille complète ou tirages aléatoires des hyperparamètres"""
+    if args.random:
+        rng = np.random.default_rng(args.seed)
+        return [
+            {
+                'alpha': float(rng.uniform(min(args.alphas), max(args.alphas))),
+                'beta': float(rng.uniform(min(args.betas), max(args.betas))),
+                'beam_width': int(rng.choice(args.beam_widths))
+            }
+            for _ in range(args.random)
+        ]
+    return [
+        {'alpha': a, 'beta': b, 'beam_width': bw}
+        for a, b, bw in itertools.product(args.alphas, args.betas, args.beam_widths)
+    ]
+
+
+def main():
+    """Fonction principale"""
+    args = parse_args()
+    config.setup_logging()
+    
+    # Fichiers du manifeste du corpus (mis à jour incrémentalement)
+    entries = manifest.select(manifest.build_manifest(args.corpus, refresh=not args.skip_scan), args.pattern)
+    if not entries:
+        logger.error(f"Aucun fichier .wav trouvé dans {args.corpus}")
+        return 1
+    
+    if args.max_files:
+        entries = entries[:args.max_files]
+    wav_files = manifest.wav_paths(entries, args.corpus)
+    known_refs = manifest.references(entries, args.corpus)
+    
+    # 1. Logits calculés une seule fois (ou relus du cache)
+    processor, model = model_loader.load_model()
+    cache = inference.LogitsCache() if config.USE_LOGITS_CACHE else None
+    batches = scheduler.plan_batches(wav_files, lengths=manifest.num_samples(entries, args.corpus))
+    
+    references, logits_list = [], []
+    for wav_path, logits, error in pipeline.run_pipeline(batches, processor, model, None, cache=cache):
+        try:
+            if error is not None:
+                raise error
+            if known_refs[wav_path] is None:
+                raise FileNotFoundError(f"Transcription introuvable pour {wav_path.name}")
+            references.append(known_refs[wav_path])
+            logits_list.append(logits)
+        except Exception as e:
+            logger.error(f"Erreur sur {wav_path.name}: {e}")
+    
+    # Le modèle acoustique n'est plus nécessaire pendant le sweep
+    del model
+    
+    # 2. Sweep parallèle des configurations du décodeur
+    trials = build_trials(args)
+    rows = []
+    start_time = time.time()
+    for params, hypotheses, decode_time in decoding.sweep(
+        processor, args.lm_path, logits_list, trials, args.workers
+    ):
+        rows.append({
+            **params,
+            'WER': evaluation.compute_wer(references, hypotheses),
+            'Decode_Time_s': decode_time
+        })
+    logger.info(f"Sweep terminé en {time.time() - start_time:.2f}s")
+    
+    df = pd.DataFrame(rows).sort_values('WER')
+    df.to_csv(args.output, index=False)
+    
+    print("\n" + "="*70)
+    print(f"SWEEP DÉCODEUR - {len(references)} fichiers, {len(trials)} configurations")
+    print("="*70)
+    print(df.to_string(index=False, float_format=lambda x: f"{x:.3f}"))
+    print("="*70)
+    print(f"Tableau sauvegardé : {args.output}\n")
+    
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
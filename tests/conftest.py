@@ -0,0 +1,88 @@
+"""Fixtures communes : modèle Wav2Vec2 minuscule initialisé aléatoirement (aucun téléchargement)"""
+import json
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+import numpy as np
+import pytest
+import torch
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+VOCAB = ["<pad>", "<s>", "</s>", "<unk>", "|", "E", "T", "A", "O", "N", "I", "H", "S", "R", "D", "L", "U", "'"]
+
+class LocalConvCTC(torch.nn.Module):
+    """
+    Modèle CTC purement convolutif (une couche, noyau 400, pas 320)
+
+    Chaque frame ne dépend que de ses 400 échantillons : avec assez de
+    contexte, les logits calculés par fenêtres (flux, transcription longue)
+    sont exactement ceux d'une passe sur l'enregistrement entier.
+    """
+
+    def __init__(self):
+        super().__init__()
+        torch.manual_seed(0)
+        self.conv = torch.nn.Conv1d(1, len(VOCAB), kernel_size=400, stride=320)
+        self.config = SimpleNamespace(conv_stride=(320,))
+        self.dtype = torch.float32
+
+    def _get_feat_extract_output_lengths(self, lengths):
+        return (lengths - 400) // 320 + 1
+
+    @torch.no_grad()
+    def forward(self, input_values, attention_mask=None):
+        return SimpleNamespace(logits=self.conv(input_values.unsqueeze(1)).transpose(1, 2))
+
+@pytest.fixture
+def tiny_wav2vec2(tmp_path):
+    """
+    Fabrique (processor, model) d'un Wav2Vec2ForCTC minuscule, en mode évaluation
+
+    with_mask=False reproduit wav2vec2-base (group norm, pas de masque
+    d'attention) ; with_mask=True les modèles type large-lv60 (layer norm,
+    masque transmis au modèle).
+    """
+    from transformers import (
+        Wav2Vec2Config, Wav2Vec2CTCTokenizer, Wav2Vec2FeatureExtractor,
+        Wav2Vec2ForCTC, Wav2Vec2Processor
+    )
+
+    def build(with_mask: bool = False, do_normalize: bool = True):
+        vocab_path = tmp_path / "vocab.json"
+        vocab_path.write_text(json.dumps({token: i for i, token in enumerate(VOCAB)}))
+        tokenizer = Wav2Vec2CTCTokenizer(str(vocab_path), word_delimiter_token="|")
+        feature_extractor = Wav2Vec2FeatureExtractor(
+            sampling_rate=16000,
+            do_normalize=do_normalize,
+            return_attention_mask=with_mask
+        )
+        processor = Wav2Vec2Processor(feature_extractor=feature_extractor, tokenizer=tokenizer)
+
+        torch.manual_seed(0)
+        model_config = Wav2Vec2Config(
+            vocab_size=len(VOCAB),
+            hidden_size=32,
+            num_hidden_layers=2,
+            num_attention_heads=2,
+            intermediate_size=64,
+            conv_dim=(16,) * 7,
+            num_conv_pos_embeddings=16,
+            num_conv_pos_embedding_groups=2,
+            feat_extract_norm="layer" if with_mask else "group",
+            do_stable_layer_norm=with_mask,
+            pad_token_id=0
+        )
+        model = Wav2Vec2ForCTC(model_config).eval()
+        return processor, model
+
+    return build
+
+@pytest.fixture
+def waveforms():
+    """Signaux de longueurs différentes (et distinctes d'un multiple de frame)"""
+    rng = np.random.default_rng(0)
+    return [
+        (0.1 * rng.standard_normal(int(seconds * 16000))).astype(np.float32)
+        for seconds in (1.3, 0.7, 2.05)
+    ]
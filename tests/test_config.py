@@ -0,0 +1,30 @@
+"""Surcharges de config : chemins dérivés et défauts lus à l'appel"""
+from pathlib import Path
+
+import pytest
+
+import config
+import scheduler
+
+@pytest.fixture
+def restore_config():
+    saved = {name: value for name, value in vars(config).items() if name.isupper()}
+    yield
+    vars(config).update(saved)
+
+def test_project_root_moves_derived_paths(restore_config, tmp_path):
+    outside = tmp_path / "elsewhere" / "logs"
+    config.override(log_dir=outside)
+    config.override(project_root=tmp_path / "root", models_dir=tmp_path / "models")
+
+    assert config.PROJECT_ROOT == tmp_path / "root"
+    assert config.DATA_DIR == tmp_path / "root" / "data"
+    assert config.CORPUS_DIR == tmp_path / "root" / "data" / "corpus"
+    assert config.LOGITS_CACHE_DIR == tmp_path / "root" / ".cache" / "logits"
+    # Surcharges explicites conservées
+    assert config.LOG_DIR == outside
+    assert config.MODELS_DIR == tmp_path / "models"
+
+def test_defaults_read_at_call_time(restore_config):
+    config.override(sample_rate=8000)
+    assert scheduler.BatchReport().sample_rate == 8000
@@ -0,0 +1,27 @@
+"""Bootstrap des WER (evaluation)"""
+import numpy as np
+import pytest
+
+import evaluation
+
+def test_bootstrap_means_rejects_empty_input():
+    with pytest.raises(ValueError):
+        evaluation.bootstrap_means(np.array([]))
+    with pytest.raises(ValueError):
+        evaluation.bootstrap_means(np.empty((0, 2)))
+
+@pytest.mark.parametrize("values", [np.array([0.0, 0.5, 1.0] * 20), np.linspace(0, 1, 7)])
+def test_bootstrap_means_stay_within_value_range(values):
+    boot = evaluation.bootstrap_means(values, n_boot=500, seed=0)
+
+    assert boot.shape == (500,)
+    assert boot.min() >= values.min() and boot.max() <= values.max()
+
+def test_grouped_bootstrap_skips_empty_groups():
+    counts = np.array([[1, 0, 0, 4], [0, 1, 0, 3]])
+    groups = {'full': [counts, counts], 'empty': [np.empty((0, 4)), np.empty((0, 4))]}
+
+    stats = evaluation.grouped_bootstrap_ci_counts(groups, n_boot=100)
+
+    assert list(stats) == ['full']
+    assert stats['full'][0][0] == evaluation.wer_from_counts(counts)
@@ -0,0 +1,35 @@
+"""Cache disque des logits (inference.LogitsCache)"""
+import numpy as np
+import pytest
+
+import inference
+
+@pytest.mark.parametrize("float16", [False, True])
+def test_put_returns_what_get_reads_back(tmp_path, float16):
+    cache = inference.LogitsCache(tmp_path, max_bytes=10**9, model_id="tiny", float16=float16)
+    logits = np.random.default_rng(0).standard_normal((50, 18)).astype(np.float32) * 10
+    key = cache.key(tmp_path / "a.wav", logits[:, 0])
+
+    decoded = cache.put(key, logits)
+    cached = cache.get(key)
+
+    assert decoded.dtype == cached.dtype == np.float32
+    np.testing.assert_array_equal(decoded, cached)
+    if not float16:
+        np.testing.assert_array_equal(decoded, logits)
+
+def test_precision_is_part_of_the_key(tmp_path):
+    samples = np.zeros(16000, dtype=np.float32)
+    keys = {
+        inference.LogitsCache(tmp_path, model_id="tiny", float16=float16).key(tmp_path / "a.wav", samples)
+        for float16 in (False, True)
+    }
+    assert len(keys) == 2
+
+def test_overwrite_keeps_size_accounting(tmp_path):
+    cache = inference.LogitsCache(tmp_path, max_bytes=10**9, model_id="tiny")
+    logits = np.ones((100, 18), dtype=np.float32)
+    cache.put("k", logits)
+    cache.put("k", logits)
+
+    assert cache._size == sum(f.stat().st_size for f in tmp_path.glob("*.npy"))
@@ -0,0 +1,39 @@
+"""Transcription longue par fenêtres recouvrantes (compute_logits_long)"""
+import numpy as np
+import pytest
+import torch
+
+import inference
+from conftest import LocalConvCTC
+
+def test_stitched_logits_match_a_full_pass(tiny_wav2vec2):
+    # Modèle à champ réceptif borné, sans normalisation globale : le recollage doit être exact
+    processor, _ = tiny_wav2vec2(do_normalize=False)
+    model = LocalConvCTC()
+    waveform = (0.1 * np.random.default_rng(0).standard_normal(int(3.3 * 16000))).astype(np.float32)
+
+    full = inference.compute_logits_batch([waveform], processor, model, torch.device("cpu"))[0]
+    stitched = inference.compute_logits_long(
+        waveform, processor, model, chunk_length_s=1.0, context_s=0.1, chunk_batch_size=2, device=torch.device("cpu")
+    )
+
+    assert stitched.shape == full.shape
+    np.testing.assert_allclose(stitched, full, atol=1e-5)
+
+def test_stitched_logits_cover_every_frame(tiny_wav2vec2):
+    processor, model = tiny_wav2vec2()
+    waveform = (0.1 * np.random.default_rng(0).standard_normal(int(3.3 * 16000))).astype(np.float32)
+
+    full = inference.compute_logits_batch([waveform], processor, model, torch.device("cpu"))[0]
+    stitched = inference.compute_logits_long(
+        waveform, processor, model, chunk_length_s=1.0, context_s=0.1, chunk_batch_size=2, device=torch.device("cpu")
+    )
+
+    assert stitched.shape == full.shape
+
+def test_context_shorter_than_a_frame_is_rejected(tiny_wav2vec2):
+    processor, model = tiny_wav2vec2()
+    waveform = np.zeros(int(3.3 * 16000), dtype=np.float32)
+
+    with pytest.raises(ValueError):
+        inference.compute_logits_long(waveform, processor, model, chunk_length_s=1.0, context_s=0.0)
@@ -0,0 +1,26 @@
+"""Sélection des fichiers du manifeste (manifest.select)"""
+from pathlib import Path
+import pytest
+
+import manifest
+
+FILES = [
+    "root.wav",
+    "SNR05dB/man/seq1digits/a.wav",
+    "SNR05dB/man/seq3digits/b.wav",
+    "SNR35dB/woman/seq1digits/c.wav",
+    "SNR35dB/woman/notes.wav.txt"
+]
+
+@pytest.mark.parametrize("pattern", [
+    "**/*.wav", "*.wav", "*/*.wav", "SNR05dB/**/*.wav", "SNR*/*/seq1digits/*.wav",
+    "**/seq1digits/*.wav", "SNR35dB/*.wav", "**/?.wav", "SNR05dB/**"
+])
+def test_select_matches_path_glob(tmp_path, pattern):
+    for rel_path in FILES:
+        (tmp_path / rel_path).parent.mkdir(parents=True, exist_ok=True)
+        (tmp_path / rel_path).touch()
+    entries = [{'path': rel_path} for rel_path in FILES]
+
+    expected = sorted(p.relative_to(tmp_path).as_posix() for p in tmp_path.glob(pattern) if p.is_file())
+    assert sorted(e['path'] for e in manifest.select(entries, pattern)) == expected
@@ -0,0 +1,76 @@
+"""Chargement des modèles (model_loader)"""
+import sys
+
+import numpy as np
+import pytest
+import torch
+
+import config
+import inference
+import model_loader
+
+def test_int8_model_runs_with_the_default_device_on_a_gpu_config(tiny_wav2vec2, waveforms, tmp_path, monkeypatch):
+    processor, model = tiny_wav2vec2()
+    model_dir = tmp_path / "tiny"
+    model.save_pretrained(model_dir)
+    processor.save_pretrained(model_dir)
+
+    # Machine CUDA : config.DEVICE résolu sur le GPU
+    monkeypatch.setattr(config, "DEVICE", torch.device("cuda"))
+    processor, model = model_loader.load_quantized_model(str(model_dir), checkpoint=tmp_path / "tiny-int8.pt")
+
+    assert config.DEVICE.type == "cpu"
+    logits = inference.compute_logits_batch(waveforms[:1], processor, model)
+    assert np.isfinite(logits[0]).all()
+
+ARPA = """
+\\data\\
+ngram 1=4
+ngram 2=2
+
+\\1-grams:
+-1.0\t<s>\t-0.3
+-1.0\t</s>
+-0.5\tONE\t-0.3
+-0.5\tTWO\t-0.3
+
+\\2-grams:
+-0.2\t<s> ONE
+-0.2\tONE TWO
+
+\\end\\
+"""
+
+@pytest.fixture
+def arpa(tmp_path, monkeypatch):
+    monkeypatch.setattr(config, "LM_BINARY_DIR", tmp_path / "kenlm")
+    path = tmp_path / "tiny.arpa"
+    path.write_text(ARPA.lstrip(), encoding="utf-8")
+    return path
+
+def fake_build_binary(tmp_path):
+    """build_binary factice : copie l'ARPA (dernier argument = sortie)"""
+    script = tmp_path / "build_binary"
+    script.write_text(f"#!{sys.executable}\nimport shutil, sys\nshutil.copy(sys.argv[-2], sys.argv[-1])\n")
+    script.chmod(0o755)
+    return str(script)
+
+def test_cached_binary_is_reused_without_hashing_or_building(arpa, tmp_path, monkeypatch):
+    monkeypatch.setattr(config, "KENLM_BUILD_BINARY", fake_build_binary(tmp_path))
+    binary = model_loader.convert_lm_to_binary(arpa)
+    assert binary.suffix == ".bin" and binary.exists()
+
+    def fail(*args, **kwargs):
+        raise AssertionError("ARPA re-haché ou reconverti")
+    monkeypatch.setattr(model_loader, "_sha256", fail)
+    monkeypatch.setattr(model_loader.subprocess, "run", fail)
+    assert model_loader.convert_lm_to_binary(arpa) == binary
+
+def test_missing_build_binary_falls_back_to_the_arpa(arpa, tiny_wav2vec2, monkeypatch):
+    monkeypatch.setattr(config, "KENLM_BUILD_BINARY", "build_binary-introuvable")
+    assert model_loader.convert_lm_to_binary(arpa) == arpa
+
+    processor, _ = tiny_wav2vec2()
+    decoder = model_loader.load_decoder(processor, arpa)
+    logits = np.zeros((5, len(processor.tokenizer)), dtype=np.float32)
+    assert isinstance(decoder.decode(logits), str)
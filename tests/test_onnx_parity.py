@@ -0,0 +1,24 @@
+"""Parité des logits entre le backend ONNX Runtime et PyTorch"""
+import numpy as np
+import pytest
+import torch
+
+pytest.importorskip("onnxruntime")
+
+import inference
+import model_loader
+
+@pytest.mark.parametrize("with_mask", [False, True])
+def test_onnx_logits_match_torch(tiny_wav2vec2, waveforms, tmp_path, with_mask):
+    processor, model = tiny_wav2vec2(with_mask=with_mask)
+    onnx_path = model_loader.export_onnx(model, processor, tmp_path / "model.onnx")
+    onnx_model = inference.OnnxWav2Vec2(onnx_path, model.config)
+
+    cpu = torch.device("cpu")
+    expected = inference.compute_logits_batch(waveforms, processor, model, cpu)
+    actual = inference.compute_logits_batch(waveforms, processor, onnx_model, cpu)
+
+    assert len(actual) == len(expected)
+    for exp, act in zip(expected, actual):
+        assert act.shape == exp.shape
+        np.testing.assert_allclose(act, exp, atol=1e-4, rtol=1e-4)
@@ -0,0 +1,69 @@
+"""Corpus pré-décodé (audio_utils.pack_corpus / PackedCorpus)"""
+import os
+import numpy as np
+import pytest
+import soundfile as sf
+
+import audio_utils
+
+def write_utterance(root, rel_path, seconds, seed, subtype="PCM_16"):
+    """WAV + référence .txt sous root/SNR/locuteur/longueur/"""
+    path = root / rel_path
+    path.parent.mkdir(parents=True, exist_ok=True)
+    signal = 0.3 * np.random.default_rng(seed).standard_normal(int(seconds * 16000))
+    sf.write(path, np.clip(signal, -1.0, 1.0), 16000, subtype=subtype)
+    path.with_suffix(".txt").write_text("one two", encoding="utf-8")
+    return path
+
+@pytest.fixture
+def corpus(tmp_path):
+    root = tmp_path / "corpus"
+    # Même nom de fichier dans deux dossiers : contenus différents
+    paths = [
+        write_utterance(root, "SNR05dB/man/seq1digits/a.wav", 0.5, seed=0),
+        write_utterance(root, "SNR35dB/man/seq1digits/a.wav", 0.7, seed=1),
+        write_utterance(root, "SNR35dB/woman/seq3digits/b.wav", 1.2, seed=2)
+    ]
+    return root, paths
+
+@pytest.mark.parametrize("dtype", ["float32", "int16"])
+def test_packed_waveforms_match_read_audio(corpus, tmp_path, dtype):
+    root, paths = corpus
+    audio_utils.pack_corpus(paths, root, tmp_path / "packed", dtype=dtype)
+    packed = audio_utils.PackedCorpus(tmp_path / "packed")
+
+    for wav_path in paths:
+        expected, _ = audio_utils.read_audio(wav_path)
+        actual = packed.waveform(packed.find(wav_path))
+        assert actual.dtype == np.float32
+        np.testing.assert_array_equal(actual, expected)
+
+def test_modified_file_is_not_served_from_the_pack(corpus, tmp_path):
+    root, paths = corpus
+    audio_utils.pack_corpus(paths, root, tmp_path / "packed")
+
+    write_utterance(root, "SNR35dB/woman/seq3digits/b.wav", 0.9, seed=3)
+    packed = audio_utils.PackedCorpus(tmp_path / "packed")
+
+    assert packed.find(paths[0]) == "SNR05dB/man/seq1digits/a.wav"
+    assert packed.find(paths[2]) is None
+    assert packed.find(tmp_path / "elsewhere" / "a.wav") is None
+
+def test_validate_drops_entries_that_differ_from_the_manifest(corpus, tmp_path):
+    root, paths = corpus
+    audio_utils.pack_corpus(paths, root, tmp_path / "packed")
+    packed = audio_utils.PackedCorpus(tmp_path / "packed")
+
+    manifest_entries = []
+    for wav_path in paths:
+        st = os.stat(wav_path)
+        manifest_entries.append({
+            'path': wav_path.relative_to(root).as_posix(),
+            'size': st.st_size,
+            'mtime_ns': st.st_mtime_ns
+        })
+    manifest_entries[1]['mtime_ns'] += 1
+
+    assert packed.validate(manifest_entries) == 1
+    assert packed.find(paths[1]) is None
+    assert packed.find(paths[0]) is not None
@@ -0,0 +1,68 @@
+"""Pipeline lecture / modèle / décodage : erreurs transmises, arrêt anticipé"""
+import threading
+import time
+import numpy as np
+import pytest
+import soundfile as sf
+import torch
+
+import pipeline
+
+@pytest.fixture
+def wav_files(tmp_path):
+    rng = np.random.default_rng(0)
+    paths = []
+    for i in range(8):
+        path = tmp_path / f"utt{i}.wav"
+        sf.write(path, (0.1 * rng.standard_normal(8000)).astype(np.float32), 16000, subtype="FLOAT")
+        paths.append(path)
+    return paths
+
+def run(batches, tiny_wav2vec2, **kwargs):
+    processor, model = tiny_wav2vec2()
+    return pipeline.run_pipeline(
+        batches, processor, model, {"greedy": None}, prefetch_batches=1, device=torch.device("cpu"), **kwargs
+    )
+
+def pipeline_threads():
+    return [t for t in threading.enumerate() if t.name.startswith("pipeline-")]
+
+def wait_for_pipeline_threads(timeout=5.0):
+    deadline = time.time() + timeout
+    while pipeline_threads() and time.time() < deadline:
+        time.sleep(0.05)
+    return pipeline_threads()
+
+def test_failing_batch_iterator_is_raised(tiny_wav2vec2, wav_files):
+    def batches():
+        yield wav_files[:2]
+        raise RuntimeError("listing interrompu")
+
+    outputs = []
+    with pytest.raises(RuntimeError, match="listing interrompu"):
+        for output in run(batches(), tiny_wav2vec2):
+            outputs.append(output)
+    assert len(outputs) == 2
+    assert not wait_for_pipeline_threads()
+
+def test_model_stage_error_is_raised(tiny_wav2vec2, wav_files):
+    class BrokenCache:
+        def key(self, wav_path, samples=None):
+            return wav_path.name
+        def get(self, key):
+            return None
+        def put(self, key, logits):
+            raise RuntimeError("cache corrompu")
+
+    with pytest.raises(RuntimeError, match="cache corrompu"):
+        list(run([wav_files[:2], wav_files[2:4]], tiny_wav2vec2, cache=BrokenCache()))
+    assert not wait_for_pipeline_threads()
+
+def test_early_stop_releases_blocked_stages(tiny_wav2vec2, wav_files):
+    transcriptions = run([[p] for p in wav_files], tiny_wav2vec2)
+    wav_path, hyps, error = next(transcriptions)
+    assert error is None and "greedy" in hyps
+
+    # Étages en avance bloqués sur des files pleines (prefetch_batches=1)
+    transcriptions.close()
+    assert not wait_for_pipeline_threads()
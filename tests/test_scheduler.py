@@ -0,0 +1,27 @@
+"""Rapport de batches (scheduler.BatchReport) selon le mode de passe du modèle"""
+import config
+import inference
+import scheduler
+
+def test_per_signal_forwards_report_no_padding():
+    report = scheduler.BatchReport(padded=False)
+    report.record([16000, 8000, 4000], elapsed=1.0)
+
+    row, = report.summary()
+    assert row['forwards'] == 3
+    assert row['padding_ratio'] == 0.0
+
+def test_padded_forwards_report_padding():
+    report = scheduler.BatchReport(padded=True)
+    report.record([16000, 8000], elapsed=1.0)
+
+    row, = report.summary()
+    assert row['forwards'] == 1
+    assert row['padding_ratio'] == 0.25
+
+def test_forward_mode_follows_the_attention_mask(tiny_wav2vec2, monkeypatch):
+    assert inference.pads_batches(tiny_wav2vec2(with_mask=True)[0])
+    unmasked, _ = tiny_wav2vec2(with_mask=False)
+    assert not inference.pads_batches(unmasked)
+    monkeypatch.setattr(config, "PAD_UNMASKED_BATCHES", True)
+    assert inference.pads_batches(unmasked)
@@ -0,0 +1,38 @@
+"""Micro-batching du serveur (server.MicroBatcher)"""
+import asyncio
+import time
+import pytest
+import torch
+
+pytest.importorskip("aiohttp")
+
+import server
+
+async def transcribe(batcher, waveforms):
+    await batcher.start()
+    try:
+        start = time.perf_counter()
+        results = await asyncio.gather(*(batcher.submit(w) for w in waveforms))
+        return results, time.perf_counter() - start
+    finally:
+        await batcher.stop()
+
+def test_unmasked_model_does_not_wait_for_a_batch(tiny_wav2vec2, waveforms):
+    processor, model = tiny_wav2vec2(with_mask=False)
+    batcher = server.MicroBatcher(processor, model, {"greedy": None}, max_wait_ms=10_000, device=torch.device("cpu"))
+
+    results, elapsed = asyncio.run(transcribe(batcher, waveforms[:1]))
+
+    assert not batcher.metrics()['batched_forward']
+    assert "greedy" in results[0]
+    assert elapsed < 5.0
+
+def test_queued_requests_share_a_batch(tiny_wav2vec2, waveforms):
+    processor, model = tiny_wav2vec2(with_mask=True)
+    batcher = server.MicroBatcher(processor, model, {"greedy": None}, max_wait_ms=200, device=torch.device("cpu"))
+
+    results, _ = asyncio.run(transcribe(batcher, waveforms))
+
+    assert batcher.metrics()['batched_forward']
+    assert len(results) == len(waveforms)
+    assert batcher.batches < len(waveforms)
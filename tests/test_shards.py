@@ -0,0 +1,50 @@
+"""Shards : mêmes logits qu'un run unique, y compris avec un cache de logits chaud"""
+import numpy as np
+import pytest
+import soundfile as sf
+import torch
+
+import inference
+import manifest
+import pipeline
+import scheduler
+
+@pytest.fixture
+def corpus(tmp_path):
+    """Petit corpus de WAV de longueurs différentes, réparti en sous-dossiers"""
+    rng = np.random.default_rng(0)
+    root = tmp_path / "corpus"
+    entries = []
+    for i, seconds in enumerate((0.6, 1.1, 0.9, 1.7, 0.6, 1.3, 2.2, 0.8)):
+        rel_path = f"spk{i % 3}/utt{i}.wav"
+        (root / rel_path).parent.mkdir(parents=True, exist_ok=True)
+        sf.write(root / rel_path, (0.1 * rng.standard_normal(int(seconds * 16000))).astype(np.float32), 16000, subtype="FLOAT")
+        entries.append({'path': rel_path})
+    return root, entries
+
+def run(entries, root, processor, model, cache):
+    wav_files = manifest.wav_paths(entries, root)
+    batches = scheduler.plan_batches(wav_files, max_batch_samples=60000)
+    outputs = pipeline.run_pipeline(batches, processor, model, None, cache=cache, device=torch.device("cpu"))
+    return {wav_path: logits for wav_path, logits, error in outputs if error is None}
+
+@pytest.mark.parametrize("float16", [False, True])
+def test_shards_with_warm_cache_match_a_cold_single_run(tiny_wav2vec2, corpus, tmp_path, float16):
+    root, entries = corpus
+    processor, model = tiny_wav2vec2()
+
+    single = run(entries, root, processor, model, inference.LogitsCache(tmp_path / "cold", model_id="tiny", float16=float16))
+
+    # Cache partiellement chaud : une autre répartition a déjà rempli une partie des entrées
+    warm_dir = tmp_path / "warm"
+    run(manifest.shard(entries, 0, 2), root, processor, model, inference.LogitsCache(warm_dir, model_id="tiny", float16=float16))
+
+    sharded = {}
+    for index in range(3):
+        cache = inference.LogitsCache(warm_dir, model_id="tiny", float16=float16)
+        sharded.update(run(manifest.shard(entries, index, 3), root, processor, model, cache))
+        assert cache.hits > 0 or not manifest.shard(entries, index, 3)
+
+    assert sharded.keys() == single.keys() and len(single) == len(entries)
+    for wav_path, logits in single.items():
+        np.testing.assert_array_equal(sharded[wav_path], logits)
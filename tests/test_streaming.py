@@ -0,0 +1,56 @@
+"""Reconnaissance en flux : l'hypothèse finale doit égaler transcribe_long"""
+import numpy as np
+import pytest
+import soundfile as sf
+import torch
+
+import inference
+import streaming
+from conftest import LocalConvCTC
+
+@pytest.fixture
+def wav_path(tmp_path):
+    rng = np.random.default_rng(0)
+    path = tmp_path / "stream.wav"
+    sf.write(path, (0.1 * rng.standard_normal(int(3.3 * 16000))).astype(np.float32), 16000, subtype="FLOAT")
+    return path
+
+def stream(recognizer, wav_path, chunk_ms=40):
+    for chunk in streaming.simulate_stream(wav_path, chunk_ms=chunk_ms):
+        recognizer.accept_chunk(chunk)
+    return recognizer.finish()
+
+def test_streamed_text_matches_transcribe_long(tiny_wav2vec2, wav_path):
+    # Normalisation désactivée : elle dépend de tout le signal vu par le modèle
+    processor, _ = tiny_wav2vec2(do_normalize=False)
+    model = LocalConvCTC()
+    cpu = torch.device("cpu")
+
+    expected = inference.transcribe_long(wav_path, processor, model, {"greedy": None}, device=cpu)["greedy"]
+    recognizer = streaming.StreamingRecognizer(
+        processor, model, step_ms=100, left_context_s=0.1, lookahead_ms=20, device=cpu
+    )
+    result = stream(recognizer, wav_path)
+
+    assert recognizer.model_calls > 10
+    assert result["is_final"]
+    assert expected
+    assert result["text"] == expected
+
+    waveform = sf.read(wav_path, dtype="float32")[0]
+    full = inference.compute_logits_batch([waveform], processor, model, cpu)[0]
+    streamed = np.concatenate(recognizer._stable_logits, axis=0)
+    assert streamed.shape == full.shape
+    np.testing.assert_allclose(streamed, full, atol=1e-5)
+
+def test_single_final_pass_matches_transcribe_long(tiny_wav2vec2, wav_path):
+    # Contexte et lookahead couvrant tout le signal : seule la passe finale fige des frames
+    processor, model = tiny_wav2vec2()
+    cpu = torch.device("cpu")
+
+    expected = inference.transcribe_long(wav_path, processor, model, {"greedy": None}, device=cpu)["greedy"]
+    recognizer = streaming.StreamingRecognizer(
+        processor, model, step_ms=500, left_context_s=10.0, lookahead_ms=10000, device=cpu
+    )
+
+    assert stream(recognizer, wav_path)["text"] == expected